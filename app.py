@@ -1,8 +1,22 @@
 """Main Flask application"""
-from flask import Flask, render_template, redirect, url_for
+from flask import Flask, render_template, redirect, url_for, jsonify
 from flask.json.provider import DefaultJSONProvider
 from flask_session import Session
 from config import Config
+from database.pool import configure_pool
+from database import context as db_context
+from database.async_db_manager import configure_async_pool
+from database.query_stats import configure_query_stats
+from database.retry import configure_retry, DatabaseUnavailableError
+from utils.cache import configure_cache
+from utils.events import configure_events
+from database.session_search import configure_search
+from database.partner_index import configure_partners
+from database.room_index import configure_rooms
+from database.compatibility_scores import configure_compatibility
+from database import compatibility_worker
+from utils import event_loop
+import commands
 from datetime import datetime, date, time, timedelta
 
 # Custom JSON encoder for database types
@@ -23,14 +37,43 @@ class CustomJSONProvider(DefaultJSONProvider):
             return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
         return super().default(obj)
 
+class StudySessionApp(Flask):
+    """Flask app that runs async views on one shared event loop"""
+    
+    def async_to_sync(self, func):
+        return event_loop.async_to_sync(func)
+
+
 # Initialize Flask app
-app = Flask(__name__)
+app = StudySessionApp(__name__)
 app.config.from_object(Config)
 app.json = CustomJSONProvider(app)
 
 # Initialize session
 Session(app)
 
+# Size the shared MySQL connection pool
+configure_pool(**getattr(Config, 'DB_POOL', {}))
+configure_async_pool(**getattr(Config, 'DB_ASYNC_POOL', {}))
+configure_query_stats(**getattr(Config, 'DB_QUERY_STATS', {}))
+configure_retry(**getattr(Config, 'DB_RETRY', {}))
+configure_cache(**getattr(Config, 'CACHE', {}))
+configure_events(**getattr(Config, 'EVENTS', {}))
+configure_search(**getattr(Config, 'SEARCH', {}))
+configure_partners(**getattr(Config, 'PARTNERS', {}))
+configure_rooms(**getattr(Config, 'ROOMS', {}))
+configure_compatibility(**getattr(Config, 'COMPATIBILITY', {}))
+compatibility_worker.configure_compatibility_worker(**getattr(Config, 'COMPATIBILITY_WORKER', {}))
+
+# One pooled connection per request, released on teardown
+db_context.init_app(app)
+
+# Rescore students whose profile changed, in a background thread
+compatibility_worker.init_app(app)
+
+# flask --app app <command> maintenance commands
+commands.init_app(app)
+
 # Import and register blueprints
 from routes.auth import auth_bp
 from routes.dashboard import dashboard_bp
@@ -40,6 +83,7 @@ from routes.notifications import notifications_bp
 from routes.analytics import analytics_bp
 from routes.profile import profile_bp
 from routes.subjects import subjects_bp
+from routes.admin import admin_bp
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(dashboard_bp)
@@ -49,6 +93,7 @@ app.register_blueprint(notifications_bp)
 app.register_blueprint(analytics_bp)
 app.register_blueprint(profile_bp)
 app.register_blueprint(subjects_bp)
+app.register_blueprint(admin_bp)
 
 
 @app.route('/')
@@ -66,6 +111,12 @@ def not_found(error):
     return render_template('404.html'), 404
 
 
+@app.errorhandler(DatabaseUnavailableError)
+def database_unavailable(error):
+    """Fail fast while the database circuit breaker is open"""
+    return jsonify({'success': False, 'message': 'Database temporarily unavailable'}), 503
+
+
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
@@ -0,0 +1,52 @@
+"""Compare partner search latency: FindStudyPartners vs the precomputed index
+
+Usage (from the project root, after `flask --app app rebuild-partner-index`):
+    python -m benchmarks.partner_benchmark                       # 10 sampled students
+    python -m benchmarks.partner_benchmark --samples 50 --start 18:00
+"""
+import argparse
+from datetime import date, timedelta
+from database import partner_index, procedures
+from benchmarks.search_benchmark import report, timed
+
+
+def run(samples, session_date, start_time, duration, repeat):
+    from config import Config
+    from database.db_manager import DatabaseManager
+
+    with DatabaseManager(Config.DB_CONFIG) as db:
+        enrolments = db.execute_query(
+            "SELECT student_id, subject_id FROM STUDENT_SUBJECT ORDER BY RAND() LIMIT %s",
+            (samples,)
+        )
+        print(f"{len(enrolments)} (student, subject) samples, {session_date} {start_time} for {duration}h")
+
+        procedure_timings = []
+        index_timings = []
+        for enrolment in enrolments:
+            args = (db, enrolment['student_id'], enrolment['subject_id'], session_date, start_time, duration)
+            procedure_timings += timed(lambda: procedures.find_study_partners(*args), repeat)
+            index_timings += timed(lambda: partner_index.find_partners(*args), repeat)
+            indexed = partner_index.find_partners(*args)
+            print(f"  student {enrolment['student_id']}, subject {enrolment['subject_id']}: "
+                  f"procedure {len(procedures.find_study_partners(*args))} partners, "
+                  + (f"index {len(indexed)} partners" if indexed is not None else "index falls back to the procedure"))
+
+        report('procedure', procedure_timings)
+        report('index', index_timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=10, help='(student, subject) pairs to search for')
+    parser.add_argument('--date', default=(date.today() + timedelta(days=1)).isoformat())
+    parser.add_argument('--start', default='14:00', help='window start (HH:MM)')
+    parser.add_argument('--duration', type=float, default=2, help='window length in hours')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per sample')
+    args = parser.parse_args()
+
+    run(args.samples, args.date, args.start, args.duration, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
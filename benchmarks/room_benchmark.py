@@ -0,0 +1,99 @@
+"""Compare room recommendation latency: the overlap query vs the room index
+
+Usage (from the project root):
+    python -m benchmarks.room_benchmark                     # against MySQL (config.py)
+    python -m benchmarks.room_benchmark --synthetic 20000   # index only, fake bookings
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from database import reference_data, room_index
+from database.room_index import RoomIndex, _BOOKING_QUERY, to_minutes
+from benchmarks.search_benchmark import report, timed
+
+# (session_date, start_time, end_time, max_participants) probes
+SLOTS = [(1, '09:00', '11:00', 4), (1, '14:00', '16:00', 10), (7, '18:00', '19:30', 2), (30, '10:00', '12:00', 15)]
+
+
+def synthetic_locations(count):
+    rng = random.Random(7)
+    return [{'location_id': location_id, 'building': f"Building {location_id // 20 + 1}",
+             'room_number': str(100 + location_id % 20), 'capacity': rng.choice([4, 6, 8, 10, 15, 20, 30])}
+            for location_id in range(1, count + 1)]
+
+
+def synthetic_bookings(count, locations):
+    rng = random.Random(42)
+    for session_id in range(1, count + 1):
+        start = rng.randrange(8 * 60, 20 * 60, 30)
+        yield {
+            'session_id': session_id,
+            'location_id': rng.randrange(1, locations + 1),
+            'session_date': date.today() + timedelta(days=rng.randrange(60)),
+            'start_time': timedelta(minutes=start),
+            'end_time': timedelta(minutes=start + rng.choice([60, 90, 120]))
+        }
+
+
+def probes():
+    for offset, start, end, capacity in SLOTS:
+        yield (date.today() + timedelta(days=offset)).isoformat(), start, end, capacity
+
+
+def run_synthetic(count, locations, repeat):
+    rooms = synthetic_locations(locations)
+    index = RoomIndex()
+    started = time.perf_counter()
+    index.load(synthetic_bookings(count, locations))
+    print(f"Indexed {count} synthetic bookings over {locations} rooms in "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+    for session_date, start, end, capacity in probes():
+        def recommend():
+            return index.recommend(rooms, capacity, session_date, to_minutes(start), to_minutes(end),
+                                   version='synthetic')
+        print(f"{session_date} {start}-{end} for {capacity} ({len(recommend())} rooms)")
+        report('index', timed(recommend, repeat))
+
+
+def run_mysql(repeat):
+    from config import Config
+    from database.db_manager import DatabaseManager
+
+    with DatabaseManager(Config.DB_CONFIG) as db:
+        index = RoomIndex()
+        started = time.perf_counter()
+        index.load(db.iter_query(_BOOKING_QUERY))
+        print(f"Indexed {len(index)} bookings in {(time.perf_counter() - started) * 1000:.0f} ms")
+        locations = reference_data.locations(db)
+        rooms = locations['value']
+
+        for session_date, start, end, capacity in probes():
+            def sql():
+                return room_index.recommend_sql(db, capacity, session_date, start, end)
+
+            def indexed():
+                return index.recommend(rooms, capacity, session_date, to_minutes(start), to_minutes(end),
+                                   version='synthetic')
+
+            print(f"{session_date} {start}-{end} for {capacity} "
+                  f"(query: {len(sql())} rooms, index: {len(indexed())} rooms)")
+            report('query', timed(sql, repeat))
+            report('index', timed(indexed, repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--synthetic', type=int, metavar='N', help='benchmark the index alone on N fake bookings')
+    parser.add_argument('--rooms', type=int, default=200, help='fake rooms for --synthetic')
+    parser.add_argument('--repeat', type=int, default=200, help='runs per probe')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        run_synthetic(args.synthetic, args.rooms, args.repeat)
+    else:
+        run_mysql(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
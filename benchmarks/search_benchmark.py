@@ -0,0 +1,143 @@
+"""Compare session search latency: LIKE '%...%' vs the in-process index
+
+Usage (from the project root):
+    python -m benchmarks.search_benchmark                   # against MySQL (config.py)
+    python -m benchmarks.search_benchmark --synthetic 50000 # index only, fake sessions
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from database import session_queries
+from database.session_search import SessionSearchIndex, _DOCUMENT_QUERY
+
+DEFAULT_TERMS = ['calc', 'calculus', 'data struct', 'phys', 'review exam', 'chem', 'a']
+
+# The pre-index search path, kept here as the baseline
+LIKE_QUERY = f"""
+    SELECT
+        ss.session_id,
+        ss.session_date,
+        ss.start_time,
+        ss.end_time,
+        ss.status,
+        ss.description,
+        ss.max_participants,
+        sub.subject_name,
+        sub.subject_code,
+        l.building,
+        l.room_number,
+        s.name as creator_name,
+        COUNT(sp.student_id) as participant_count
+    FROM STUDY_SESSION ss
+    JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
+    JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
+    LEFT JOIN LOCATION l ON ss.location_id = l.location_id
+    JOIN STUDENT s ON ss.created_by = s.student_id
+    LEFT JOIN SESSION_PARTICIPANT sp ON ss.session_id = sp.session_id
+    WHERE ss.status != 'Cancelled'
+      AND (ss.description LIKE %s OR sub.subject_name LIKE %s OR s.name LIKE %s)
+    GROUP BY ss.session_id, ss.session_date, ss.start_time, ss.end_time,
+             ss.status, ss.description, ss.max_participants, sub.subject_name,
+             sub.subject_code, l.building, l.room_number, s.name
+    ORDER BY ss.session_date ASC, ss.start_time ASC
+    LIMIT {session_queries.DEFAULT_PAGE_SIZE}
+"""
+
+SYNTHETIC_SUBJECTS = [
+    ('Calculus I', 'MATH101'), ('Linear Algebra', 'MATH220'), ('Data Structures', 'CS201'),
+    ('Algorithms', 'CS301'), ('General Physics', 'PHYS101'), ('Organic Chemistry', 'CHEM210'),
+    ('Microeconomics', 'ECON101'), ('Statistics', 'STAT200')
+]
+SYNTHETIC_WORDS = ('review exam midterm final practice problems chapter homework group quiz '
+                   'lab notes project proofs derivatives integrals graphs trees sorting').split()
+SYNTHETIC_NAMES = ['Alice Smith', 'Bob Jones', 'Carol White', 'Dan Brown', 'Eve Davis', 'Frank Miller']
+
+
+def timed(fn, repeat):
+    """Milliseconds per call over repeat calls"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))]
+    print(f"  {label:<10} p50 {statistics.median(timings):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def synthetic_rows(count):
+    rng = random.Random(42)
+    start = date.today()
+    for session_id in range(1, count + 1):
+        subject_name, subject_code = rng.choice(SYNTHETIC_SUBJECTS)
+        yield {
+            'session_id': session_id,
+            'session_date': start + timedelta(days=rng.randrange(120)),
+            'start_time': timedelta(hours=rng.randrange(8, 20)),
+            'status': 'Planned',
+            'subject_id': SYNTHETIC_SUBJECTS.index((subject_name, subject_code)) + 1,
+            'subject_name': subject_name,
+            'subject_code': subject_code,
+            'creator_name': rng.choice(SYNTHETIC_NAMES),
+            'description': ' '.join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randrange(5, 25)))
+        }
+
+
+def run_synthetic(count, terms, repeat):
+    index = SessionSearchIndex()
+    started = time.perf_counter()
+    index.load(synthetic_rows(count))
+    print(f"Indexed {count} synthetic sessions in {(time.perf_counter() - started) * 1000:.0f} ms")
+    for term in terms:
+        hits = len(index.search(term))
+        print(f"'{term}' ({hits} matches)")
+        report('index', timed(lambda: index.search(term), repeat))
+
+
+def run_mysql(terms, repeat):
+    from config import Config
+    from database.db_manager import DatabaseManager
+
+    with DatabaseManager(Config.DB_CONFIG) as db:
+        index = SessionSearchIndex()
+        started = time.perf_counter()
+        index.load(db.iter_query(_DOCUMENT_QUERY))
+        print(f"Indexed {len(index)} sessions in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        for term in terms:
+            pattern = f"%{term}%"
+
+            def like_search():
+                return db.execute_query(LIKE_QUERY, (pattern, pattern, pattern))
+
+            def index_search():
+                page_ids = index.search(term)[:session_queries.DEFAULT_PAGE_SIZE]
+                if page_ids:
+                    db.execute_query(*session_queries.build_ids_query(page_ids))
+
+            print(f"'{term}' (LIKE: {len(like_search())} rows, index: {len(index.search(term))} matches)")
+            report('LIKE', timed(like_search, repeat))
+            report('index', timed(index_search, repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--synthetic', type=int, metavar='N', help='benchmark the index alone on N fake sessions')
+    parser.add_argument('--repeat', type=int, default=50, help='runs per search term')
+    parser.add_argument('terms', nargs='*', default=DEFAULT_TERMS)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        run_synthetic(args.synthetic, args.terms, args.repeat)
+    else:
+        run_mysql(args.terms, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Maintenance commands, run with `flask --app app <command>`"""
+from datetime import date, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from database.db_manager import DatabaseManager
+from database import compatibility_rebuild, compatibility_worker, participant_counts, partner_index, procedures, room_scheduler, student_stats
+
+
+@click.command('reconcile-participant-counts')
+@with_appcontext
+def reconcile_participant_counts():
+    """Repair STUDY_SESSION.participant_count drift (safe to run from cron)"""
+    with DatabaseManager(current_app.config['DB_CONFIG']) as db:
+        repaired = participant_counts.reconcile(db)
+    click.echo(f"Repaired {repaired} session(s)")
+
+
+@click.command('rebuild-student-stats')
+@click.option('--student-id', type=int, help='Rebuild one student only')
+@with_appcontext
+def rebuild_student_stats(student_id):
+    """Recompute the materialised dashboard stats (STUDENT_STATS) from scratch"""
+    with DatabaseManager(current_app.config['DB_CONFIG']) as db:
+        rebuilt = student_stats.rebuild(db, student_id)
+    click.echo(f"Rebuilt stats for {rebuilt} student(s)")
+
+
+@click.command('complete-finished-sessions')
+@with_appcontext
+def complete_finished_sessions():
+    """Mark sessions that have ended as Completed and credit their participants (run from cron)"""
+    with DatabaseManager(current_app.config['DB_CONFIG']) as db:
+        completed = student_stats.complete_finished_sessions(db)
+    click.echo(f"Completed {completed} session(s)")
+
+
+@click.command('rebuild-partner-index')
+@with_appcontext
+def rebuild_partner_index():
+    """Recompute every precomputed partner list (PARTNER_MATCH)"""
+    with DatabaseManager(current_app.config['DB_CONFIG']) as db:
+        written = partner_index.rebuild(db)
+    click.echo(f"Wrote {written} partner match(es)")
+
+
+@click.command('update-compatibility-scores')
+@click.option('--engine', type=click.Choice(['procedure', 'sharded']), default='procedure',
+              help='the UpdateCompatibilityScores procedure, or sharded: CALCULATE_COMPATIBILITY over '
+                   'student ranges on several connections (database/compatibility_rebuild.py)')
+@click.option('--workers', type=int, default=None, help='Shards scored at once (default: COMPATIBILITY workers)')
+@click.option('--resume', is_flag=True, help='Skip shards an interrupted run already wrote')
+@click.option('--dry-run', is_flag=True, help='Score and count changes without writing them')
+@with_appcontext
+def update_compatibility_scores(engine, workers, resume, dry_run):
+    """Recalculate every student pair's compatibility score, then the partner index"""
+    with DatabaseManager(current_app.config['DB_CONFIG']) as db:
+        if engine == 'procedure':
+            procedures.update_compatibility_scores(db)
+            click.echo("UpdateCompatibilityScores finished")
+            return
+        with click.progressbar(length=1, label='Scoring shards') as bar:
+            def progress(done, total, totals):
+                bar.length = total
+                bar.update(done - bar.pos)
+            totals = compatibility_rebuild.rebuild(db, workers=workers, resume=resume,
+                                                   dry_run=dry_run, progress=progress)
+        if not dry_run:
+            partner_index.rebuild(db)
+    click.echo(f"Scored {totals['pairs']} pairs for {totals['students']} students in {totals['seconds']} s: "
+               f"{totals['upserted']} changed, {totals['deleted']} removed"
+               + (f", {totals['skipped']} shard(s) resumed" if totals['skipped'] else "")
+               + (" (dry run)" if dry_run else ""))
+
+
+@click.command('compatibility-worker')
+@click.option('--once', is_flag=True, help='Rescore the students marked so far and exit')
+@with_appcontext
+def compatibility_worker_command(once):
+    """Rescore students whose profile or subjects changed (instead of the in-process thread)"""
+    try:
+        compatibility_worker.check_standalone()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    if once:
+        with DatabaseManager(current_app.config['DB_CONFIG']) as db:
+            processed = compatibility_worker.drain(db)
+        click.echo(f"Rescored {processed} student(s)")
+        return
+    click.echo("Compatibility worker running (Ctrl+C to stop)")
+    compatibility_worker.run_forever(current_app.config['DB_CONFIG'])
+
+
+@click.command('schedule-rooms')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help='First date (default: today)')
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help='Last date (default: a week after --from)')
+@click.option('--mode', type=click.Choice(room_scheduler.MODES), default='greedy',
+              help='greedy (one pass) or optimal (branch and bound from the greedy result)')
+@click.option('--max-nodes', type=int, default=50000, help='Search limit per group of overlapping sessions (optimal)')
+@click.option('--dry-run', is_flag=True, help='Plan the assignment without writing it')
+@with_appcontext
+def schedule_rooms(date_from, date_to, mode, max_nodes, dry_run):
+    """Assign rooms to every Planned session without one in a date range (weekly planning run)"""
+    date_from = date_from.date() if date_from else date.today()
+    date_to = date_to.date() if date_to else date_from + timedelta(days=6)
+    with DatabaseManager(current_app.config['DB_CONFIG']) as db:
+        totals = room_scheduler.schedule(db, date_from, date_to, mode, max_nodes, dry_run)
+    click.echo(f"{date_from}..{date_to}: placed {totals['assigned']} of {totals['sessions']} session(s), "
+               f"{totals['unplaced']} without a free room"
+               + (" (dry run)" if dry_run else f", {totals['written']} written"))
+
+
+def init_app(app):
+    """Register the maintenance commands on app.cli"""
+    app.cli.add_command(reconcile_participant_counts)
+    app.cli.add_command(rebuild_student_stats)
+    app.cli.add_command(complete_finished_sessions)
+    app.cli.add_command(rebuild_partner_index)
+    app.cli.add_command(update_compatibility_scores)
+    app.cli.add_command(compatibility_worker_command)
+    app.cli.add_command(schedule_rooms)
@@ -4,6 +4,22 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+
+def replica_configs(primary, hosts):
+    """Build one DB config per 'host[:port]' entry, copying the primary's credentials"""
+    replicas = []
+    for entry in hosts.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        replica = dict(primary, host=host)
+        if port:
+            replica['port'] = int(port)
+        replicas.append(replica)
+    return replicas
+
+
 class Config:
     """Application configuration"""
     
@@ -21,6 +37,110 @@ class Config:
         'raise_on_warnings': True
     }
     
+    # Read replicas: comma-separated hosts sharing the primary's credentials.
+    # Plain SELECTs are spread across them (see database/db_manager.py)
+    DB_REPLICAS = replica_configs(DB_CONFIG, os.getenv('DB_REPLICA_HOSTS', ''))
+    DB_REPLICA_STRATEGY = os.getenv('DB_REPLICA_STRATEGY', 'least_loaded')  # or 'round_robin'
+    DB_READ_YOUR_WRITES_SECONDS = int(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+    
+    # Connection pool (see database/pool.py)
+    DB_POOL = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'checkout_timeout': float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        'max_age': int(os.getenv('DB_POOL_MAX_AGE', '1800')),
+        'health_check': os.getenv('DB_POOL_HEALTH_CHECK', 'True') == 'True',
+        'ping_after': int(os.getenv('DB_POOL_PING_AFTER', '30')),
+        'statement_cache_size': int(os.getenv('DB_STATEMENT_CACHE_SIZE', '64')),
+        'breaker_threshold': int(os.getenv('DB_BREAKER_THRESHOLD', '5')),
+        'breaker_reset': int(os.getenv('DB_BREAKER_RESET', '30'))
+    }
+    
+    # Retries for dropped connections and deadlocks (see database/retry.py)
+    DB_RETRY = {
+        'max_attempts': int(os.getenv('DB_RETRY_ATTEMPTS', '3')),
+        'base_delay': float(os.getenv('DB_RETRY_BASE_DELAY', '0.05'))
+    }
+    
+    # Async connection pool used by async views (see database/async_db_manager.py)
+    DB_ASYNC_POOL = {
+        'minsize': int(os.getenv('DB_ASYNC_POOL_MIN', '1')),
+        'maxsize': int(os.getenv('DB_ASYNC_POOL_MAX', '20'))
+    }
+    
+    # Statement timing and slow query log (see database/query_stats.py)
+    DB_QUERY_STATS = {
+        'enabled': os.getenv('DB_QUERY_STATS', 'True') == 'True',
+        'slow_query_ms': int(os.getenv('DB_SLOW_QUERY_MS', '200'))
+    }
+    
+    # Cache for reference data and per-user views (see utils/cache.py)
+    CACHE = {
+        'backend': os.getenv('CACHE_BACKEND', 'memory'),  # or 'redis' (needs the redis package)
+        'processes': int(os.getenv('WEB_CONCURRENCY', '1')),  # >1 needs the redis backend
+        'default_ttl': int(os.getenv('CACHE_TTL', '300')),
+        'redis_url': os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    }
+    
+    # Per-user event broker behind /api/notifications/stream (see utils/events.py)
+    EVENTS = {
+        'enabled': os.getenv('EVENTS_ENABLED', 'True') == 'True',  # False: no streams, counts per request
+        'processes': int(os.getenv('WEB_CONCURRENCY', '1')),  # >1 needs the redis EVENTS backend
+        'max_streams': int(os.getenv('EVENTS_MAX_STREAMS', '3')),
+        'backend': os.getenv('EVENTS_BACKEND', 'memory'),  # 'redis' reaches streams held by other workers
+        'redis_url': os.getenv('EVENTS_REDIS_URL', 'redis://localhost:6379/0'),
+        'heartbeat': int(os.getenv('EVENTS_HEARTBEAT', '25'))
+    }
+    
+    # Session search index (see database/session_search.py)
+    SEARCH = {
+        'rebuild_interval': int(os.getenv('SEARCH_REBUILD_INTERVAL', '300'))
+    }
+    
+    # Booked-room index for /api/locations/recommend (see database/room_index.py)
+    ROOMS = {
+        'enabled': os.getenv('ROOM_INDEX_ENABLED', 'True') == 'True',
+        'rebuild_interval': int(os.getenv('ROOM_INDEX_REBUILD_INTERVAL', '300'))
+    }
+    
+    # Precomputed partner lists for /api/partners/find (see database/partner_index.py)
+    PARTNERS = {
+        'enabled': os.getenv('PARTNER_INDEX_ENABLED', 'True') == 'True',
+        'top_k': int(os.getenv('PARTNER_TOP_K', '50')),
+        'min_results': int(os.getenv('PARTNER_MIN_RESULTS', '5'))
+    }
+    
+    # Partial COMPATIBILITY_SCORE rescoring: the compatibility worker and
+    # `update-compatibility-scores --engine sharded` (see database/compatibility_scores.py)
+    COMPATIBILITY = {
+        'min_score': float(os.getenv('COMPATIBILITY_MIN_SCORE', '0.60')),
+        'block_size': int(os.getenv('COMPATIBILITY_BLOCK_SIZE', '64')),
+        'workers': int(os.getenv('COMPATIBILITY_WORKERS', '4'))
+    }
+    
+    # Background rescoring after profile/subject edits (see database/compatibility_worker.py).
+    # Nothing is rescored unless `flask --app app compatibility-worker` runs (needs the redis
+    # CACHE backend) or in_process starts a thread in each web process.
+    COMPATIBILITY_WORKER = {
+        'in_process': os.getenv('COMPATIBILITY_WORKER_IN_PROCESS', 'False') == 'True',
+        'poll_interval': int(os.getenv('COMPATIBILITY_WORKER_POLL', '5')),
+        'settle_seconds': int(os.getenv('COMPATIBILITY_WORKER_SETTLE', '3'))
+    }
+    
+    # Seconds each user's /api/dashboard/summary sections stay cached (writes clear them)
+    DASHBOARD_CACHE_SECONDS = int(os.getenv('DASHBOARD_CACHE_SECONDS', '15'))
+    
+    # Seconds a pair's compatibility score stays cached (see database/pair_compatibility.py)
+    COMPATIBILITY_CACHE_SECONDS = int(os.getenv('COMPATIBILITY_CACHE_SECONDS', '600'))
+    
+    # Seconds a student's schedule stays cached for /api/sessions/validate (see database/schedule_conflicts.py)
+    SCHEDULE_CACHE_SECONDS = int(os.getenv('SCHEDULE_CACHE_SECONDS', '30'))
+    
+    # Seconds an unread notification count stays cached (see database/unread_counts.py)
+    UNREAD_COUNT_CACHE_SECONDS = int(os.getenv('UNREAD_COUNT_CACHE_SECONDS', '300'))
+    
+    # Admins (may view /api/admin/* diagnostics)
+    ADMIN_EMAILS = [email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()]
+    
     # Session
     SESSION_TYPE = 'filesystem'
     PERMANENT_SESSION_LIFETIME = 1800  # 30 minutes
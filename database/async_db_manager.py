@@ -0,0 +1,202 @@
+"""Asyncio counterpart to DatabaseManager, backed by an aiomysql pool"""
+import asyncio
+import logging
+import time
+import aiomysql
+from pymysql import MySQLError
+from database import query_stats
+
+logger = logging.getLogger(__name__)
+
+# Defaults used for pools created before/without configure_async_pool()
+DEFAULT_ASYNC_POOL_SETTINGS = {
+    'minsize': 1,           # connections opened up front
+    'maxsize': 10,          # max open connections per database config
+    'pool_recycle': 1800    # seconds before a connection is recycled
+}
+
+_async_pool_settings = dict(DEFAULT_ASYNC_POOL_SETTINGS)
+_async_pools = {}
+
+
+def _aiomysql_config(config):
+    """Translate a mysql-connector DB_CONFIG into aiomysql connect kwargs"""
+    translated = {
+        'host': config.get('host', 'localhost'),
+        'port': int(config.get('port', 3306)),
+        'user': config.get('user'),
+        'password': config.get('password', ''),
+        'db': config.get('database'),
+        'autocommit': config.get('autocommit', True)
+    }
+    if 'charset' in config:
+        translated['charset'] = config['charset']
+    return translated
+
+
+def configure_async_pool(**settings):
+    """Set async pool options (see DEFAULT_ASYNC_POOL_SETTINGS) for pools created afterwards"""
+    unknown = set(settings) - set(DEFAULT_ASYNC_POOL_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown async pool settings: {', '.join(sorted(unknown))}")
+    _async_pool_settings.update(settings)
+
+
+async def get_async_pool(config):
+    """Get (or lazily create) the aiomysql pool for a config on the running loop"""
+    key = (id(asyncio.get_running_loop()), tuple(sorted((k, repr(v)) for k, v in config.items())))
+    pending = _async_pools.get(key)
+    if pending is None:
+        # Cache the creation task so concurrent callers share one pool
+        pending = asyncio.ensure_future(
+            aiomysql.create_pool(**_aiomysql_config(config), **_async_pool_settings)
+        )
+        _async_pools[key] = pending
+    try:
+        return await pending
+    except MySQLError:
+        _async_pools.pop(key, None)
+        raise
+
+
+class AsyncDatabaseManager:
+    """Manages an async MySQL connection borrowed from the aiomysql pool"""
+
+    def __init__(self, config):
+        """Initialize with database configuration"""
+        self.config = config
+        self.connection = None
+        self._pool = None
+
+    async def connect(self):
+        """Borrow a connection from the pool"""
+        try:
+            if self.connection is None:
+                self._pool = await get_async_pool(self.config)
+                self.connection = await self._pool.acquire()
+            return self.connection
+        except MySQLError as e:
+            logger.error(f"Error connecting to MySQL: {e}")
+            raise
+
+    def _record(self, kind, query, started, rows=None, row_count=0, error=False):
+        """Time a statement (see database/query_stats.py)"""
+        if not query_stats.enabled():
+            return
+        elapsed = time.perf_counter() - started
+        if rows is not None:
+            row_count = len(rows)
+        nbytes = query_stats.estimate_bytes(rows) if rows else 0
+        query_stats.record(query, kind, elapsed, row_count, nbytes, error)
+        if not error and elapsed >= query_stats.slow_query_seconds():
+            logger.warning(f"Slow {kind} ({elapsed * 1000:.1f} ms, {row_count} rows): {' '.join(query.split())}")
+
+    async def execute_query(self, query, params=None):
+        """Execute SELECT query and return results"""
+        started = time.perf_counter()
+        try:
+            await self.connect()
+            async with self.connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params or ())
+                results = list(await cursor.fetchall())
+            self._record('select', query, started, rows=results)
+            return results
+        except MySQLError as e:
+            self._record('select', query, started, error=True)
+            logger.error(f"Error executing query: {e}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Params: {params}")
+            raise
+
+    async def execute_update(self, query, params=None):
+        """Execute INSERT/UPDATE/DELETE query"""
+        started = time.perf_counter()
+        try:
+            await self.connect()
+            async with self.connection.cursor() as cursor:
+                await cursor.execute(query, params or ())
+                affected_rows = cursor.rowcount
+                last_id = cursor.lastrowid
+
+            # Commit if autocommit is disabled
+            if not self.config.get('autocommit', True):
+                await self.connection.commit()
+
+            self._record('update', query, started, row_count=affected_rows)
+            return {'affected_rows': affected_rows, 'last_id': last_id}
+        except MySQLError as e:
+            self._record('update', query, started, error=True)
+            logger.error(f"Error executing update: {e}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Params: {params}")
+            if not self.config.get('autocommit', True):
+                await self.connection.rollback()
+            raise
+
+    async def call_procedure(self, proc_name, args=None):
+        """
+        Call stored procedure with arguments
+        Returns tuple: (results, out_params), shaped like DatabaseManager's
+        """
+        args = list(args or [])
+        started = time.perf_counter()
+        statement = f"CALL {proc_name}"
+        try:
+            await self.connect()
+            async with self.connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.callproc(proc_name, args)
+
+                # Every result set the procedure produced, minus the
+                # trailing empty one the CALL itself generates
+                results = []
+                while True:
+                    if cursor.description:
+                        results.append(list(await cursor.fetchall()))
+                    if not await cursor.nextset():
+                        break
+
+                out_params = args
+                if args:
+                    names = ', '.join(f"@_{proc_name}_{i}" for i in range(len(args)))
+                    await cursor.execute(f"SELECT {names}")
+                    row = await cursor.fetchone()
+                    out_params = list(row.values())
+
+            self._record('procedure', statement, started,
+                         row_count=sum(len(result) for result in results))
+            return results, out_params
+        except MySQLError as e:
+            self._record('procedure', statement, started, error=True)
+            logger.error(f"Error calling procedure {proc_name}: {e}")
+            logger.error(f"Args: {args}")
+            raise
+
+    async def close(self):
+        """Return the connection to the pool"""
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            self._pool.release(connection)
+
+    async def __aenter__(self):
+        """Async context manager entry"""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
+
+
+async def fetch_all(config, query, params=None):
+    """Run one SELECT on its own pooled connection (for asyncio.gather)"""
+    async with AsyncDatabaseManager(config) as db:
+        return await db.execute_query(query, params)
+
+
+async def close_async_pools():
+    """Close every async pool created on the running loop"""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [key for key in _async_pools if key[0] == loop_id]:
+        pool = await _async_pools.pop(key)
+        pool.close()
+        await pool.wait_closed()
@@ -0,0 +1,61 @@
+"""Async wrappers for stored procedures (see procedures.py)"""
+from database.async_db_manager import AsyncDatabaseManager
+from database.participant_counts import recount_statement
+from database.student_stats import participation_statement
+
+
+async def find_study_partners(db: AsyncDatabaseManager, student_id, subject_id, session_date, start_time, duration):
+    """
+    Find compatible study partners
+    Calls: FindStudyPartners(studentid, subjectid, sessiondate, starttime, duration)
+    Returns: List of compatible partners with scores > 0.60
+    """
+    results, _ = await db.call_procedure('FindStudyPartners', [student_id, subject_id, session_date, start_time, duration])
+    return results[0] if results else []
+
+
+async def create_study_session(db: AsyncDatabaseManager, student_id, subject_id, date, start_time, end_time, max_participants, description):
+    """
+    Create new study session
+    Calls: CreateStudySession(studentid, subjectid, date, start, end, maxparticipants, description, OUT sessionid)
+    Returns: New session ID
+    """
+    args = [student_id, subject_id, date, start_time, end_time, max_participants, description, 0]
+    results, out_params = await db.call_procedure('CreateStudySession', args)
+    await db.execute_update(*recount_statement(out_params[-1]))
+    return out_params[-1]
+
+
+async def join_study_session(db: AsyncDatabaseManager, session_id, student_id):
+    """
+    Join a study session
+    Calls: JoinStudySession(sessionid, studentid)
+    """
+    await db.call_procedure('JoinStudySession', [session_id, student_id])
+    await db.execute_update(*recount_statement(session_id))
+    await db.execute_update(*participation_statement(session_id, student_id, 1))
+    return True
+
+
+async def update_compatibility_scores(db: AsyncDatabaseManager):
+    """
+    Recalculate all compatibility scores
+    Calls: UpdateCompatibilityScores()
+    """
+    await db.call_procedure('UpdateCompatibilityScores', [])
+    return True
+
+
+async def generate_session_analytics(db: AsyncDatabaseManager, student_id):
+    """
+    Generate analytics for a student
+    Calls: GenerateSessionAnalytics(studentid)
+    Returns: Tuple of (overall_stats, subject_performance, frequent_partners)
+    """
+    results, _ = await db.call_procedure('GenerateSessionAnalytics', [student_id])
+    
+    overall_stats = results[0] if len(results) > 0 else []
+    subject_performance = results[1] if len(results) > 1 else []
+    frequent_partners = results[2] if len(results) > 2 else []
+    
+    return overall_stats, subject_performance, frequent_partners
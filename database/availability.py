@@ -0,0 +1,204 @@
+"""Weekly availability as bitsets, for finding times a group can meet
+
+Each student's AVAILABILITY rows become one int with a bit per 15-minute
+slot of the week (7 x 96 = 672 bits, Monday 00:00 first). A slot is set
+only if the student is free for all of it. Finding when a group can meet
+for a given duration is then a few shifts and ANDs per student, so
+hundreds of candidate groups can be ranked in one request.
+
+- windows(): the slots where a meeting of that length could start
+- suggest(): the best start times for one group, most members free first
+- rank_groups(): the best time for each of many candidate groups
+"""
+from datetime import datetime, timedelta
+from database.db_manager import DatabaseManager
+from database.room_index import to_minutes
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = SLOTS_PER_DAY * len(DAYS)
+WEEK_MASK = (1 << WEEK_SLOTS) - 1
+
+_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+# Starts whose window of n slots stays within one day, by n
+_valid_starts = {}
+
+
+def slot_mask(start_time, end_time):
+    """Bits of one day's slots lying entirely within [start_time, end_time)"""
+    start, end = to_minutes(start_time), to_minutes(end_time)
+    if start is None or end is None:
+        return 0
+    first = -(-int(start) // SLOT_MINUTES)
+    last = min(int(end) // SLOT_MINUTES, SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def week_mask(rows):
+    """One student's week from their AVAILABILITY rows (day_of_week, start_time, end_time)"""
+    mask = 0
+    for row in rows:
+        if row['day_of_week'] in DAYS:
+            mask |= slot_mask(row['start_time'], row['end_time']) << (DAYS.index(row['day_of_week']) * SLOTS_PER_DAY)
+    return mask
+
+
+def load(db: DatabaseManager, student_ids):
+    """{student_id: week mask} for student_ids in one query (0 for students with no rows)"""
+    student_ids = list(dict.fromkeys(int(student_id) for student_id in student_ids))
+    if not student_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    rows = db.execute_query(f"""
+        SELECT student_id, day_of_week, start_time, end_time
+        FROM AVAILABILITY
+        WHERE student_id IN ({placeholders})
+    """, tuple(student_ids))
+    by_student = {student_id: [] for student_id in student_ids}
+    for row in rows:
+        by_student[row['student_id']].append(row)
+    return {student_id: week_mask(student_rows) for student_id, student_rows in by_student.items()}
+
+
+def visible_to(db: DatabaseManager, student_id, other_ids):
+    """
+    The students among other_ids whose free time student_id may plan
+    around: classmates (a shared subject) or people they share a session with
+    """
+    other_ids = list(dict.fromkeys(int(other_id) for other_id in other_ids))
+    if not other_ids:
+        return set()
+    placeholders = ', '.join(['%s'] * len(other_ids))
+    rows = db.execute_query(f"""
+        SELECT other.student_id
+        FROM STUDENT_SUBJECT mine
+        JOIN STUDENT_SUBJECT other ON other.subject_id = mine.subject_id
+        WHERE mine.student_id = %s AND other.student_id IN ({placeholders})
+        UNION
+        SELECT other.student_id
+        FROM SESSION_PARTICIPANT mine
+        JOIN SESSION_PARTICIPANT other ON other.session_id = mine.session_id
+        WHERE mine.student_id = %s AND other.student_id IN ({placeholders})
+    """, (student_id, *other_ids, student_id, *other_ids))
+    return {row['student_id'] for row in rows}
+
+
+def _starts_within_day(length):
+    if length not in _valid_starts:
+        day = _DAY_MASK >> (length - 1) if length <= SLOTS_PER_DAY else 0
+        _valid_starts[length] = sum(day << (index * SLOTS_PER_DAY) for index in range(len(DAYS)))
+    return _valid_starts[length]
+
+
+def windows(mask, length):
+    """Slots where `length` consecutive free slots of mask begin (without crossing midnight)"""
+    result = mask
+    for shift in range(1, length):
+        result &= mask >> shift
+    return result & _starts_within_day(length)
+
+
+def _counts(masks):
+    """Bit-sliced per-slot count of how many masks have each bit set (little-endian digits)"""
+    digits = []
+    for mask in masks:
+        carry = mask
+        for index, digit in enumerate(digits):
+            digits[index], carry = digit ^ carry, digit & carry
+            if not carry:
+                break
+        if carry:
+            digits.append(carry)
+    return digits
+
+
+def _exactly(digits, count):
+    """Bits whose bit-sliced count equals count"""
+    result = WEEK_MASK
+    for index, digit in enumerate(digits):
+        result &= digit if count >> index & 1 else ~digit
+    return result if count < 1 << len(digits) else 0
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _next_slot(now):
+    """The first whole slot after now, and when it begins"""
+    now = now or datetime.now()
+    minutes = now.hour * 60 + now.minute
+    ahead = SLOT_MINUTES - minutes % SLOT_MINUTES
+    begins = now.replace(second=0, microsecond=0) + timedelta(minutes=ahead)
+    return (now.weekday() * SLOTS_PER_DAY + minutes // SLOT_MINUTES + 1) % WEEK_SLOTS, begins
+
+
+def _from(mask, first):
+    """mask rotated so bit 0 is slot first"""
+    return ((mask >> first) | (mask << (WEEK_SLOTS - first))) & WEEK_MASK
+
+
+def _describe(offset, first, begins, length, members):
+    """A suggestion `offset` slots after slot first, which begins at datetime begins"""
+    slot = (offset + first) % WEEK_SLOTS
+    starts_at = begins + timedelta(minutes=offset * SLOT_MINUTES)
+    ends_at = starts_at + timedelta(minutes=length * SLOT_MINUTES)
+    return {
+        'date': starts_at.date().isoformat(),
+        'day_of_week': DAYS[slot // SLOTS_PER_DAY],
+        'start_time': starts_at.strftime('%H:%M'),
+        'end_time': ends_at.strftime('%H:%M') if ends_at.date() == starts_at.date() else '24:00',
+        'available': members
+    }
+
+
+def suggest(masks, length, limit=5, min_members=2, now=None):
+    """
+    Best upcoming times for a meeting of `length` slots among masks ({student_id: mask})
+    More members free ranks first, then sooner; a run of consecutive
+    possible starts is suggested once, at its first slot.
+    Returns: [{'date', 'day_of_week', 'start_time', 'end_time', 'available': [student ids]}]
+    """
+    first, begins = _next_slot(now)
+    student_windows = {student_id: _from(windows(mask, length), first) for student_id, mask in masks.items()}
+    digits = _counts(student_windows.values())
+    suggestions = []
+    for count in range(len(masks), max(min_members, 1) - 1, -1):
+        matching = _exactly(digits, count)
+        for offset in _bits(matching & ~(matching << 1)):
+            members = [student_id for student_id, free in student_windows.items() if free >> offset & 1]
+            suggestions.append(_describe(offset, first, begins, length, members))
+            if len(suggestions) == limit:
+                return suggestions
+    return suggestions
+
+
+def rank_groups(masks, groups, length, now=None):
+    """
+    For each group (a list of student ids in masks), how many start slots
+    suit all of them this week and the soonest one
+    Returns: [{'students', 'common_slots', 'best'}], most common slots first
+    """
+    first, begins = _next_slot(now)
+    ranked = []
+    for group in groups:
+        common = WEEK_MASK
+        for student_id in group:
+            common &= masks.get(student_id, 0)
+        starts = _from(windows(common, length), first)
+        soonest = (starts & -starts).bit_length() - 1
+        ranked.append({
+            'students': list(group),
+            'common_slots': starts.bit_count(),
+            'best': _describe(soonest, first, begins, length, list(group)) if starts else None
+        })
+    ranked.sort(key=lambda entry: -entry['common_slots'])
+    return ranked
@@ -0,0 +1,98 @@
+"""Full compatibility rebuild, sharded across connections
+
+Splits the students (by student_id) into shards of block_size, each
+scored against every student after it with CALCULATE_COMPATIBILITY
+(compatibility_scores.rescore_range). workers shards run at once, each on
+its own pooled connection, so MySQL evaluates them in parallel, and each
+finished shard's changed scores are written with batched upserts while
+the other shards are still being scored.
+
+Finished shards are recorded in COMPATIBILITY_REBUILD_SHARD (see
+database/migrations/005_compatibility_rebuild.sql), so an interrupted run
+can be resumed without rescoring them; a run that completes clears the
+table.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database.db_manager import DatabaseManager
+from database.pool import get_pool
+from database import compatibility_scores
+
+logger = logging.getLogger(__name__)
+
+
+def _shards(db: DatabaseManager, block_size):
+    """Returns: ([(first_student_id, last_student_id, students)] per block_size students, total students)"""
+    ids = [row[0] for row in db.iter_query("SELECT student_id FROM STUDENT ORDER BY student_id", row_mode='tuple')]
+    return [(ids[start], ids[min(start + block_size, len(ids)) - 1], min(block_size, len(ids) - start))
+            for start in range(0, len(ids), block_size)], len(ids)
+
+
+def _score_shard(db_config, first_id, last_id, dry_run):
+    """Rescore one shard on its own connection and checkpoint it"""
+    with DatabaseManager(db_config) as db:
+        pairs, upserted, deleted = compatibility_scores.rescore_range(db, first_id, last_id, dry_run)
+        if not dry_run:
+            db.execute_update("""
+                INSERT INTO COMPATIBILITY_REBUILD_SHARD (first_student_id, last_student_id, pairs, completed_at)
+                VALUES (%s, %s, %s, NOW())
+                ON DUPLICATE KEY UPDATE last_student_id = VALUES(last_student_id),
+                    pairs = VALUES(pairs), completed_at = VALUES(completed_at)
+            """, (first_id, last_id, pairs))
+    return pairs, upserted, deleted
+
+
+def _completed_shards(db: DatabaseManager):
+    rows = db.execute_query("SELECT first_student_id, last_student_id FROM COMPATIBILITY_REBUILD_SHARD")
+    return {(row['first_student_id'], row['last_student_id']) for row in rows}
+
+
+def rebuild(db: DatabaseManager, workers=None, resume=False, dry_run=False, progress=None):
+    """
+    Score every pair and write back the ones that changed
+    workers: shards scored at once (default: setting); kept below the pool size
+    resume: skip shards an interrupted run already finished (same students and block size)
+    progress: optional callable(done, total, totals) after each shard
+    Returns: dict with students, shards, skipped, pairs, upserted, deleted and seconds
+    """
+    started = time.perf_counter()
+    shards, students = _shards(db, compatibility_scores.setting('block_size'))
+    workers = compatibility_scores.setting('workers') if workers is None else workers
+    # This manager keeps one connection; the shards share the rest of the pool
+    workers = max(1, min(workers, get_pool(db.config).pool_size - 1))
+
+    totals = {'students': students, 'shards': len(shards), 'skipped': 0,
+              'pairs': 0, 'upserted': 0, 'deleted': 0}
+
+    if resume:
+        completed = _completed_shards(db)
+        pending = [shard for shard in shards if shard[:2] not in completed]
+        totals['skipped'] = len(shards) - len(pending)
+        shards = pending
+    elif not dry_run:
+        db.execute_update("DELETE FROM COMPATIBILITY_REBUILD_SHARD")
+
+    done = totals['skipped']
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compatibility-rebuild') as pool:
+        futures = [pool.submit(_score_shard, db.config, first_id, last_id, dry_run)
+                   for first_id, last_id, _ in shards]
+        for future in as_completed(futures):
+            pairs, upserted, deleted = future.result()
+            totals['pairs'] += pairs
+            totals['upserted'] += upserted
+            totals['deleted'] += deleted
+            done += 1
+            # Log roughly every 10%
+            if done * 10 // totals['shards'] > (done - 1) * 10 // totals['shards']:
+                logger.info(f"Compatibility rebuild: {done}/{totals['shards']} shards, {totals['upserted']} upserted")
+            if progress:
+                progress(done, totals['shards'], totals)
+
+    if not dry_run:
+        db.execute_update("DELETE FROM COMPATIBILITY_REBUILD_SHARD")
+    totals['seconds'] = round(time.perf_counter() - started, 1)
+    logger.info(f"Compatibility rebuild: {totals['pairs']} pairs for {totals['students']} students "
+                f"in {totals['seconds']} s ({workers} workers), {totals['upserted']} upserted, "
+                f"{totals['deleted']} deleted, {totals['skipped']} shards resumed")
+    return totals
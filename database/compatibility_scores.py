@@ -0,0 +1,151 @@
+"""Partial rescoring of COMPATIBILITY_SCORE with CALCULATE_COMPATIBILITY
+
+UpdateCompatibilityScores() rescores every pair in one call and holds its
+locks until it is done. The functions here score with the same
+CALCULATE_COMPATIBILITY function, so they store exactly what the
+procedure would, but only for part of the table:
+
+- update_students(): the pairs of students whose profile changed (run by
+  database/compatibility_worker.py)
+- rescore_range(): the pairs of one range of students against everyone
+  after them (run on several connections by database/compatibility_rebuild.py)
+
+Only pairs whose stored score changed are written; pairs that now score
+below min_score are deleted.
+"""
+import logging
+from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Defaults used before/without configure_compatibility()
+DEFAULT_COMPATIBILITY_SETTINGS = {
+    'min_score': 0.60,      # pairs below this are not stored (FindStudyPartners' cut-off)
+    'block_size': 64,       # students per rebuild shard
+    'workers': 4            # rebuild shards scored at once, one pooled connection each
+}
+
+# Target table, one row per pair with student1_id < student2_id
+SCORE_TABLE = 'COMPATIBILITY_SCORE'
+SCORE_COLUMNS = ('student1_id', 'student2_id', 'compatibility_score')
+
+# Rows per upsert/delete batch sent to MySQL
+WRITE_BATCH = 5000
+
+_settings = dict(DEFAULT_COMPATIBILITY_SETTINGS)
+
+
+def configure_compatibility(**settings):
+    """Set scoring options (see DEFAULT_COMPATIBILITY_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_COMPATIBILITY_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown compatibility settings: {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def setting(name):
+    """Current value of one scoring option"""
+    return _settings[name]
+
+
+def upsert_query():
+    student1, student2, score = SCORE_COLUMNS
+    return (f"INSERT INTO {SCORE_TABLE} ({student1}, {student2}, {score}) VALUES (%s, %s, %s) "
+            f"ON DUPLICATE KEY UPDATE {score} = VALUES({score})")
+
+
+def delete_query():
+    student1, student2, _ = SCORE_COLUMNS
+    return f"DELETE FROM {SCORE_TABLE} WHERE {student1} = %s AND {student2} = %s"
+
+
+def _changes(scored, stored):
+    """
+    scored: (student1_id, student2_id, score) rows; stored: {(student1_id, student2_id): score}
+    Returns: (pairs, upserts, deletes)
+    """
+    pairs = 0
+    upserts = []
+    deletes = []
+    for first, second, score in scored:
+        pairs += 1
+        score = float(score or 0)
+        previous = stored.get((first, second))
+        if score >= _settings['min_score']:
+            if previous is None or round(previous, 2) != round(score, 2):
+                upserts.append((first, second, score))
+        elif previous is not None:
+            deletes.append((first, second))
+    return pairs, upserts, deletes
+
+
+def _write(db: DatabaseManager, upserts, deletes):
+    for query, rows in ((upsert_query(), upserts), (delete_query(), deletes)):
+        for offset in range(0, len(rows), WRITE_BATCH):
+            db.execute_many(query, rows[offset:offset + WRITE_BATCH])
+
+
+def update_students(db: DatabaseManager, student_ids):
+    """
+    Rescore only the pairs that involve student_ids: one row of n scores
+    per student instead of all n^2 pairs
+    Returns: dict with students, pairs scored, upserted and deleted
+    """
+    ids = sorted({int(student_id) for student_id in student_ids})
+    totals = {'students': len(ids), 'pairs': 0, 'upserted': 0, 'deleted': 0}
+    if not ids:
+        return totals
+
+    student1, student2, score = SCORE_COLUMNS
+    placeholders = ', '.join(['%s'] * len(ids))
+    stored = {
+        (first, second): float(value)
+        for first, second, value in db.iter_query(
+            f"SELECT {student1}, {student2}, {score} FROM {SCORE_TABLE} WHERE {student1} IN ({placeholders}) "
+            f"UNION SELECT {student1}, {student2}, {score} FROM {SCORE_TABLE} WHERE {student2} IN ({placeholders})",
+            (*ids, *ids), row_mode='tuple'
+        )
+    }
+    # Each pair once: a pair of two changed students comes from the lower id's row
+    scored = db.iter_query(f"""
+        SELECT LEAST(c.student_id, o.student_id), GREATEST(c.student_id, o.student_id),
+            CALCULATE_COMPATIBILITY(LEAST(c.student_id, o.student_id), GREATEST(c.student_id, o.student_id))
+        FROM STUDENT c
+        JOIN STUDENT o ON o.student_id <> c.student_id
+        WHERE c.student_id IN ({placeholders})
+            AND (o.student_id NOT IN ({placeholders}) OR o.student_id > c.student_id)
+    """, (*ids, *ids), row_mode='tuple')
+    # Read everything before writing: the stream holds the connection
+    pairs, upserts, deletes = _changes(list(scored), stored)
+
+    _write(db, upserts, deletes)
+    totals.update(pairs=pairs, upserted=len(upserts), deleted=len(deletes))
+    logger.info(f"Compatibility scores: rescored {totals['students']} changed students, "
+                f"{totals['upserted']} upserted, {totals['deleted']} deleted")
+    return totals
+
+
+def rescore_range(db: DatabaseManager, first_id, last_id, dry_run=False):
+    """
+    Rescore every pair whose lower student_id is in [first_id, last_id]
+    Returns: (pairs, upserted, deleted)
+    """
+    student1, student2, score = SCORE_COLUMNS
+    stored = {
+        (first, second): float(value)
+        for first, second, value in db.iter_query(
+            f"SELECT {student1}, {student2}, {score} FROM {SCORE_TABLE} WHERE {student1} BETWEEN %s AND %s",
+            (first_id, last_id), row_mode='tuple'
+        )
+    }
+    scored = db.iter_query("""
+        SELECT a.student_id, b.student_id, CALCULATE_COMPATIBILITY(a.student_id, b.student_id)
+        FROM STUDENT a
+        JOIN STUDENT b ON b.student_id > a.student_id
+        WHERE a.student_id BETWEEN %s AND %s
+    """, (first_id, last_id), row_mode='tuple')
+    pairs, upserts, deletes = _changes(list(scored), stored)
+
+    if not dry_run:
+        _write(db, upserts, deletes)
+    return pairs, len(upserts), len(deletes)
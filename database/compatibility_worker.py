@@ -0,0 +1,163 @@
+"""Incremental compatibility rescoring for students whose profile changed
+
+Routes that change what compatibility depends on (profile fields,
+enrolled subjects) call mark_dirty(), which records the student in
+COMPATIBILITY_DIRTY (see database/migrations/004_compatibility_dirty.sql).
+A background worker picks up students whose last edit is settle_seconds
+old, so a burst of edits is rescored once. It takes them batch_size at a
+time, rescores only their pairs (compatibility_scores.update_students)
+and refreshes their partner lists.
+
+Nothing is rescored unless a worker runs. Run it with `flask --app app
+compatibility-worker`, so rescoring never competes with requests for
+threads; that needs the redis cache backend (check_standalone()), since
+the cached pair scores it invalidates live in the web processes.
+in_process starts it as a daemon thread in each app process instead
+(small deployments). Each pass claims its batch (claimed_by, see
+database/migrations/006_compatibility_dirty_claim.sql), so any number
+of workers can run without rescoring the same students.
+"""
+import logging
+import threading
+import uuid
+from database.db_manager import DatabaseManager
+from database import compatibility_scores, pair_compatibility, partner_index
+from utils import cache
+
+logger = logging.getLogger(__name__)
+
+# Defaults used before/without configure_compatibility_worker()
+DEFAULT_WORKER_SETTINGS = {
+    'in_process': False,    # run the worker thread inside every app process
+    'poll_interval': 5,     # seconds between checks for dirty students
+    'settle_seconds': 3,    # wait this long after a student's last edit
+    'batch_size': 100,      # students rescored per pass
+    'claim_timeout': 300    # seconds before another worker may take over a claimed batch
+}
+
+_settings = dict(DEFAULT_WORKER_SETTINGS)
+
+_worker = None
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def configure_compatibility_worker(**settings):
+    """Set worker options (see DEFAULT_WORKER_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_WORKER_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown compatibility worker settings: {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def check_standalone():
+    """Raise RuntimeError if a worker outside the web processes could not reach their caches"""
+    if not cache.is_shared():
+        raise RuntimeError("A separate compatibility worker needs CACHE_BACKEND=redis so its invalidations "
+                           "reach the web processes (or set COMPATIBILITY_WORKER_IN_PROCESS=True)")
+
+
+def mark_dirty(db: DatabaseManager, student_id):
+    """Queue a student for rescoring; repeated edits just move marked_at forward"""
+    db.execute_update("""
+        INSERT INTO COMPATIBILITY_DIRTY (student_id, marked_at) VALUES (%s, NOW(6))
+        ON DUPLICATE KEY UPDATE marked_at = NOW(6)
+    """, (student_id,))
+    pair_compatibility.invalidate_student(student_id)
+    _wake.set()
+
+
+def _claim(db: DatabaseManager):
+    """Atomically take up to batch_size settled students; returns (token, rows)"""
+    token = uuid.uuid4().hex
+    claimed = db.execute_update("""
+        UPDATE COMPATIBILITY_DIRTY
+        SET claimed_by = %s, claimed_at = NOW(6)
+        WHERE marked_at <= NOW(6) - INTERVAL %s SECOND
+            AND (claimed_by IS NULL OR claimed_at <= NOW(6) - INTERVAL %s SECOND)
+        ORDER BY marked_at
+        LIMIT %s
+    """, (token, _settings['settle_seconds'], _settings['claim_timeout'], _settings['batch_size']))
+    if not claimed['affected_rows']:
+        return token, []
+    return token, db.execute_query(
+        "SELECT student_id, marked_at FROM COMPATIBILITY_DIRTY WHERE claimed_by = %s", (token,)
+    )
+
+
+def run_once(db: DatabaseManager):
+    """
+    Rescore one claimed batch of settled dirty students
+    Returns: number of students processed
+    """
+    token, batch = _claim(db)
+    if not batch:
+        return 0
+
+    student_ids = [row['student_id'] for row in batch]
+    try:
+        compatibility_scores.update_students(db, student_ids)
+        for student_id in student_ids:
+            partner_index.refresh_student(db, student_id)
+            pair_compatibility.invalidate_student(student_id)
+
+        # Students edited again meanwhile keep their newer mark for the next pass
+        db.execute_many(
+            "DELETE FROM COMPATIBILITY_DIRTY WHERE student_id = %s AND marked_at <= %s AND claimed_by = %s",
+            [(row['student_id'], row['marked_at'], token) for row in batch]
+        )
+    finally:
+        # Whatever is left (re-marked, or the pass failed) is free for any worker again
+        db.execute_update(
+            "UPDATE COMPATIBILITY_DIRTY SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = %s", (token,)
+        )
+    return len(batch)
+
+
+def drain(db: DatabaseManager):
+    """run_once() until no settled students are left; returns the total processed"""
+    processed = 0
+    while True:
+        count = run_once(db)
+        processed += count
+        if count < _settings['batch_size']:
+            return processed
+
+
+def run_forever(db_config, stop=None):
+    """Poll for dirty students until stop (a threading.Event) is set"""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            with DatabaseManager(db_config) as db:
+                processed = drain(db)
+            if processed:
+                logger.info(f"Rescored compatibility for {processed} changed student(s)")
+        except Exception:
+            # Keep polling; the students stay dirty until a pass succeeds
+            logger.exception("Compatibility worker pass failed")
+        _wake.wait(_settings['poll_interval'])
+        _wake.clear()
+
+
+def start_worker(app):
+    """Start the in-process worker thread once per process (if in_process)"""
+    global _worker
+    if not _settings['in_process']:
+        return None
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(
+                target=run_forever, args=(app.config['DB_CONFIG'],),
+                name='compatibility-worker', daemon=True
+            )
+            _worker.start()
+    return _worker
+
+
+def init_app(app):
+    """Start the worker with the first request, so CLI commands don't spawn it"""
+    @app.before_request
+    def ensure_worker():
+        if _worker is None:
+            start_worker(app)
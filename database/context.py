@@ -0,0 +1,95 @@
+"""Request-scoped database access
+
+One DatabaseManager is bound to flask.g per request, so every route and
+stored procedure wrapper that runs during the request shares a single
+pooled connection. The connection is borrowed lazily on first query and
+handed back to the pool by the teardown_appcontext hook.
+
+When DB_REPLICAS is configured, a write pins that user's reads to the
+primary for DB_READ_YOUR_WRITES_SECONDS, so replica lag never hides a
+change the user has just made. Once the request is over (and its writes
+committed), a request that wrote drops the user's cached views
+(utils.cache.user_namespace), and those of anyone the route named with
+affects_users() or affects_session().
+"""
+import time
+from flask import g, current_app, session
+from database.db_manager import DatabaseManager
+from utils.cache import invalidate, user_namespace
+
+# Flask session key holding the time until which reads stick to the primary
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+
+class RequestDatabaseManager(DatabaseManager):
+    """DatabaseManager whose lifetime is the current request
+    
+    `with get_db() as db:` blocks may be nested or repeated freely; leaving
+    a block does not release the connection, close_db() does.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Users whose cached views close_db() drops (the writer, plus affects_users())
+        self.affected_users = set()
+    
+    def __enter__(self):
+        """Context manager entry (connection is borrowed on first use)"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit (release is deferred to request teardown)"""
+        return False
+    
+    def _after_write(self):
+        """Keep this user's next requests reading from the primary; note whose cached views to drop"""
+        if self.replicas:
+            window = current_app.config.get('DB_READ_YOUR_WRITES_SECONDS', 5)
+            session[PRIMARY_UNTIL_KEY] = time.time() + window
+        
+        user_id = session.get('user_id')
+        if user_id is not None:
+            self.affected_users.add(user_id)
+    
+    def affects_users(self, user_ids):
+        """Also drop these users' cached views after this request (its writes changed what they see)"""
+        self.affected_users.update(user_ids)
+    
+    def affects_session(self, session_id):
+        """affects_users() for everyone in a session"""
+        rows = self.execute_query("SELECT student_id FROM SESSION_PARTICIPANT WHERE session_id = %s", (session_id,))
+        self.affects_users(row['student_id'] for row in rows)
+    
+    def invalidate_affected(self):
+        """Drop the noted users' cached views; called at teardown, after the request's writes committed"""
+        for user_id in self.affected_users:
+            invalidate(user_namespace(user_id))
+        self.affected_users.clear()
+
+
+def get_db():
+    """Get the DatabaseManager for the current request"""
+    db = g.get('db')
+    if db is None:
+        db = g.db = RequestDatabaseManager(
+            current_app.config['DB_CONFIG'],
+            replicas=current_app.config.get('DB_REPLICAS'),
+            replica_strategy=current_app.config.get('DB_REPLICA_STRATEGY', 'least_loaded')
+        )
+        db.use_primary = session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+    return db
+
+
+def close_db(exception=None):
+    """Return the request's connection to the pool, then drop the cached views its writes affected"""
+    db = g.pop('db', None)
+    if db is not None:
+        try:
+            db.close()
+        finally:
+            db.invalidate_affected()
+
+
+def init_app(app):
+    """Register request teardown for the shared connection"""
+    app.teardown_appcontext(close_db)
@@ -1,79 +1,466 @@
-import mysql.connector
 from mysql.connector import Error
+from contextlib import contextmanager
 import logging
+import re
+import time
+from database.pool import get_pool, pick_replica_pool
+from database import query_stats
+from database.retry import backoff_delay, is_connection_error, is_retryable, max_attempts
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Row shapes supported by iter_query
+ROW_MODES = ('dict', 'tuple', 'namedtuple')
+
+# Table/column names bulk_insert will interpolate into SQL
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Upper bound on rows packed into one multi-row INSERT
+BULK_INSERT_MAX_ROWS = 1000
+
 
 class DatabaseManager:
-    """Manages MySQL database connections and operations"""
+    """Manages MySQL database connections and operations
+    
+    Connections are borrowed from the process-wide pool for this config
+    (see database/pool.py) and handed back on close().
+    
+    With replicas configured, plain reads (execute_query, iter_query) go to
+    a replica; writes, stored procedures, transactions and any read after a
+    write through this manager use the primary. Set use_primary to pin all
+    reads to the primary (read-your-writes).
     
-    def __init__(self, config):
-        """Initialize with database configuration"""
+    Reads are retried on a fresh connection when the connection drops, and
+    single statements outside a transaction are retried on deadlocks (see
+    database/retry.py).
+    """
+    
+    def __init__(self, config, replicas=None, replica_strategy='least_loaded'):
+        """Initialize with primary and optional replica configurations"""
         self.config = config
+        self.replicas = list(replicas or [])
+        self.replica_strategy = replica_strategy
+        self.use_primary = False
         self.connection = None
         self.cursor = None
+        self._pooled = None
+        self._replica = None
+        self._replica_pool = None
+        self._wrote = False
+        self._transaction_depth = 0
         
     def connect(self):
-        """Establish database connection"""
+        """Borrow a connection from the pool"""
         try:
-            if self.connection is None or not self.connection.is_connected():
-                self.connection = mysql.connector.connect(**self.config)
-                logger.info("Successfully connected to MySQL database")
+            if self._pooled is None:
+                self._pooled = get_pool(self.config).acquire()
+                self.connection = self._pooled.connection
             return self.connection
         except Error as e:
             logger.error(f"Error connecting to MySQL: {e}")
             raise
     
+    def _release(self, discard=False):
+        """Hand the borrowed connection back to the pool"""
+        pooled, self._pooled = self._pooled, None
+        self.connection = None
+        if pooled is not None:
+            get_pool(self.config).release(pooled, discard=discard)
+    
+    def _ensure_connected(self):
+        """Borrow a connection if we do not hold one (the pool checks staleness)"""
+        if self._pooled is None:
+            self.connect()
+    
+    def _primary(self):
+        """Pooled connection to the primary"""
+        self._ensure_connected()
+        return self._pooled
+    
+    def _reader(self):
+        """Pooled connection that plain reads should use"""
+        if not self.replicas or self.use_primary or self._wrote or self.in_transaction:
+            return self._primary()
+        
+        if self._replica is None:
+            pool = pick_replica_pool(self.replicas, self.replica_strategy)
+            try:
+                self._replica = pool.acquire()
+                self._replica_pool = pool
+            except Error as e:
+                logger.warning(f"Replica {pool.config.get('host')} unavailable, reading from primary: {e}")
+                return self._primary()
+        return self._replica
+    
+    def _release_replica(self, discard=False):
+        """Hand the borrowed replica connection back to its pool"""
+        pooled, self._replica = self._replica, None
+        if pooled is not None:
+            self._replica_pool.release(pooled, discard=discard)
+    
+    def _release_pooled(self, pooled, discard=False):
+        """Release whichever connection (primary or replica) pooled is"""
+        if pooled is self._replica:
+            self._release_replica(discard=discard)
+        elif pooled is self._pooled:
+            self._release(discard=discard)
+    
+    def _mark_write(self):
+        """Record a write so later reads see it (read-your-writes)"""
+        self._wrote = True
+        if self._replica is not None:
+            self._release_replica()
+        self._after_write()
+    
+    def _after_write(self):
+        """Hook for subclasses that track writes beyond this manager"""
+    
+    def _with_retry(self, operation, idempotent):
+        """
+        Run operation(), re-running it after transient MySQL errors
+        Lost connections are only retried for idempotent operations; nothing
+        is retried inside a transaction, whose earlier statements are gone.
+        """
+        attempt = 1
+        while True:
+            try:
+                return operation()
+            except Error as e:
+                if self.in_transaction:
+                    raise
+                if is_connection_error(e):
+                    # Never hand a dead connection back to the pool
+                    self._release_replica(discard=True)
+                    self._release(discard=True)
+                if attempt >= max_attempts() or not is_retryable(e, idempotent):
+                    raise
+                delay = backoff_delay(attempt - 1)
+                logger.warning(f"Retrying after MySQL error {e.errno} in {delay * 1000:.0f} ms "
+                               f"(attempt {attempt + 1} of {max_attempts()})")
+                time.sleep(delay)
+                attempt += 1
+    
     def get_cursor(self, dictionary=True):
         """Get cursor for database operations"""
-        if self.connection is None or not self.connection.is_connected():
-            self.connect()
+        self._ensure_connected()
         return self.connection.cursor(dictionary=dictionary)
     
+    def _execute_prepared(self, pooled, query, params):
+        """
+        Run query through the connection's prepared statement cache
+        Returns the (cache-owned) cursor, or None to use a plain cursor
+        """
+        statements = pooled.statements
+        if statements is None or not statements.can_prepare(query):
+            return None
+        return statements.execute(query, tuple(params or ()))
+    
+    def _record(self, kind, query, params, started, pooled=None, rows=None, row_count=0, error=False):
+        """Time a statement, log it if slow and EXPLAIN it now and then"""
+        if not query_stats.enabled():
+            return
+        elapsed = time.perf_counter() - started
+        if rows is not None:
+            row_count = len(rows)
+        nbytes = query_stats.estimate_bytes(rows) if rows else 0
+        explain_due = query_stats.record(query, kind, elapsed, row_count, nbytes, error)
+        
+        if not error and elapsed >= query_stats.slow_query_seconds():
+            logger.warning(f"Slow {kind} ({elapsed * 1000:.1f} ms, {row_count} rows): {' '.join(query.split())}")
+            if explain_due and pooled is not None and kind == 'select':
+                self._log_explain(pooled, query, params)
+    
+    def _log_explain(self, pooled, query, params):
+        """Log MySQL's plan for a slow SELECT"""
+        try:
+            cursor = pooled.connection.cursor(dictionary=True)
+            cursor.execute(f"EXPLAIN {query}", params or ())
+            plan = cursor.fetchall()
+            cursor.close()
+            for step in plan:
+                logger.warning(f"EXPLAIN: {step}")
+        except Error as e:
+            logger.warning(f"Could not EXPLAIN slow query: {e}")
+    
     def execute_query(self, query, params=None):
         """Execute SELECT query and return results"""
+        return self._with_retry(lambda: self._execute_query(query, params), idempotent=True)
+    
+    def _execute_query(self, query, params):
+        started = time.perf_counter()
+        pooled = None
         try:
-            cursor = self.get_cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            results = cursor.fetchall()
-            cursor.close()
+            pooled = self._reader()
+            cursor = self._execute_prepared(pooled, query, params)
+            if cursor is not None:
+                columns = cursor.column_names
+                results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            else:
+                cursor = pooled.connection.cursor(dictionary=True)
+                cursor.execute(query, params or ())
+                results = cursor.fetchall()
+                cursor.close()
+            self._record('select', query, params, started, pooled, rows=results)
             return results
         except Error as e:
+            self._record('select', query, params, started, error=True)
             logger.error(f"Error executing query: {e}")
             logger.error(f"Query: {query}")
             logger.error(f"Params: {params}")
             raise
     
+    def iter_query(self, query, params=None, chunk_size=500, row_mode='dict'):
+        """
+        Stream SELECT results, fetching chunk_size rows at a time
+        row_mode: 'dict' (default), 'tuple' or 'namedtuple'
+        Uses an unbuffered cursor, so the connection cannot run other
+        queries until the generator is exhausted or closed.
+        """
+        if row_mode not in ROW_MODES:
+            raise ValueError(f"row_mode must be one of {', '.join(ROW_MODES)}")
+        
+        started = time.perf_counter()
+        cursor = None
+        pooled = None
+        row_count = 0
+        try:
+            pooled = self._reader()
+            cursor = pooled.connection.cursor(
+                buffered=False,
+                dictionary=(row_mode == 'dict'),
+                named_tuple=(row_mode == 'namedtuple')
+            )
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                row_count += len(rows)
+                yield from rows
+            self._record('select', query, params, started, row_count=row_count)
+        except Error as e:
+            self._record('select', query, params, started, error=True)
+            logger.error(f"Error streaming query: {e}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Params: {params}")
+            raise
+        finally:
+            if cursor is not None:
+                if pooled.connection.unread_result:
+                    # Abandoned mid-stream: dropping the connection is cheaper
+                    # than draining the rest of a large result set
+                    self._release_pooled(pooled, discard=True)
+                else:
+                    cursor.close()
+    
     def execute_update(self, query, params=None):
         """Execute INSERT/UPDATE/DELETE query"""
+        return self._with_retry(lambda: self._execute_update(query, params), idempotent=False)
+    
+    def _execute_update(self, query, params):
+        started = time.perf_counter()
         try:
-            cursor = self.get_cursor(dictionary=False)
-            cursor.execute(query, params or ())
-            affected_rows = cursor.rowcount
-            last_id = cursor.lastrowid
-            cursor.close()
+            self._mark_write()
+            cursor = self._execute_prepared(self._primary(), query, params)
+            if cursor is not None:
+                affected_rows = cursor.rowcount
+                last_id = cursor.lastrowid
+            else:
+                cursor = self.get_cursor(dictionary=False)
+                cursor.execute(query, params or ())
+                affected_rows = cursor.rowcount
+                last_id = cursor.lastrowid
+                cursor.close()
+            
+            self._commit_unless_in_transaction()
             
-            # Commit if autocommit is disabled
-            if not self.config.get('autocommit', True):
-                self.connection.commit()
-                
+            self._record('update', query, params, started, row_count=affected_rows)
             return {'affected_rows': affected_rows, 'last_id': last_id}
         except Error as e:
+            self._record('update', query, params, started, error=True)
             logger.error(f"Error executing update: {e}")
             logger.error(f"Query: {query}")
             logger.error(f"Params: {params}")
-            if not self.config.get('autocommit', True):
+            if not is_connection_error(e):
+                self._rollback_unless_in_transaction()
+            raise
+    
+    def execute_many(self, query, seq_params):
+        """
+        Execute one INSERT/UPDATE/DELETE for every parameter set
+        INSERT ... VALUES statements are sent as multi-row batches by the
+        connector; everything runs in a single transaction. Outside a
+        transaction() a batch MySQL rolled back (e.g. as a deadlock victim)
+        is retried like execute_update.
+        """
+        seq_params = list(seq_params)
+        if not seq_params:
+            return {'affected_rows': 0}
+        return self._with_retry(lambda: self._execute_many(query, seq_params), idempotent=False)
+    
+    def _execute_many(self, query, seq_params):
+        started = time.perf_counter()
+        try:
+            self._mark_write()
+            with self.transaction():
+                cursor = self.get_cursor(dictionary=False)
+                cursor.executemany(query, seq_params)
+                affected_rows = cursor.rowcount
+                cursor.close()
+            self._record('batch', query, seq_params, started, row_count=affected_rows)
+            return {'affected_rows': affected_rows}
+        except Error as e:
+            self._record('batch', query, seq_params, started, error=True)
+            logger.error(f"Error executing batch: {e}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Rows: {len(seq_params)}")
+            raise
+    
+    def bulk_insert(self, table, rows, columns=None):
+        """
+        Insert many rows using multi-row VALUES statements
+        rows: list of dicts, or of tuples when columns is given
+        Rows are packed into statements that stay under the server's
+        max_allowed_packet, all inside one transaction.
+        Returns dict with affected_rows and the number of statements sent
+        """
+        rows = list(rows)
+        if not rows:
+            return {'affected_rows': 0, 'statements': 0}
+        if columns is None:
+            columns = list(rows[0].keys())
+        if isinstance(rows[0], dict):
+            rows = [tuple(row[column] for column in columns) for row in rows]
+        
+        for name in [table, *columns]:
+            if not IDENTIFIER_PATTERN.match(name):
+                raise ValueError(f"Invalid SQL identifier: {name!r}")
+        
+        prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        
+        affected_rows = 0
+        statements = 0
+        self._mark_write()
+        with self.transaction():
+            budget = self._max_allowed_packet() - len(prefix) - 1024
+            for batch in self._pack_rows(rows, budget):
+                query = prefix + ', '.join([placeholders] * len(batch))
+                params = [value for row in batch for value in row]
+                cursor = self.get_cursor(dictionary=False)
+                started = time.perf_counter()
+                try:
+                    cursor.execute(query, params)
+                    affected_rows += cursor.rowcount
+                    self._record('batch', query, params, started, row_count=cursor.rowcount)
+                except Error as e:
+                    self._record('batch', query, params, started, error=True)
+                    logger.error(f"Error executing bulk insert into {table}: {e}")
+                    raise
+                finally:
+                    cursor.close()
+                statements += 1
+        
+        return {'affected_rows': affected_rows, 'statements': statements}
+    
+    @staticmethod
+    def _pack_rows(rows, budget):
+        """Split rows into batches whose estimated SQL size fits budget bytes"""
+        batch = []
+        size = 0
+        for row in rows:
+            # Worst case: every UTF-8 byte escaped, plus quotes and separators
+            row_size = sum(2 * len(value if isinstance(value, bytes) else str(value).encode('utf-8')) + 4
+                           for value in row) + 4
+            if batch and (size + row_size > budget or len(batch) >= BULK_INSERT_MAX_ROWS):
+                yield batch
+                batch = []
+                size = 0
+            batch.append(row)
+            size += row_size
+        if batch:
+            yield batch
+    
+    def _max_allowed_packet(self):
+        """Server's max_allowed_packet, read once per pooled connection"""
+        self._ensure_connected()
+        if self._pooled.max_allowed_packet is None:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT @@max_allowed_packet")
+            self._pooled.max_allowed_packet = int(cursor.fetchone()[0])
+            cursor.close()
+        return self._pooled.max_allowed_packet
+    
+    @property
+    def in_transaction(self):
+        """True inside a transaction() block"""
+        return self._transaction_depth > 0
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several statements into one transaction
+        Commits once when the block succeeds and rolls back if it raises.
+        Nested blocks join the outermost transaction.
+        """
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        
+        self._ensure_connected()
+        self.connection.start_transaction()
+        self._transaction_depth = 1
+        try:
+            yield self
+            self.connection.commit()
+        except BaseException:
+            try:
                 self.connection.rollback()
+            except Error as e:
+                logger.error(f"Error rolling back transaction: {e}")
             raise
+        finally:
+            self._transaction_depth = 0
+    
+    def retry_transaction(self, work):
+        """
+        Run work(db) inside transaction(), re-running the whole block if
+        MySQL picks it as a deadlock victim
+        work must only touch the database, since it may run more than once.
+        """
+        def attempt():
+            with self.transaction():
+                return work(self)
+        return self._with_retry(attempt, idempotent=False)
+    
+    def _commit_unless_in_transaction(self):
+        """Commit if autocommit is disabled and no transaction() is open"""
+        if not self.config.get('autocommit', True) and not self.in_transaction:
+            self.connection.commit()
+    
+    def _rollback_unless_in_transaction(self):
+        """Roll back if autocommit is disabled and no transaction() is open"""
+        if not self.config.get('autocommit', True) and not self.in_transaction:
+            self.connection.rollback()
     
     def call_procedure(self, proc_name, args=None):
         """
         Call stored procedure with arguments
         Returns tuple: (results, out_params)
         """
+        return self._with_retry(lambda: self._call_procedure(proc_name, args), idempotent=False)
+    
+    def _call_procedure(self, proc_name, args):
+        started = time.perf_counter()
+        statement = f"CALL {proc_name}"
         try:
+            # Procedures may write, so they always run on the primary
+            self._mark_write()
             cursor = self.get_cursor(dictionary=True)
             
             # Call procedure
@@ -86,8 +473,11 @@ class DatabaseManager:
             
             cursor.close()
             
+            self._record('procedure', statement, args, started,
+                         row_count=sum(len(result) for result in results))
             return results, result_args
         except Error as e:
+            self._record('procedure', statement, args, started, error=True)
             logger.error(f"Error calling procedure {proc_name}: {e}")
             logger.error(f"Args: {args}")
             raise
@@ -97,19 +487,20 @@ class DatabaseManager:
         return self.execute_query(query)
     
     def close(self):
-        """Close database connection"""
+        """Return the connection to the pool"""
         try:
             if self.cursor:
                 self.cursor.close()
-            if self.connection and self.connection.is_connected():
-                self.connection.close()
-                logger.info("MySQL connection closed")
+                self.cursor = None
         except Error as e:
-            logger.error(f"Error closing connection: {e}")
+            logger.error(f"Error closing cursor: {e}")
+        self._release_replica()
+        self._release()
     
     def __enter__(self):
         """Context manager entry"""
-        self.connect()
+        if not self.replicas:
+            self.connect()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
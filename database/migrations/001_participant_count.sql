@@ -0,0 +1,15 @@
+-- Denormalised participant count on STUDY_SESSION
+-- Maintained by the app (database/participant_counts.py); repair drift with:
+--   flask --app app reconcile-participant-counts
+
+ALTER TABLE STUDY_SESSION
+    ADD COLUMN participant_count INT NOT NULL DEFAULT 0 AFTER max_participants;
+
+-- Backfill from the current participants
+UPDATE STUDY_SESSION ss
+LEFT JOIN (
+    SELECT session_id, COUNT(*) AS actual
+    FROM SESSION_PARTICIPANT
+    GROUP BY session_id
+) counts ON ss.session_id = counts.session_id
+SET ss.participant_count = COALESCE(counts.actual, 0);
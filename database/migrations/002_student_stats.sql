@@ -0,0 +1,27 @@
+-- Materialised dashboard stats, one row per student
+-- Maintained by the app (database/student_stats.py); recompute with:
+--   flask --app app rebuild-student-stats
+
+CREATE TABLE STUDENT_STATS (
+    student_id INT NOT NULL PRIMARY KEY,
+    completed_sessions INT NOT NULL DEFAULT 0,
+    rating_sum DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_id) REFERENCES STUDENT(student_id) ON DELETE CASCADE
+);
+
+-- Backfill from the current participations and feedback
+INSERT INTO STUDENT_STATS (student_id, completed_sessions, rating_sum, rating_count)
+SELECT
+    sp.student_id,
+    COUNT(DISTINCT CASE WHEN ss.status = 'Completed' THEN ss.session_id END),
+    COALESCE(SUM(so.effectiveness_rating), 0),
+    COUNT(so.effectiveness_rating)
+FROM SESSION_PARTICIPANT sp
+JOIN STUDY_SESSION ss ON sp.session_id = ss.session_id
+LEFT JOIN SESSION_OUTCOME so ON so.session_id = ss.session_id
+GROUP BY sp.student_id;
+
+-- Lets the upcoming count start from the date range
+CREATE INDEX idx_study_session_date_status ON STUDY_SESSION (session_date, status);
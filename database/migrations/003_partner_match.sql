@@ -0,0 +1,16 @@
+-- Precomputed top-K partner lists per (student, subject)
+-- Maintained by the app (database/partner_index.py); fill or recompute with:
+--   flask --app app rebuild-partner-index
+
+CREATE TABLE PARTNER_MATCH (
+    student_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    partner_id INT NOT NULL,
+    compatibility_score DECIMAL(3, 2) NOT NULL,
+    PRIMARY KEY (student_id, subject_id, partner_id),
+    KEY idx_partner_match_rank (student_id, subject_id, compatibility_score),
+    KEY idx_partner_match_partner (subject_id, partner_id),
+    FOREIGN KEY (student_id) REFERENCES STUDENT(student_id) ON DELETE CASCADE,
+    FOREIGN KEY (partner_id) REFERENCES STUDENT(student_id) ON DELETE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES SUBJECT(subject_id) ON DELETE CASCADE
+);
@@ -0,0 +1,10 @@
+-- Students whose compatibility scores need recomputing
+-- Filled by the app (database/compatibility_worker.py) and drained by the
+-- compatibility worker; rows are deleted once the student is rescored
+
+CREATE TABLE COMPATIBILITY_DIRTY (
+    student_id INT NOT NULL PRIMARY KEY,
+    marked_at DATETIME(6) NOT NULL,
+    KEY idx_compatibility_dirty_marked (marked_at),
+    FOREIGN KEY (student_id) REFERENCES STUDENT(student_id) ON DELETE CASCADE
+);
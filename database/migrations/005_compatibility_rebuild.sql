@@ -0,0 +1,10 @@
+-- Shards finished by the current full compatibility rebuild
+-- Written by database/compatibility_rebuild.py so `update-compatibility-scores
+-- --resume` can skip them; emptied when a rebuild starts and when it completes
+
+CREATE TABLE COMPATIBILITY_REBUILD_SHARD (
+    first_student_id INT NOT NULL PRIMARY KEY,
+    last_student_id INT NOT NULL,
+    pairs INT NOT NULL,
+    completed_at DATETIME NOT NULL
+);
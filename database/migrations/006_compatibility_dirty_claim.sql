@@ -0,0 +1,9 @@
+-- Let several compatibility workers drain COMPATIBILITY_DIRTY without
+-- rescoring the same students: a worker claims a batch by writing its token
+-- to claimed_by (database/compatibility_worker.py), and claims older than
+-- the worker's claim_timeout may be taken over
+
+ALTER TABLE COMPATIBILITY_DIRTY
+    ADD COLUMN claimed_by CHAR(32) NULL,
+    ADD COLUMN claimed_at DATETIME(6) NULL,
+    ADD KEY idx_compatibility_dirty_claimed (claimed_by);
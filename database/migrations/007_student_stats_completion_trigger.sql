@@ -0,0 +1,32 @@
+-- Credit STUDENT_STATS.completed_sessions wherever a session's status
+-- changes (the app, the autoupdatesessionstatus trigger, a MySQL event or
+-- a manual UPDATE), instead of only in complete-finished-sessions
+
+DELIMITER //
+
+CREATE TRIGGER student_stats_on_session_status
+AFTER UPDATE ON STUDY_SESSION
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'Completed' AND NOT (OLD.status <=> 'Completed') THEN
+        INSERT INTO STUDENT_STATS (student_id, completed_sessions)
+        SELECT student_id, 1 FROM SESSION_PARTICIPANT WHERE session_id = NEW.session_id
+        ON DUPLICATE KEY UPDATE completed_sessions = completed_sessions + 1;
+    ELSEIF OLD.status = 'Completed' AND NOT (NEW.status <=> 'Completed') THEN
+        UPDATE STUDENT_STATS st
+        JOIN SESSION_PARTICIPANT sp ON sp.student_id = st.student_id AND sp.session_id = NEW.session_id
+        SET st.completed_sessions = GREATEST(st.completed_sessions - 1, 0);
+    END IF;
+END//
+
+DELIMITER ;
+
+-- Repair counts that drifted while sessions were completed outside the app
+UPDATE STUDENT_STATS st
+LEFT JOIN (
+    SELECT sp.student_id, COUNT(DISTINCT ss.session_id) as completed
+    FROM SESSION_PARTICIPANT sp
+    JOIN STUDY_SESSION ss ON sp.session_id = ss.session_id AND ss.status = 'Completed'
+    GROUP BY sp.student_id
+) actual ON actual.student_id = st.student_id
+SET st.completed_sessions = COALESCE(actual.completed, 0);
@@ -0,0 +1,95 @@
+"""Cached compatibility scores between one student and others
+
+Profile views used to evaluate CALCULATE_COMPATIBILITY on every request.
+scores() reads the pair's row in COMPATIBILITY_SCORE instead, for all
+uncached pairs in one query, and caches the result. The row is written
+by the same function (UpdateCompatibilityScores, or database/
+compatibility_scores.py), so profile pages and the partner finder agree.
+The function is only evaluated when there is no row (pairs below
+min_score are not stored) or while either student waits in
+COMPATIBILITY_DIRTY, when the row may predate their edit.
+
+A pair is cached once under (smaller id, larger id) and its key carries a
+version token for each student. invalidate_student(), called when a
+student's profile or subjects change (compatibility_worker.mark_dirty)
+and again once the worker has rescored them, replaces that student's
+token, so every cached pair involving them misses from then on and
+simply ages out of the cache.
+
+Tokens live in utils.cache, which is shared by every process whenever
+there is more than one (configure_cache() requires redis then), so an
+edit drops the pair everywhere at once. Nothing stays stale for ttl
+(COMPATIBILITY_CACHE_SECONDS) unless it is written outside the app.
+"""
+import uuid
+from database.db_manager import DatabaseManager
+from utils.cache import cached, cached_many, invalidate
+
+# Cached scores, keyed by both students and their versions
+PAIRS = 'compatibility-pair'
+
+
+def _version_namespace(student_id):
+    return f"compatibility:{student_id}"
+
+
+def _versions(student_ids, ttl):
+    """Current version token of each student (new ones are made on a miss)"""
+    return {
+        student_id: cached(_version_namespace(student_id), 'version', lambda: uuid.uuid4().hex[:12], ttl)['value']
+        for student_id in student_ids
+    }
+
+
+def invalidate_student(student_id):
+    """Forget every cached score involving student_id"""
+    return invalidate(_version_namespace(student_id))
+
+
+def _load(db: DatabaseManager, student_id, other_ids):
+    """Scores for other_ids in one query: the stored row when fresh, else CALCULATE_COMPATIBILITY"""
+    placeholders = ', '.join(['%s'] * len(other_ids))
+    rows = db.execute_query(f"""
+        SELECT other.student_id,
+            COALESCE(cs.compatibility_score, CALCULATE_COMPATIBILITY(%s, other.student_id)) as score
+        FROM STUDENT other
+        LEFT JOIN COMPATIBILITY_SCORE cs
+            ON cs.student1_id = LEAST(%s, other.student_id)
+            AND cs.student2_id = GREATEST(%s, other.student_id)
+            AND NOT EXISTS (
+                SELECT 1 FROM COMPATIBILITY_DIRTY d
+                WHERE d.student_id IN (%s, other.student_id)
+            )
+        WHERE other.student_id IN ({placeholders})
+    """, (student_id, student_id, student_id, student_id, *other_ids))
+    return {row['student_id']: float(row['score']) if row['score'] is not None else 0 for row in rows}
+
+
+def scores(db: DatabaseManager, student_id, other_ids, ttl=600):
+    """
+    Compatibility of student_id with each of other_ids
+    Cache misses are loaded together in one query.
+    Returns: {other_id: score}; unknown students and student_id itself are left out
+    """
+    other_ids = sorted({int(other_id) for other_id in other_ids} - {int(student_id)})
+    if not other_ids:
+        return {}
+    student_id = int(student_id)
+    versions = _versions([student_id, *other_ids], ttl)
+
+    keys = {}
+    for other_id in other_ids:
+        low, high = sorted((student_id, other_id))
+        keys[f"{low}.{versions[low]}:{high}.{versions[high]}"] = other_id
+
+    def load(missing):
+        loaded = _load(db, student_id, [keys[key] for key in missing])
+        return {key: loaded[keys[key]] for key in missing if keys[key] in loaded}
+
+    entries = cached_many(PAIRS, list(keys), load, ttl)
+    return {keys[key]: entry['value'] for key, entry in entries.items()}
+
+
+def score(db: DatabaseManager, student_id, other_id, ttl=600):
+    """Compatibility of two students (0 if either does not exist)"""
+    return scores(db, student_id, [other_id], ttl).get(int(other_id), 0)
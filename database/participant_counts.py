@@ -0,0 +1,75 @@
+"""Maintenance of the denormalised STUDY_SESSION.participant_count column
+
+Every path that adds or removes SESSION_PARTICIPANT rows updates the
+counter in the same transaction (see database/migrations/
+001_participant_count.sql for the column itself). reconcile() repairs any
+drift, e.g. from rows changed outside the app.
+"""
+import logging
+from database.db_manager import DatabaseManager
+from database import student_stats
+
+logger = logging.getLogger(__name__)
+
+# Params: (session_id, session_id)
+RECOUNT_QUERY = """
+    UPDATE STUDY_SESSION
+    SET participant_count = (SELECT COUNT(*) FROM SESSION_PARTICIPANT WHERE session_id = %s)
+    WHERE session_id = %s
+"""
+
+
+def adjust(db: DatabaseManager, session_id, delta):
+    """Add delta (may be negative) to a session's participant count"""
+    if delta:
+        db.execute_update(
+            "UPDATE STUDY_SESSION SET participant_count = GREATEST(participant_count + %s, 0) WHERE session_id = %s",
+            (delta, session_id)
+        )
+
+
+def recount_statement(session_id):
+    """(query, params) for recount(), e.g. for an AsyncDatabaseManager"""
+    return RECOUNT_QUERY, (session_id, session_id)
+
+
+def recount(db: DatabaseManager, session_id):
+    """Set a session's count from SESSION_PARTICIPANT (after stored procedures change it)"""
+    db.execute_update(*recount_statement(session_id))
+
+
+def remove_participant(db: DatabaseManager, session_id, student_id):
+    """
+    Delete a participant, decrement the count and take the session out of
+    the student's dashboard stats in one transaction
+    Returns: True if the student was a participant
+    """
+    with db.transaction():
+        result = db.execute_update(
+            "DELETE FROM SESSION_PARTICIPANT WHERE session_id = %s AND student_id = %s",
+            (session_id, student_id)
+        )
+        adjust(db, session_id, -result['affected_rows'])
+        if result['affected_rows']:
+            student_stats.apply_participation(db, session_id, student_id, -1)
+    return result['affected_rows'] > 0
+
+
+def reconcile(db: DatabaseManager):
+    """
+    Fix every session whose counter disagrees with SESSION_PARTICIPANT
+    Returns: number of sessions repaired
+    """
+    result = db.execute_update("""
+        UPDATE STUDY_SESSION ss
+        LEFT JOIN (
+            SELECT session_id, COUNT(*) as actual
+            FROM SESSION_PARTICIPANT
+            GROUP BY session_id
+        ) counts ON ss.session_id = counts.session_id
+        SET ss.participant_count = COALESCE(counts.actual, 0)
+        WHERE ss.participant_count != COALESCE(counts.actual, 0)
+    """)
+    if result['affected_rows']:
+        logger.warning(f"Repaired participant_count drift on {result['affected_rows']} sessions")
+    return result['affected_rows']
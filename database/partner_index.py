@@ -0,0 +1,292 @@
+"""Precomputed top-K study partner lists (PARTNER_MATCH)
+
+/api/partners/find used to call FindStudyPartners, which scores every
+classmate at request time. This module keeps, for every (student,
+subject), the top_k classmates by CALCULATE_COMPATIBILITY above min_score,
+so a search reads at most top_k rows and only filters them by
+availability for the requested slot.
+
+- rebuild() recomputes every list, after UpdateCompatibilityScores or from
+  `flask --app app rebuild-partner-index`
+- refresh_student() rescores one student after their profile or subjects
+  change, replacing their own lists and patching their place in their
+  classmates' lists
+
+Scores are taken to be symmetric, so each pair is scored once. Patching
+trims every list it adds to back to top_k, but a list may miss a
+candidate that was ranked just below the cut until the next rebuild().
+
+Availability is not part of the score: it is checked per search against
+AVAILABILITY, so editing availability needs no refresh. A search only
+sees the top_k list, though, so when a full list has fewer than
+min_results partners free for the slot, find_partners() returns None and
+the caller asks FindStudyPartners, which also finds free classmates
+ranked below the cut.
+"""
+import heapq
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from mysql.connector import Error
+from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Defaults used before/without configure_partners()
+DEFAULT_PARTNER_SETTINGS = {
+    'enabled': True,        # False sends searches back to FindStudyPartners
+    'top_k': 50,            # partners kept per (student, subject)
+    'min_score': 0.60,      # same cut-off as FindStudyPartners
+    'min_results': 5        # fewer free partners than this from a full list: use FindStudyPartners
+}
+
+COLUMNS = ['student_id', 'subject_id', 'partner_id', 'compatibility_score']
+
+_settings = dict(DEFAULT_PARTNER_SETTINGS)
+
+# Every enrolled pair in a subject, each scored once
+_SUBJECT_PAIRS_QUERY = """
+    SELECT
+        a.student_id,
+        b.student_id as partner_id,
+        CALCULATE_COMPATIBILITY(a.student_id, b.student_id) as score
+    FROM STUDENT_SUBJECT a
+    JOIN STUDENT_SUBJECT b ON b.subject_id = a.subject_id AND b.student_id > a.student_id
+    WHERE a.subject_id = %s
+"""
+
+# One student against every classmate in a subject
+# Params: (student_id, subject_id, student_id)
+_STUDENT_SCORES_QUERY = """
+    SELECT
+        other.student_id as partner_id,
+        CALCULATE_COMPATIBILITY(%s, other.student_id) as score
+    FROM STUDENT_SUBJECT other
+    WHERE other.subject_id = %s AND other.student_id != %s
+"""
+
+# Params: (student_id, subject_id, day_of_week, start_time, end_time, limit)
+_FIND_QUERY = """
+    SELECT
+        pm.partner_id as student_id,
+        s.name,
+        s.major,
+        s.year,
+        pm.compatibility_score,
+        ssub.proficiency_level,
+        ssub.can_teach
+    FROM PARTNER_MATCH pm
+    JOIN STUDENT s ON s.student_id = pm.partner_id
+    JOIN STUDENT_SUBJECT ssub ON ssub.student_id = pm.partner_id AND ssub.subject_id = pm.subject_id
+    WHERE pm.student_id = %s AND pm.subject_id = %s
+      AND EXISTS (
+          SELECT 1 FROM AVAILABILITY a
+          WHERE a.student_id = pm.partner_id
+            AND a.day_of_week = %s
+            AND a.start_time <= %s AND a.end_time >= %s
+      )
+    ORDER BY pm.compatibility_score DESC, pm.partner_id ASC
+    LIMIT %s
+"""
+
+
+def configure_partners(**settings):
+    """Set partner index options (see DEFAULT_PARTNER_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_PARTNER_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown partner index settings: {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def enabled():
+    return _settings['enabled']
+
+
+def _offer(heap, partner_id, score):
+    """Keep the top_k (score, partner) pairs in a min-heap"""
+    item = (score, -partner_id)
+    if len(heap) < _settings['top_k']:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def _rows(student_id, subject_id, heap):
+    return [(student_id, subject_id, -negative_id, score) for score, negative_id in heap]
+
+
+def rebuild_subject(db: DatabaseManager, subject_id):
+    """
+    Recompute every list in one subject
+    Returns: number of PARTNER_MATCH rows written
+    """
+    heaps = defaultdict(list)
+    for row in db.iter_query(_SUBJECT_PAIRS_QUERY, (subject_id,)):
+        score = float(row['score'] or 0)
+        if score > _settings['min_score']:
+            _offer(heaps[row['student_id']], row['partner_id'], score)
+            _offer(heaps[row['partner_id']], row['student_id'], score)
+
+    rows = [row for student_id, heap in heaps.items() for row in _rows(student_id, subject_id, heap)]
+    with db.transaction():
+        db.execute_update("DELETE FROM PARTNER_MATCH WHERE subject_id = %s", (subject_id,))
+        db.bulk_insert('PARTNER_MATCH', rows, COLUMNS)
+    return len(rows)
+
+
+def rebuild(db: DatabaseManager):
+    """
+    Recompute every (student, subject) list from scratch
+    Returns: number of PARTNER_MATCH rows written
+    """
+    subject_ids = [row['subject_id'] for row in db.execute_query("SELECT DISTINCT subject_id FROM STUDENT_SUBJECT")]
+    written = sum(rebuild_subject(db, subject_id) for subject_id in subject_ids)
+    # Subjects nobody takes any more
+    db.execute_update("DELETE FROM PARTNER_MATCH WHERE subject_id NOT IN (SELECT subject_id FROM STUDENT_SUBJECT)")
+    logger.info(f"Rebuilt partner index: {written} matches across {len(subject_ids)} subjects")
+    return written
+
+
+def _refresh_subject(db: DatabaseManager, student_id, subject_id):
+    enrolled = db.execute_query(
+        "SELECT 1 FROM STUDENT_SUBJECT WHERE student_id = %s AND subject_id = %s",
+        (student_id, subject_id)
+    )
+    scores = {}
+    if enrolled:
+        for row in db.execute_query(_STUDENT_SCORES_QUERY, (student_id, subject_id, student_id)):
+            score = float(row['score'] or 0)
+            if score > _settings['min_score']:
+                scores[row['partner_id']] = score
+
+    own = []
+    for partner_id, score in scores.items():
+        _offer(own, partner_id, score)
+
+    # Classmates whose list has room for this student, or whose weakest entry scores lower
+    additions = []
+    if scores:
+        placeholders = ', '.join(['%s'] * len(scores))
+        lists = db.execute_query(f"""
+            SELECT student_id, COUNT(*) as size, MIN(compatibility_score) as weakest
+            FROM PARTNER_MATCH
+            WHERE subject_id = %s AND partner_id != %s AND student_id IN ({placeholders})
+            GROUP BY student_id
+        """, (subject_id, student_id, *scores))
+        current = {row['student_id']: (row['size'], float(row['weakest'])) for row in lists}
+        for partner_id, score in scores.items():
+            size, weakest = current.get(partner_id, (0, 0.0))
+            if size < _settings['top_k'] or score > weakest:
+                additions.append((partner_id, subject_id, student_id, score))
+
+    with db.transaction():
+        db.execute_update(
+            "DELETE FROM PARTNER_MATCH WHERE subject_id = %s AND (student_id = %s OR partner_id = %s)",
+            (subject_id, student_id, student_id)
+        )
+        db.bulk_insert('PARTNER_MATCH', _rows(student_id, subject_id, own) + additions, COLUMNS)
+        _trim(db, subject_id, [student_id for student_id, _, _, _ in additions])
+
+
+def _trim(db: DatabaseManager, subject_id, student_ids):
+    """Drop the weakest entries of these students' lists beyond top_k (same order as _offer)"""
+    if not student_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    lists = defaultdict(list)
+    for row in db.execute_query(f"""
+        SELECT student_id, partner_id, compatibility_score
+        FROM PARTNER_MATCH
+        WHERE subject_id = %s AND student_id IN ({placeholders})
+    """, (subject_id, *student_ids)):
+        lists[row['student_id']].append((float(row['compatibility_score']), -row['partner_id']))
+
+    extra = []
+    for student_id, entries in lists.items():
+        entries.sort(reverse=True)
+        extra.extend((subject_id, student_id, -negative_id) for _, negative_id in entries[_settings['top_k']:])
+    db.execute_many(
+        "DELETE FROM PARTNER_MATCH WHERE subject_id = %s AND student_id = %s AND partner_id = %s", extra
+    )
+
+
+def refresh_student(db: DatabaseManager, student_id, subject_id=None):
+    """
+    Rescore a student after their profile (all subjects) or one of their
+    subjects (subject_id) changed, including when they dropped it
+    """
+    if subject_id is None:
+        subject_ids = {row['subject_id'] for row in db.execute_query(
+            "SELECT subject_id FROM STUDENT_SUBJECT WHERE student_id = %s UNION "
+            "SELECT DISTINCT subject_id FROM PARTNER_MATCH WHERE student_id = %s",
+            (student_id, student_id)
+        )}
+    else:
+        subject_ids = {subject_id}
+    try:
+        for each_subject in subject_ids:
+            _refresh_subject(db, student_id, each_subject)
+    except Error as e:
+        # Stale until the next rebuild; searches still work
+        logger.warning(f"Could not refresh partner index for student {student_id}: {e}")
+
+
+def _time_string(seconds):
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _slot(session_date, start_time, duration):
+    """(day_of_week, start, end) of a search window, times as HH:MM:SS"""
+    day_of_week = date.fromisoformat(str(session_date)).strftime('%A')
+    start_format = '%H:%M:%S' if str(start_time).count(':') == 2 else '%H:%M'
+    start = datetime.strptime(str(start_time), start_format)
+    start_seconds = start.hour * 3600 + start.minute * 60 + start.second
+    end_seconds = start_seconds + int(timedelta(hours=float(duration)).total_seconds())
+    return day_of_week, _time_string(start_seconds), _time_string(end_seconds)
+
+
+def _history(db: DatabaseManager, student_id, partner_ids):
+    """Completed sessions shared with each partner and the student's average rating of them"""
+    placeholders = ', '.join(['%s'] * len(partner_ids))
+    rows = db.execute_query(f"""
+        SELECT
+            other.student_id,
+            COUNT(DISTINCT sp.session_id) as past_sessions_together,
+            AVG(so.effectiveness_rating) as avg_past_rating
+        FROM SESSION_PARTICIPANT sp
+        JOIN SESSION_PARTICIPANT other ON other.session_id = sp.session_id
+        JOIN STUDY_SESSION ss ON ss.session_id = sp.session_id AND ss.status = 'Completed'
+        LEFT JOIN SESSION_OUTCOME so ON so.session_id = sp.session_id AND so.student_id = sp.student_id
+        WHERE sp.student_id = %s AND other.student_id IN ({placeholders})
+        GROUP BY other.student_id
+    """, (student_id, *partner_ids))
+    return {row['student_id']: row for row in rows}
+
+
+def find_partners(db: DatabaseManager, student_id, subject_id, session_date, start_time, duration):
+    """
+    Best precomputed partners free for the whole window, shaped like
+    FindStudyPartners' result set
+    Returns None if the list is full (top_k) but fewer than min_results
+    of it are free: classmates below the cut may be, so use FindStudyPartners.
+    """
+    day_of_week, start, end = _slot(session_date, start_time, duration)
+    partners = db.execute_query(_FIND_QUERY, (student_id, subject_id, day_of_week, start, end, _settings['top_k']))
+    if len(partners) < _settings['min_results']:
+        listed = db.execute_query(
+            "SELECT COUNT(*) as listed FROM PARTNER_MATCH WHERE student_id = %s AND subject_id = %s",
+            (student_id, subject_id)
+        )[0]['listed']
+        if listed >= _settings['top_k']:
+            return None
+    if not partners:
+        return []
+
+    history = _history(db, student_id, [partner['student_id'] for partner in partners])
+    for partner in partners:
+        shared = history.get(partner['student_id'], {})
+        partner['compatibility_score'] = float(partner['compatibility_score'])
+        partner['past_sessions_together'] = int(shared.get('past_sessions_together') or 0)
+        rating = shared.get('avg_past_rating')
+        partner['avg_past_rating'] = float(rating) if rating is not None else None
+    return partners
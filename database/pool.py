@@ -0,0 +1,271 @@
+"""Process-wide MySQL connection pool shared by every DatabaseManager"""
+import itertools
+import threading
+import time
+import logging
+import mysql.connector
+from mysql.connector import Error
+from database.statement_cache import StatementCache
+from database.retry import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Defaults used for pools created before/without configure_pool()
+DEFAULT_POOL_SETTINGS = {
+    'pool_size': 10,            # max open connections per database config
+    'checkout_timeout': 5.0,    # seconds to wait for a free connection
+    'max_age': 1800,            # seconds before a connection is recycled
+    'health_check': True,       # ping connections when they are borrowed...
+    'ping_after': 30,           # ...but only if idle at least this many seconds
+    'statement_cache_size': 64, # prepared statements kept per connection (0 = off)
+    'breaker_threshold': 5,     # consecutive connect failures that open the breaker
+    'breaker_reset': 30         # seconds the breaker stays open before a trial
+}
+
+_pool_settings = dict(DEFAULT_POOL_SETTINGS)
+_pools = {}
+_pools_lock = threading.Lock()
+_replica_turns = itertools.count()
+
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection became free within checkout_timeout"""
+
+
+class PooledConnection:
+    """A MySQL connection owned by a pool, plus the pool's bookkeeping"""
+
+    def __init__(self, connection, statement_cache_size=0):
+        self.connection = connection
+        self.statements = StatementCache(connection, statement_cache_size) if statement_cache_size else None
+        self.max_allowed_packet = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    @property
+    def age(self):
+        return time.monotonic() - self.created_at
+
+    def close(self):
+        """Close the underlying connection, ignoring errors"""
+        try:
+            self.connection.close()
+        except Error:
+            pass
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections for a single database config"""
+
+    def __init__(self, config, pool_size=10, checkout_timeout=5.0, max_age=1800, health_check=True,
+                 ping_after=30, statement_cache_size=64, breaker_threshold=5, breaker_reset=30):
+        self.config = config
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.max_age = max_age
+        self.health_check = health_check
+        self.ping_after = ping_after
+        self.statement_cache_size = statement_cache_size
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+
+        # Stats
+        self._borrowed = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def borrowed(self):
+        """Connections currently checked out"""
+        return self._borrowed
+
+    def _new_connection(self):
+        """Open a fresh connection to MySQL (fails fast while the breaker is open)"""
+        self.breaker.before_call()
+        try:
+            connection = mysql.connector.connect(**self.config)
+        except Error:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        self._created += 1
+        logger.info("Opened pooled MySQL connection")
+        return PooledConnection(connection, self.statement_cache_size)
+
+    def _is_usable(self, pooled):
+        """
+        Check an idle connection before handing it out
+        Recently used connections are trusted without a round trip; only
+        ones idle for ping_after seconds (likely to have timed out) are pinged.
+        """
+        if self.max_age and pooled.age > self.max_age:
+            return False
+        if self.health_check and time.monotonic() - pooled.last_used >= self.ping_after:
+            try:
+                pooled.connection.ping(reconnect=False)
+            except Error:
+                return False
+        return True
+
+    def acquire(self):
+        """Borrow a connection, waiting up to checkout_timeout for one to free up"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.pool_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            msg=f"Timed out after {self.checkout_timeout}s waiting for a pooled connection"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    # LIFO keeps the most recently used (warmest) connections busy
+                    pooled = self._idle.pop()
+                else:
+                    pooled = None
+                    self._open += 1
+
+            if pooled is not None:
+                if self._is_usable(pooled):
+                    break
+                self._discard(pooled)
+                continue
+
+            try:
+                pooled = self._new_connection()
+            except Error:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            break
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._borrowed += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return pooled
+
+    def release(self, pooled, discard=False):
+        """Return a borrowed connection to the pool"""
+        if not discard:
+            try:
+                # Never hand the next borrower someone else's open transaction
+                if pooled.connection.in_transaction:
+                    pooled.connection.rollback()
+            except Error:
+                discard = True
+
+        with self._cond:
+            self._borrowed -= 1
+
+        if discard or (self.max_age and pooled.age > self.max_age):
+            self._discard(pooled)
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def _discard(self, pooled):
+        """Close a connection and free its slot"""
+        pooled.close()
+        with self._cond:
+            self._open -= 1
+            self._discarded += 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Close all idle connections (borrowed ones are closed on release)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._cond:
+            return {
+                'host': self.config.get('host'),
+                'database': self.config.get('database'),
+                'pool_size': self.pool_size,
+                'open': self._open,
+                'borrowed': self._borrowed,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'discarded': self._discarded,
+                'breaker': self.breaker.stats(),
+                'avg_wait_ms': round(self._total_wait / self._checkouts * 1000, 3) if self._checkouts else 0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+                'total_wait_ms': round(self._total_wait * 1000, 3)
+            }
+
+
+def _config_key(config):
+    """Hashable key identifying a database config"""
+    return tuple(sorted((key, repr(value)) for key, value in config.items()))
+
+
+def configure_pool(**settings):
+    """Set pool options (see DEFAULT_POOL_SETTINGS) for pools created afterwards"""
+    unknown = set(settings) - set(DEFAULT_POOL_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown pool settings: {', '.join(sorted(unknown))}")
+    _pool_settings.update(settings)
+
+
+def get_pool(config):
+    """Get (or lazily create) the shared pool for a database config"""
+    key = _config_key(config)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(config, **_pool_settings)
+                _pools[key] = pool
+    return pool
+
+
+def pick_replica_pool(replicas, strategy='least_loaded'):
+    """
+    Choose the pool a read should use from a list of replica configs
+    strategy: 'round_robin', or 'least_loaded' (fewest borrowed connections,
+    rotating between ties)
+    """
+    pools = [get_pool(config) for config in replicas]
+    turn = next(_replica_turns)
+    if strategy == 'round_robin':
+        return pools[turn % len(pools)]
+    if strategy != 'least_loaded':
+        raise ValueError(f"Unknown replica strategy: {strategy}")
+    rotated = pools[turn % len(pools):] + pools[:turn % len(pools)]
+    return min(rotated, key=lambda pool: pool.borrowed)
+
+
+def pool_stats():
+    """Stats for every pool in this process"""
+    return [pool.stats() for pool in list(_pools.values())]
+
+
+def close_all_pools():
+    """Close idle connections in every pool"""
+    for pool in list(_pools.values()):
+        pool.close_all()
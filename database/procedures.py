@@ -1,5 +1,6 @@
 """Wrappers for stored procedures"""
 from database.db_manager import DatabaseManager
+from database import participant_counts, partner_index, student_stats
 
 
 def find_study_partners(db: DatabaseManager, student_id, subject_id, session_date, start_time, duration):
@@ -20,10 +21,14 @@ def create_study_session(db: DatabaseManager, student_id, subject_id, date, star
     """
     # OUT parameter needs to be passed as 0 initially
     args = [student_id, subject_id, date, start_time, end_time, max_participants, description, 0]
-    results, out_params = db.call_procedure('CreateStudySession', args)
-    
-    # The last parameter is the OUT parameter (session_id)
-    new_session_id = out_params[-1]
+    with db.transaction():
+        results, out_params = db.call_procedure('CreateStudySession', args)
+        
+        # The last parameter is the OUT parameter (session_id)
+        new_session_id = out_params[-1]
+        
+        # The procedure adds the creator as organizer
+        participant_counts.recount(db, new_session_id)
     return new_session_id
 
 
@@ -32,16 +37,20 @@ def join_study_session(db: DatabaseManager, session_id, student_id):
     Join a study session
     Calls: JoinStudySession(sessionid, studentid)
     """
-    results, _ = db.call_procedure('JoinStudySession', [session_id, student_id])
+    with db.transaction():
+        results, _ = db.call_procedure('JoinStudySession', [session_id, student_id])
+        participant_counts.recount(db, session_id)
+        student_stats.apply_participation(db, session_id, student_id, 1)
     return True
 
 
 def update_compatibility_scores(db: DatabaseManager):
     """
-    Recalculate all compatibility scores
+    Recalculate all compatibility scores, then the partner index built on them
     Calls: UpdateCompatibilityScores()
     """
     results, _ = db.call_procedure('UpdateCompatibilityScores', [])
+    partner_index.rebuild(db)
     return True
 
 
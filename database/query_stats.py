@@ -0,0 +1,159 @@
+"""Per-statement timing aggregated by normalised SQL fingerprint"""
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+# Defaults used before/without configure_query_stats()
+DEFAULT_QUERY_STATS_SETTINGS = {
+    'enabled': True,
+    'slow_query_ms': 200,       # log (and EXPLAIN) statements slower than this
+    'explain_interval': 60,     # seconds between EXPLAINs of the same fingerprint
+    'sample_size': 1000         # recent timings kept per fingerprint for percentiles
+}
+
+_settings = dict(DEFAULT_QUERY_STATS_SETTINGS)
+_stats = {}
+_lock = threading.Lock()
+
+_COMMENT = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_VALUES_LIST = re.compile(r'\bvalues\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\1)+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def configure_query_stats(**settings):
+    """Set query stats options (see DEFAULT_QUERY_STATS_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_QUERY_STATS_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown query stats settings: {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def enabled():
+    return _settings['enabled']
+
+
+def slow_query_seconds():
+    return _settings['slow_query_ms'] / 1000
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query):
+    """
+    Normalise SQL so statements differing only in literals group together
+    e.g. "WHERE id IN (1, 2, 3)" and "WHERE id IN (%s)" both become "where id in (...)"
+    """
+    sql = _COMMENT.sub(' ', query)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _WHITESPACE.sub(' ', sql).strip().lower()
+    sql = _IN_LIST.sub('in (...)', sql)
+    sql = _VALUES_LIST.sub(r'values \1, ...', sql)
+    return sql
+
+
+def estimate_bytes(rows):
+    """Rough size of fetched rows (string/bytes length, 8 bytes otherwise)"""
+    total = 0
+    for row in rows:
+        values = row.values() if isinstance(row, dict) else row
+        for value in values:
+            if isinstance(value, (str, bytes, bytearray)):
+                total += len(value)
+            elif value is not None:
+                total += 8
+    return total
+
+
+class StatementStats:
+    """Running totals and recent timings for one fingerprint"""
+
+    def __init__(self, fingerprint, kind, sample_size):
+        self.fingerprint = fingerprint
+        self.kind = kind
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.rows = 0
+        self.bytes = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.timings = deque(maxlen=sample_size)
+        self.last_explained = 0.0
+
+    def record(self, elapsed, rows, nbytes, error):
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.rows += rows
+        self.bytes += nbytes
+        self.timings.append(elapsed)
+        if error:
+            self.errors += 1
+        if elapsed >= slow_query_seconds():
+            self.slow += 1
+
+    def to_dict(self):
+        timings = sorted(self.timings)
+
+        def percentile(p):
+            if not timings:
+                return 0
+            index = min(len(timings) - 1, int(round(p / 100 * (len(timings) - 1))))
+            return round(timings[index] * 1000, 3)
+
+        return {
+            'fingerprint': self.fingerprint,
+            'kind': self.kind,
+            'calls': self.calls,
+            'errors': self.errors,
+            'slow': self.slow,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'total_ms': round(self.total_time * 1000, 3),
+            'avg_ms': round(self.total_time / self.calls * 1000, 3) if self.calls else 0,
+            'max_ms': round(self.max_time * 1000, 3),
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99)
+        }
+
+
+def record(query, kind, elapsed, rows=0, nbytes=0, error=False):
+    """
+    Add one execution to its fingerprint's aggregate
+    Returns True if the caller should EXPLAIN this (slow) statement now
+    """
+    key = fingerprint(query)
+    now = time.monotonic()
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = StatementStats(key, kind, _settings['sample_size'])
+        stats.record(elapsed, rows, nbytes, error)
+        if error or elapsed < slow_query_seconds():
+            return False
+        if now - stats.last_explained < _settings['explain_interval']:
+            return False
+        stats.last_explained = now
+        return True
+
+
+def snapshot(order_by='total_ms', limit=None):
+    """Aggregates for every fingerprint, most expensive first"""
+    with _lock:
+        rows = [stats.to_dict() for stats in _stats.values()]
+    rows.sort(key=lambda row: row[order_by], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def reset():
+    """Drop all collected timings"""
+    with _lock:
+        _stats.clear()
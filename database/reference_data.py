@@ -0,0 +1,41 @@
+"""Cached lookups for reference tables (SUBJECT, LOCATION) that rarely change"""
+from database.db_manager import DatabaseManager
+from utils.cache import cached, invalidate
+
+# Cache namespaces, one per table; invalidate() after writing the table
+SUBJECTS = 'subjects'
+LOCATIONS = 'locations'
+NAMESPACES = (SUBJECTS, LOCATIONS)
+
+
+def subjects(db: DatabaseManager):
+    """
+    All subjects ordered by name
+    Returns: {'value': rows, 'etag': ...} (see utils/cache.py)
+    """
+    return cached(SUBJECTS, 'all', lambda: db.execute_query(
+        "SELECT subject_id, subject_name, subject_code FROM SUBJECT ORDER BY subject_name"
+    ))
+
+
+def locations(db: DatabaseManager):
+    """
+    All locations ordered by building and room
+    Returns: {'value': rows, 'etag': ...} (see utils/cache.py)
+    """
+    return cached(LOCATIONS, 'all', lambda: db.execute_query(
+        "SELECT location_id, building, room_number, capacity FROM LOCATION ORDER BY building, room_number"
+    ))
+
+
+def subject_name(db: DatabaseManager, subject_id):
+    """Name of a subject, or None if it does not exist"""
+    for subject in subjects(db)['value']:
+        if str(subject['subject_id']) == str(subject_id):
+            return subject['subject_name']
+    return None
+
+
+def invalidate_all():
+    """Drop every cached reference table"""
+    return {namespace: invalidate(namespace) for namespace in NAMESPACES}
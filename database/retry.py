@@ -0,0 +1,118 @@
+"""Retry policy and circuit breaker for transient MySQL failures"""
+import random
+import threading
+import time
+from mysql.connector import Error
+
+# The connection died under us: safe to retry reads on a fresh connection
+CONNECTION_ERRORS = {
+    2006,   # CR_SERVER_GONE_ERROR
+    2013,   # CR_SERVER_LOST
+    2055,   # CR_SERVER_LOST_EXTENDED
+    4031    # ER_CLIENT_INTERACTION_TIMEOUT
+}
+
+# MySQL rolled the statement back: safe to retry reads and writes
+DEADLOCK_ERRORS = {
+    1205,   # ER_LOCK_WAIT_TIMEOUT
+    1213    # ER_LOCK_DEADLOCK
+}
+
+# Defaults used before/without configure_retry()
+DEFAULT_RETRY_SETTINGS = {
+    'max_attempts': 3,      # total tries, including the first
+    'base_delay': 0.05,     # seconds; doubles each attempt
+    'max_delay': 1.0        # cap on a single backoff sleep
+}
+
+_retry_settings = dict(DEFAULT_RETRY_SETTINGS)
+
+
+class DatabaseUnavailableError(Error):
+    """Raised without touching MySQL while the circuit breaker is open"""
+
+
+def configure_retry(**settings):
+    """Set retry options (see DEFAULT_RETRY_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_RETRY_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown retry settings: {', '.join(sorted(unknown))}")
+    _retry_settings.update(settings)
+
+
+def is_connection_error(error):
+    return getattr(error, 'errno', None) in CONNECTION_ERRORS
+
+
+def is_retryable(error, idempotent):
+    """
+    Whether a failed statement may be re-run
+    Deadlock-class errors are always safe (MySQL rolled the statement back);
+    lost connections only for idempotent statements, since a write may
+    have been applied before the connection dropped.
+    """
+    errno = getattr(error, 'errno', None)
+    if errno in DEADLOCK_ERRORS:
+        return True
+    return idempotent and errno in CONNECTION_ERRORS
+
+
+def max_attempts():
+    return _retry_settings['max_attempts']
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given (0-based) retry"""
+    ceiling = min(_retry_settings['max_delay'], _retry_settings['base_delay'] * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Stops hammering a database that is down
+    After failure_threshold consecutive connection failures the breaker
+    opens and calls fail fast for reset_timeout seconds; then one trial
+    call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        """Raise DatabaseUnavailableError if calls should not reach MySQL"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise DatabaseUnavailableError(msg="Database unavailable (circuit breaker open)")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        return {'state': self.state, 'consecutive_failures': self._failures}
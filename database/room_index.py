@@ -0,0 +1,273 @@
+"""In-process index of booked rooms for /api/locations/recommend
+
+The create form asks for free rooms on every change, and the SQL version
+(recommend_sql) joins LOCATION to STUDY_SESSION with an overlap predicate
+no index can serve. This module keeps, per (location, date), the booked
+time slots of Planned/Active sessions sorted by start with a running
+maximum of their end times, so "does anything overlap [start, end)?" is a
+single bisect. Locations are kept sorted by capacity, so a recommendation
+bisects to the smallest room that fits and tests rooms upwards from
+there until it has limit free ones: O(log L) plus O(log B) per room
+tested. That is linear in the fitting rooms only when most of them are
+booked for the slot.
+
+Like database/session_search.py, every worker keeps its own index: it is
+built from MySQL on first use, patched by the routes that create, edit or
+cancel sessions in this process, and rebuilt every rebuild_interval
+seconds so changes made elsewhere show up too.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from mysql.connector import Error
+from database.db_manager import DatabaseManager
+from database import reference_data
+
+logger = logging.getLogger(__name__)
+
+# Defaults used before/without configure_rooms()
+DEFAULT_ROOM_SETTINGS = {
+    'enabled': True,            # False answers recommendations with recommend_sql()
+    'rebuild_interval': 300     # seconds before the index is reloaded from MySQL
+}
+
+_settings = dict(DEFAULT_ROOM_SETTINGS)
+
+_BOOKING_QUERY = """
+    SELECT session_id, location_id, session_date, start_time, end_time
+    FROM STUDY_SESSION
+    WHERE status IN ('Planned', 'Active') AND location_id IS NOT NULL
+"""
+
+# The pre-index query: free rooms that fit, smallest first
+RECOMMEND_QUERY = """
+    SELECT
+        l.location_id,
+        l.building,
+        l.room_number,
+        l.capacity,
+        COUNT(ss.session_id) as usage_count
+    FROM LOCATION l
+    LEFT JOIN STUDY_SESSION ss ON l.location_id = ss.location_id
+        AND ss.session_date = %s
+        AND ss.status IN ('Planned', 'Active')
+        AND (
+            (ss.start_time < %s AND ss.end_time > %s) OR
+            (ss.start_time < %s AND ss.end_time > %s) OR
+            (ss.start_time >= %s AND ss.end_time <= %s)
+        )
+    WHERE l.capacity >= %s
+    GROUP BY l.location_id, l.building, l.room_number, l.capacity
+    HAVING COUNT(ss.session_id) = 0
+    ORDER BY l.capacity ASC
+    LIMIT %s
+"""
+
+
+def configure_rooms(**settings):
+    """Set room index options (see DEFAULT_ROOM_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_ROOM_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown room index settings: {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def enabled():
+    return _settings['enabled']
+
+
+def to_minutes(value):
+    """Minutes since midnight of a TIME column (timedelta), time, or 'HH:MM[:SS]'; None if unreadable"""
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds() / 60
+    if hasattr(value, 'hour'):
+        return value.hour * 60 + value.minute + value.second / 60
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            parsed = datetime.strptime(str(value), fmt)
+            return parsed.hour * 60 + parsed.minute + parsed.second / 60
+        except ValueError:
+            continue
+    return None
+
+
+class RoomDay:
+    """One room's booked slots on one date, sorted by start"""
+
+    def __init__(self):
+        self.starts = []
+        self.slots = []             # (start, end, session_id)
+        self.max_ends = []          # max_ends[i] = latest end among slots[:i + 1]
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _reindex(self, position):
+        running = self.max_ends[position - 1] if position else float('-inf')
+        del self.max_ends[position:]
+        for _, end, _ in self.slots[position:]:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def add(self, start, end, session_id):
+        position = bisect.bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.slots.insert(position, (start, end, session_id))
+        self._reindex(position)
+
+    def remove(self, session_id):
+        for position, slot in enumerate(self.slots):
+            if slot[2] == session_id:
+                del self.starts[position]
+                del self.slots[position]
+                self._reindex(position)
+                return
+
+    def overlaps(self, start, end):
+        """Whether any slot intersects [start, end)"""
+        # Slots starting before end, and the latest any of them runs to
+        count = bisect.bisect_left(self.starts, end)
+        return count > 0 and self.max_ends[count - 1] > start
+
+
+class RoomIndex:
+    """(location_id, date) -> RoomDay, plus where each session sits"""
+
+    def __init__(self):
+        self._days = defaultdict(RoomDay)
+        self._sessions = {}         # session_id -> (location_id, date)
+        self._lock = threading.RLock()
+        self.built_at = None
+        self._rooms_version = None
+        self._rooms = ([], [])      # (locations by (capacity, location_id), their capacities)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _add(self, row):
+        start, end = to_minutes(row['start_time']), to_minutes(row['end_time'])
+        if start is None or end is None or row['location_id'] is None:
+            return
+        key = (int(row['location_id']), str(row['session_date']))
+        self._days[key].add(start, end, row['session_id'])
+        self._sessions[row['session_id']] = key
+
+    def _remove(self, session_id):
+        key = self._sessions.pop(session_id, None)
+        if key is None:
+            return
+        day = self._days[key]
+        day.remove(session_id)
+        if not day:
+            del self._days[key]
+
+    def load(self, rows):
+        """Replace the whole index with rows shaped like _BOOKING_QUERY's"""
+        fresh = RoomIndex()
+        for row in rows:
+            fresh._add(row)
+        with self._lock:
+            self._days = fresh._days
+            self._sessions = fresh._sessions
+            self.built_at = time.monotonic()
+
+    def upsert(self, row):
+        """Add or move one session's booking"""
+        with self._lock:
+            self._remove(row['session_id'])
+            self._add(row)
+
+    def remove(self, session_id):
+        with self._lock:
+            self._remove(session_id)
+
+    def is_free(self, location_id, session_date, start, end):
+        day = self._days.get((int(location_id), str(session_date)))
+        return day is None or not day.overlaps(start, end)
+
+    def _by_capacity(self, locations, version):
+        """locations sorted by capacity, re-sorted only when version changes (None: every call)"""
+        with self._lock:
+            if version is None or version != self._rooms_version:
+                rooms = sorted(locations, key=lambda location: (location['capacity'] or 0, location['location_id']))
+                self._rooms = (rooms, [location['capacity'] or 0 for location in rooms])
+                self._rooms_version = version
+            return self._rooms
+
+    def recommend(self, locations, min_capacity, session_date, start, end, limit=5, version=None):
+        """
+        Up to limit free locations with capacity >= min_capacity, smallest first
+        locations: LOCATION rows; version: changes whenever they do (e.g. their cache ETag)
+        start/end in minutes (None skips the free check)
+        """
+        rooms, capacities = self._by_capacity(locations, version)
+        check = session_date and start is not None and end is not None
+        free = []
+        with self._lock:
+            for location in rooms[bisect.bisect_left(capacities, min_capacity):]:
+                if not check or self.is_free(location['location_id'], session_date, start, end):
+                    free.append(dict(location, usage_count=0))
+                    if len(free) == limit:
+                        break
+        return free
+
+
+_index = RoomIndex()
+_rebuild_lock = threading.Lock()
+
+
+def get_index(db: DatabaseManager):
+    """The process-wide index, (re)built from MySQL when missing or stale"""
+    built_at = _index.built_at
+    if built_at is not None and time.monotonic() - built_at < _settings['rebuild_interval']:
+        return _index
+    # One thread rebuilds; the others keep answering from the previous index
+    if _rebuild_lock.acquire(blocking=built_at is None):
+        try:
+            if _index.built_at == built_at:
+                started = time.perf_counter()
+                _index.load(db.iter_query(_BOOKING_QUERY))
+                logger.info(f"Built room index ({len(_index)} bookings) "
+                            f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        finally:
+            _rebuild_lock.release()
+    return _index
+
+
+def recommend(db: DatabaseManager, min_capacity, session_date, start_time, end_time, limit=5):
+    """Free locations that fit min_capacity for the slot, smallest first"""
+    locations = reference_data.locations(db)
+    return get_index(db).recommend(locations['value'], min_capacity, session_date,
+                                   to_minutes(start_time), to_minutes(end_time), limit, locations['etag'])
+
+
+def recommend_sql(db: DatabaseManager, min_capacity, session_date, start_time, end_time, limit=5):
+    """recommend() answered by MySQL (RECOMMEND_QUERY)"""
+    params = (session_date, end_time, start_time, end_time, end_time, start_time, end_time, min_capacity, limit)
+    return db.execute_query(RECOMMEND_QUERY, params)
+
+
+def refresh_session(db: DatabaseManager, session_id):
+    """Re-read one session's booking after it was created or edited in this process"""
+    if _index.built_at is None:
+        return
+    try:
+        rows = db.execute_query(_BOOKING_QUERY + " AND session_id = %s", (session_id,))
+    except Error as e:
+        # The periodic rebuild will pick the change up
+        logger.warning(f"Could not refresh session {session_id} in room index: {e}")
+        return
+    if rows:
+        _index.upsert(rows[0])
+    else:
+        _index.remove(session_id)
+
+
+def remove_session(session_id):
+    """Free a cancelled session's room"""
+    _index.remove(session_id)
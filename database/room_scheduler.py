@@ -0,0 +1,236 @@
+"""Batch room assignment for unassigned Planned sessions
+
+Sessions created without a room (invite_partner, or create_session with no
+location_id) are given one by `flask --app app schedule-rooms`, which
+assigns every such session in a date range at once instead of asking
+FindOptimalLocation per session:
+
+- greedy: interval partitioning. Each date's sessions are taken by start
+  time (larger first on ties) and put in the smallest free room that
+  holds max_participants. One pass; good, but not always optimal.
+- optimal: the greedy result is the starting point of a branch and bound
+  over each group of overlapping sessions, maximising sessions placed and
+  then minimising unused seats. Each group stops after max_nodes search
+  nodes (or is skipped beyond MAX_SEARCH_GROUP sessions) and keeps the
+  best assignment found so far.
+
+Rooms already booked by Planned/Active sessions stay booked. The result is
+written back in one transaction with batched CASE updates, and only to
+sessions that are still without a room.
+"""
+import bisect
+import logging
+from collections import defaultdict
+from database.db_manager import DatabaseManager
+from database import reference_data
+from database.room_index import RoomDay, to_minutes
+
+logger = logging.getLogger(__name__)
+
+MODES = ('greedy', 'optimal')
+
+# Sessions per UPDATE statement
+WRITE_BATCH = 1000
+
+# Larger overlap groups keep the greedy result (the search recurses once per session)
+MAX_SEARCH_GROUP = 500
+
+_UNASSIGNED_QUERY = """
+    SELECT session_id, session_date, start_time, end_time, max_participants
+    FROM STUDY_SESSION
+    WHERE status = 'Planned' AND location_id IS NULL
+        AND session_date BETWEEN %s AND %s
+"""
+
+_BOOKED_QUERY = """
+    SELECT session_id, location_id, session_date, start_time, end_time
+    FROM STUDY_SESSION
+    WHERE status IN ('Planned', 'Active') AND location_id IS NOT NULL
+        AND session_date BETWEEN %s AND %s
+"""
+
+
+class _Day:
+    """One date's rooms (by capacity) with their booked slots"""
+
+    def __init__(self, rooms):
+        self.rooms = rooms                          # [(capacity, location_id)] ascending
+        self.capacities = [capacity for capacity, _ in rooms]
+        self.slots = defaultdict(RoomDay)           # location_id -> RoomDay
+
+    def candidates(self, session):
+        """Free rooms big enough for session, best fit first"""
+        first = bisect.bisect_left(self.capacities, session['size'])
+        return [(capacity, location_id) for capacity, location_id in self.rooms[first:]
+                if not self.slots[location_id].overlaps(session['start'], session['end'])]
+
+    def book(self, session, location_id):
+        self.slots[location_id].add(session['start'], session['end'], session['session_id'])
+
+    def release(self, session, location_id):
+        self.slots[location_id].remove(session['session_id'])
+
+
+def _normalise(row):
+    return {
+        'session_id': row['session_id'],
+        'start': to_minutes(row['start_time']),
+        'end': to_minutes(row['end_time']),
+        'size': row['max_participants'] or 0
+    }
+
+
+def _greedy(day, sessions):
+    assignment = {}
+    for session in sorted(sessions, key=lambda s: (s['start'], -s['size'], s['session_id'])):
+        free = day.candidates(session)
+        if free:
+            capacity, location_id = free[0]
+            day.book(session, location_id)
+            assignment[session['session_id']] = (location_id, capacity - session['size'])
+    return assignment
+
+
+def _overlap_groups(sessions):
+    """Sessions split into runs that overlap each other (transitively), by start time"""
+    groups = []
+    group_end = None
+    for session in sorted(sessions, key=lambda s: (s['start'], s['session_id'])):
+        if group_end is None or session['start'] >= group_end:
+            groups.append([])
+            group_end = session['end']
+        groups[-1].append(session)
+        group_end = max(group_end, session['end'])
+    return groups
+
+
+def _search(day, group, incumbent, max_nodes):
+    """Branch and bound over one overlap group; returns (assignment, nodes explored)"""
+    best = {'assignment': dict(incumbent), 'key': _objective(incumbent)}
+    current = {}
+    nodes = 0
+    # Larger sessions first: they have fewer rooms to choose from
+    order = sorted(group, key=lambda s: (-s['size'], s['start'], s['session_id']))
+
+    def visit(position, placed, waste):
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes:
+            return
+        remaining = len(order) - position
+        if (placed + remaining, -waste) <= best['key']:
+            return
+        if remaining == 0:
+            best['assignment'] = dict(current)
+            best['key'] = (placed, -waste)
+            return
+        session = order[position]
+        tried = set()
+        for capacity, location_id in day.candidates(session):
+            # Rooms of the same size with identical bookings are interchangeable
+            signature = (capacity, tuple(slot[:2] for slot in day.slots[location_id].slots))
+            if signature in tried:
+                continue
+            tried.add(signature)
+            day.book(session, location_id)
+            current[session['session_id']] = (location_id, capacity - session['size'])
+            visit(position + 1, placed + 1, waste + capacity - session['size'])
+            del current[session['session_id']]
+            day.release(session, location_id)
+        visit(position + 1, placed, waste)
+
+    visit(0, 0, 0)
+    return best['assignment'], nodes
+
+
+def _objective(assignment):
+    return len(assignment), -sum(waste for _, waste in assignment.values())
+
+
+def assign(sessions, locations, booked, mode='greedy', max_nodes=50000):
+    """
+    Choose rooms for sessions without a room
+    sessions: rows like _UNASSIGNED_QUERY's; locations: LOCATION rows;
+    booked: rows like _BOOKED_QUERY's (rooms that are already taken)
+    Returns: {session_id: location_id} for every session that could be placed
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown scheduling mode: {mode}")
+    rooms = sorted((location['capacity'] or 0, location['location_id']) for location in locations)
+
+    days = defaultdict(lambda: _Day(rooms))
+    for row in booked:
+        start, end = to_minutes(row['start_time']), to_minutes(row['end_time'])
+        if start is not None and end is not None:
+            days[str(row['session_date'])].slots[row['location_id']].add(start, end, row['session_id'])
+
+    by_date = defaultdict(list)
+    for row in sessions:
+        session = _normalise(row)
+        if session['start'] is not None and session['end'] is not None:
+            by_date[str(row['session_date'])].append(session)
+
+    assignment = {}
+    for session_date, day_sessions in by_date.items():
+        day = days[session_date]
+        placed = _greedy(day, day_sessions)
+        if mode == 'optimal':
+            for group in _overlap_groups(day_sessions):
+                if len(group) > MAX_SEARCH_GROUP:
+                    logger.info(f"Kept greedy rooms for {len(group)} overlapping sessions on {session_date}")
+                    continue
+                # Search from the greedy choice with that group's rooms freed again
+                incumbent = {s['session_id']: placed[s['session_id']] for s in group if s['session_id'] in placed}
+                for session in group:
+                    if session['session_id'] in incumbent:
+                        day.release(session, incumbent[session['session_id']][0])
+                improved, nodes = _search(day, group, incumbent, max_nodes)
+                if nodes > max_nodes:
+                    logger.info(f"Room search for {len(group)} overlapping sessions on {session_date} "
+                                f"stopped after {max_nodes} nodes")
+                for session in group:
+                    placed.pop(session['session_id'], None)
+                    if session['session_id'] in improved:
+                        day.book(session, improved[session['session_id']][0])
+                placed.update(improved)
+        assignment.update({session_id: location_id for session_id, (location_id, _) in placed.items()})
+    return assignment
+
+
+def write_assignments(db: DatabaseManager, assignment):
+    """Set location_id for every assigned session still without a room; returns rows updated"""
+    items = sorted(assignment.items())
+    updated = 0
+    with db.transaction():
+        for offset in range(0, len(items), WRITE_BATCH):
+            batch = items[offset:offset + WRITE_BATCH]
+            cases = ' '.join(['WHEN %s THEN %s'] * len(batch))
+            placeholders = ', '.join(['%s'] * len(batch))
+            params = [value for pair in batch for value in pair] + [session_id for session_id, _ in batch]
+            result = db.execute_update(f"""
+                UPDATE STUDY_SESSION SET location_id = CASE session_id {cases} END
+                WHERE session_id IN ({placeholders}) AND location_id IS NULL
+            """, tuple(params))
+            updated += result['affected_rows']
+    return updated
+
+
+def schedule(db: DatabaseManager, date_from, date_to, mode='greedy', max_nodes=50000, dry_run=False):
+    """
+    Assign rooms to every unassigned Planned session from date_from to date_to
+    Returns: dict with sessions, assigned, unplaced and written
+    """
+    sessions = db.execute_query(_UNASSIGNED_QUERY, (date_from, date_to))
+    booked = db.execute_query(_BOOKED_QUERY, (date_from, date_to))
+    locations = reference_data.locations(db)['value']
+
+    assignment = assign(sessions, locations, booked, mode, max_nodes)
+    written = 0 if dry_run else write_assignments(db, assignment)
+    totals = {
+        'sessions': len(sessions),
+        'assigned': len(assignment),
+        'unplaced': len(sessions) - len(assignment),
+        'written': written
+    }
+    logger.info(f"Room scheduling {date_from}..{date_to} ({mode}): {totals}")
+    return totals
@@ -0,0 +1,164 @@
+"""Detect overlapping sessions in a student's schedule
+
+Each student's upcoming Planned/Active sessions are a list sorted by
+(date, start, end), so checking a proposed slot is a bisect to that date
+plus a look at the few sessions on it.
+
+- join_session and create_session refuse overlaps with fresh=True: the
+  guard always reads MySQL, since another worker may have just added a
+  session to the student's schedule
+- update_session checks every participant of the session at once
+  (participant_conflicts)
+- POST /api/sessions/validate checks a whole set of proposals against the
+  cached list, kept for ttl seconds and dropped when the student joins or
+  leaves, and for every participant when a session they are in is
+  created, edited or cancelled (invalidate_student / invalidate_session)
+"""
+import bisect
+from database.db_manager import DatabaseManager
+from database.room_index import to_minutes
+from utils.cache import cached, invalidate
+
+_SCHEDULE_QUERY = """
+    SELECT ss.session_id, ss.session_date, ss.start_time, ss.end_time
+    FROM SESSION_PARTICIPANT sp
+    JOIN STUDY_SESSION ss ON sp.session_id = ss.session_id
+    WHERE sp.student_id = %s
+        AND ss.status IN ('Planned', 'Active')
+        AND ss.session_date >= CURDATE()
+"""
+
+
+def _namespace(student_id):
+    return f"schedule:{student_id}"
+
+
+def schedule(db: DatabaseManager, student_id, fresh=False, ttl=None):
+    """
+    Upcoming sessions of student_id as sorted [date, start minute, end minute, session_id]
+    Cached for ttl seconds, unless fresh (read from MySQL, e.g. to enforce a rule)
+    """
+    def load():
+        entries = []
+        for row in db.execute_query(_SCHEDULE_QUERY, (student_id,)):
+            start, end = to_minutes(row['start_time']), to_minutes(row['end_time'])
+            if start is not None and end is not None:
+                entries.append([str(row['session_date']), start, end, row['session_id']])
+        return sorted(entries)
+    if fresh:
+        return load()
+    return cached(_namespace(student_id), 'sessions', load, ttl)['value']
+
+
+def _overlapping(entries, session_date, start, end, exclude=None):
+    """Entries on session_date intersecting [start, end); entries sorted as schedule() returns them"""
+    first = bisect.bisect_left(entries, [session_date])
+    # Only sessions starting before end can overlap
+    last = bisect.bisect_left(entries, [session_date, end])
+    return [entry for entry in entries[first:last] if entry[2] > start and entry[3] != exclude]
+
+
+def _describe(entry):
+    session_date, start, end, session_id = entry
+    return {
+        'session_id': session_id,
+        'session_date': session_date,
+        'start_time': f"{int(start) // 60:02d}:{int(start) % 60:02d}",
+        'end_time': f"{int(end) // 60:02d}:{int(end) % 60:02d}"
+    }
+
+
+def conflicts(db: DatabaseManager, student_id, session_date, start_time, end_time, exclude=None, fresh=False):
+    """
+    The student's sessions overlapping a proposed slot
+    exclude: a session_id to ignore (the session being edited or joined)
+    fresh: read the schedule from MySQL rather than the cache
+    """
+    start, end = to_minutes(start_time), to_minutes(end_time)
+    if not session_date or start is None or end is None:
+        return []
+    entries = schedule(db, student_id, fresh)
+    return [_describe(entry) for entry in _overlapping(entries, str(session_date), start, end, exclude)]
+
+
+def session_conflicts(db: DatabaseManager, student_id, session_id, fresh=False):
+    """The student's sessions overlapping an existing session (e.g. before joining it)"""
+    rows = db.execute_query(
+        "SELECT session_date, start_time, end_time FROM STUDY_SESSION WHERE session_id = %s", (session_id,)
+    )
+    if not rows:
+        return []
+    return conflicts(db, student_id, rows[0]['session_date'], rows[0]['start_time'], rows[0]['end_time'],
+                     exclude=session_id, fresh=fresh)
+
+
+def participant_conflicts(db: DatabaseManager, session_id, session_date, start_time, end_time):
+    """
+    Sessions of any participant of session_id that would overlap it at a
+    new date/time, in one query (before moving it)
+    Returns: [{'student_id', 'name', 'session_id', 'session_date', 'start_time', 'end_time'}]
+    """
+    start, end = to_minutes(start_time), to_minutes(end_time)
+    if not session_date or start is None or end is None:
+        return []
+    rows = db.execute_query("""
+        SELECT s.student_id, s.name, ss.session_id, ss.session_date, ss.start_time, ss.end_time
+        FROM SESSION_PARTICIPANT moved
+        JOIN STUDENT s ON s.student_id = moved.student_id
+        JOIN SESSION_PARTICIPANT sp ON sp.student_id = moved.student_id AND sp.session_id != moved.session_id
+        JOIN STUDY_SESSION ss ON ss.session_id = sp.session_id
+        WHERE moved.session_id = %s
+            AND ss.status IN ('Planned', 'Active')
+            AND ss.session_date = %s
+            AND ss.start_time < %s AND ss.end_time > %s
+        ORDER BY s.student_id, ss.start_time
+    """, (session_id, str(session_date), str(end_time), str(start_time)))
+    found = []
+    for row in rows:
+        entry = [str(row['session_date']), to_minutes(row['start_time']), to_minutes(row['end_time']),
+                 row['session_id']]
+        found.append(dict(_describe(entry), student_id=row['student_id'], name=row['name']))
+    return found
+
+
+def validate(db: DatabaseManager, student_id, proposals, ttl=None):
+    """
+    Check several proposed sessions at once, against the student's (cached)
+    schedule and against each other
+    proposals: [{'date', 'start_time', 'end_time', 'session_id' (optional, when editing)}]
+    Returns: one {'conflicts': [...], 'proposals': [indexes]} per proposal, in order
+    """
+    entries = schedule(db, student_id, ttl=ttl)
+    proposed = []
+    for index, proposal in enumerate(proposals):
+        start, end = to_minutes(proposal.get('start_time')), to_minutes(proposal.get('end_time'))
+        if proposal.get('date') and start is not None and end is not None:
+            proposed.append([str(proposal['date']), start, end, index])
+    proposed.sort()
+
+    results = [{'conflicts': [], 'proposals': []} for _ in proposals]
+    for session_date, start, end, index in proposed:
+        exclude = proposals[index].get('session_id')
+        results[index]['conflicts'] = [
+            _describe(entry) for entry in _overlapping(entries, session_date, start, end, exclude)
+        ]
+        results[index]['proposals'] = [
+            entry[3] for entry in _overlapping(proposed, session_date, start, end, index)
+        ]
+    return results
+
+
+def invalidate_student(student_id):
+    """Drop one student's cached schedule"""
+    return invalidate(_namespace(student_id))
+
+
+def invalidate_session(db: DatabaseManager, session_id):
+    """
+    Drop the cached schedule of everyone in a session (after it is created, edited or cancelled)
+    Returns: the participants' student ids
+    """
+    rows = db.execute_query("SELECT student_id FROM SESSION_PARTICIPANT WHERE session_id = %s", (session_id,))
+    for row in rows:
+        invalidate_student(row['student_id'])
+    return [row['student_id'] for row in rows]
@@ -16,7 +16,11 @@ TABLES = {
     'availability': 'AVAILABILITY',
     'student_subject': 'STUDENT_SUBJECT',
     'session_subject': 'SESSION_SUBJECT',
-    'location_facilities': 'LOCATION_FACILITIES'
+    'location_facilities': 'LOCATION_FACILITIES',
+    'student_stats': 'STUDENT_STATS',
+    'partner_match': 'PARTNER_MATCH',
+    'compatibility_dirty': 'COMPATIBILITY_DIRTY',
+    'compatibility_rebuild_shard': 'COMPATIBILITY_REBUILD_SHARD'
 }
 
 # COLUMN NAMES (all lowercase with underscores)
@@ -26,8 +30,8 @@ COLUMNS = {
                 'can_teach', 'created_date', 'last_active', 'password'],
     
     'STUDY_SESSION': ['session_id', 'created_by', 'location_id', 'session_date', 
-                      'start_time', 'end_time', 'max_participants', 'status', 
-                      'description', 'created_date'],
+                      'start_time', 'end_time', 'max_participants', 'participant_count',
+                      'status', 'description', 'created_date'],
     
     'SESSION_SUBJECT': ['session_id', 'subject_id', 'coverage_id', 'time_allocated', 
                         'focus_level', 'topics_covered'],
@@ -39,7 +43,14 @@ COLUMNS = {
     'LOCATION': ['location_id', 'building', 'room_number', 'capacity', 'accessibility', 'available_hours'],
     
     'NOTIFICATION': ['notification_id', 'student_id', 'notification_type', 'message', 
-                     'sent_date', 'read_status', 'read_date', 'delivered_date', 'related_session_id']
+                     'sent_date', 'read_status', 'read_date', 'delivered_date', 'related_session_id'],
+    
+    'STUDENT_STATS': ['student_id', 'completed_sessions', 'rating_sum', 'rating_count', 'updated_at'],
+    
+    'PARTNER_MATCH': ['student_id', 'subject_id', 'partner_id', 'compatibility_score'],
+    
+    'COMPATIBILITY_DIRTY': ['student_id', 'marked_at', 'claimed_by', 'claimed_at'],
+    'COMPATIBILITY_REBUILD_SHARD': ['first_student_id', 'last_student_id', 'pairs', 'completed_at']
 }
 
 # STORED PROCEDURES
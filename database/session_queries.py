@@ -0,0 +1,192 @@
+"""Query builder and keyset cursors for paging through study sessions"""
+import base64
+import binascii
+import json
+from datetime import date, timedelta
+
+# Page size bounds for /api/sessions
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# Stop counting matches past this; the total is then reported as a lower bound
+TOTAL_COUNT_CAP = 1000
+
+# Joins every filter can rely on; one SESSION_SUBJECT row per session
+_BASE_FROM = """
+    FROM STUDY_SESSION ss
+    JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
+    JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
+    JOIN STUDENT s ON ss.created_by = s.student_id
+"""
+
+
+def _time_string(value):
+    """TIME columns come back as timedelta; cursors store them as HH:MM:SS"""
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return str(value)
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just past row (its date, start time and id)"""
+    session_date = row['session_date']
+    if isinstance(session_date, date):
+        session_date = session_date.isoformat()
+    key = [session_date, _time_string(row['start_time']), row['session_id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor
+    Returns: (session_date, start_time, session_id); raises ValueError if malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        session_date, start_time, session_id = json.loads(base64.urlsafe_b64decode(padded))
+        date.fromisoformat(session_date)
+        return session_date, str(start_time), int(session_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def encode_offset_cursor(offset):
+    """Opaque cursor for ranked (search) results, which have no stable keyset"""
+    return base64.urlsafe_b64encode(json.dumps({'offset': offset}).encode()).decode().rstrip('=')
+
+
+def decode_offset_cursor(cursor):
+    """Inverse of encode_offset_cursor; raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded))['offset'])
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    if offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+
+def build_filters(subject_id=None, status=None, session_date=None):
+    """
+    WHERE clause shared by the page and count queries
+    Returns: (sql, params)
+    """
+    conditions = ["ss.status != 'Cancelled'"]
+    params = []
+
+    if subject_id:
+        conditions.append("ssub.subject_id = %s")
+        params.append(subject_id)
+
+    if status:
+        conditions.append("ss.status = %s")
+        params.append(status)
+
+    if session_date:
+        conditions.append("ss.session_date = %s")
+        params.append(session_date)
+
+    return "WHERE " + " AND ".join(conditions), params
+
+
+def build_page_query(filters, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of sessions in (session_date, start_time, session_id) order
+    filters: result of build_filters(); after: decoded cursor or None
+    Fetches page_size + 1 rows so the caller can tell whether more follow.
+    The inner query filters, orders and limits without aggregating;
+    locations are then joined for the page's sessions only.
+    Returns: (sql, params)
+    """
+    where, params = filters
+    params = list(params)
+
+    if after is not None:
+        # Expanded row comparison so MySQL can range-scan the ordering columns
+        where += """
+            AND (ss.session_date > %s
+                 OR (ss.session_date = %s AND (ss.start_time > %s
+                     OR (ss.start_time = %s AND ss.session_id > %s))))
+        """
+        after_date, after_time, after_id = after
+        params.extend([after_date, after_date, after_time, after_time, after_id])
+
+    query = f"""
+        SELECT
+            page.*,
+            l.building,
+            l.room_number
+        FROM (
+            SELECT
+                ss.session_id,
+                ss.session_date,
+                ss.start_time,
+                ss.end_time,
+                ss.status,
+                ss.description,
+                ss.max_participants,
+                ss.participant_count,
+                ss.location_id,
+                sub.subject_name,
+                sub.subject_code,
+                s.name as creator_name
+            {_BASE_FROM}
+            {where}
+            ORDER BY ss.session_date ASC, ss.start_time ASC, ss.session_id ASC
+            LIMIT %s
+        ) page
+        LEFT JOIN LOCATION l ON page.location_id = l.location_id
+        ORDER BY page.session_date ASC, page.start_time ASC, page.session_id ASC
+    """
+    params.append(page_size + 1)
+    return query, tuple(params)
+
+
+def build_count_query(filters, cap=TOTAL_COUNT_CAP):
+    """
+    Number of matching sessions, counting at most cap rows
+    Returns: (sql, params)
+    """
+    where, params = filters
+    query = f"""
+        SELECT COUNT(*) as total FROM (
+            SELECT 1 {_BASE_FROM} {where} LIMIT %s
+        ) capped
+    """
+    return query, tuple(list(params) + [cap])
+
+
+def build_ids_query(session_ids, filters=None):
+    """
+    The browse columns for specific sessions (e.g. one page of search hits)
+    filters: result of build_filters() (default: no filters beyond hiding
+    cancelled sessions); re-checked here, so sessions another worker
+    cancelled or changed since its index was built drop out
+    Rows come back in no particular order.
+    Returns: (sql, params)
+    """
+    where, params = filters or build_filters()
+    placeholders = ', '.join(['%s'] * len(session_ids))
+    query = f"""
+        SELECT
+            ss.session_id,
+            ss.session_date,
+            ss.start_time,
+            ss.end_time,
+            ss.status,
+            ss.description,
+            ss.max_participants,
+            ss.location_id,
+            sub.subject_name,
+            sub.subject_code,
+            s.name as creator_name,
+            l.building,
+            l.room_number,
+            ss.participant_count
+        {_BASE_FROM}
+        LEFT JOIN LOCATION l ON ss.location_id = l.location_id
+        {where} AND ss.session_id IN ({placeholders})
+    """
+    return query, tuple(list(params) + list(session_ids))
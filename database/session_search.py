@@ -0,0 +1,243 @@
+"""In-process inverted index for searching study sessions
+
+Replaces the leading-wildcard LIKE search over description, subject and
+organizer name. Every worker keeps its own index: it is built from MySQL
+on first use, patched by the routes that create, edit or cancel sessions
+in this process, and rebuilt every rebuild_interval seconds so changes
+made through other workers show up too.
+"""
+import bisect
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+# Defaults used before/without configure_search()
+DEFAULT_SEARCH_SETTINGS = {
+    'rebuild_interval': 300,    # seconds before the index is reloaded from MySQL
+    'max_results': 1000         # ranked matches kept per search
+}
+
+# Relevance weight of a term hit in each field
+FIELD_WEIGHTS = {
+    'subject_name': 3.0,
+    'subject_code': 3.0,
+    'creator_name': 2.0,
+    'description': 1.0
+}
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+_settings = dict(DEFAULT_SEARCH_SETTINGS)
+
+_DOCUMENT_QUERY = """
+    SELECT
+        ss.session_id,
+        ss.session_date,
+        ss.start_time,
+        ss.status,
+        ssub.subject_id,
+        sub.subject_name,
+        sub.subject_code,
+        s.name as creator_name,
+        ss.description
+    FROM STUDY_SESSION ss
+    JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
+    JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
+    JOIN STUDENT s ON ss.created_by = s.student_id
+    WHERE ss.status != 'Cancelled'
+"""
+
+
+def configure_search(**settings):
+    """Set search options (see DEFAULT_SEARCH_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_SEARCH_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown search settings: {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def max_results():
+    return _settings['max_results']
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of text"""
+    return _TOKEN.findall(str(text).lower()) if text else []
+
+
+class SessionSearchIndex:
+    """Term -> {session_id: weighted term frequency}, plus the filter columns"""
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._terms = []            # sorted vocabulary, for prefix lookups
+        self._documents = {}        # session_id -> (filter columns, terms)
+        self._lock = threading.RLock()
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._documents)
+
+    @staticmethod
+    def _document_terms(row):
+        """Weighted frequency of every term across a session's searchable fields"""
+        terms = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(row.get(field)):
+                terms[token] += weight
+        return terms
+
+    def _add(self, row):
+        terms = self._document_terms(row)
+        filters = {
+            'subject_id': str(row['subject_id']),
+            'status': row['status'],
+            'session_date': str(row['session_date']),
+            'order': (row['session_date'], row['start_time'], row['session_id'])
+        }
+        self._documents[row['session_id']] = (filters, terms)
+        for term, weight in terms.items():
+            if term not in self._postings:
+                bisect.insort(self._terms, term)
+            self._postings[term][row['session_id']] = weight
+
+    def _remove(self, session_id):
+        document = self._documents.pop(session_id, None)
+        if document is None:
+            return
+        for term in document[1]:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(session_id, None)
+            if not postings:
+                del self._postings[term]
+                index = bisect.bisect_left(self._terms, term)
+                if index < len(self._terms) and self._terms[index] == term:
+                    del self._terms[index]
+
+    def load(self, rows):
+        """Replace the whole index with rows shaped like _DOCUMENT_QUERY's"""
+        fresh = SessionSearchIndex()
+        for row in rows:
+            fresh._add(row)
+        with self._lock:
+            self._postings = fresh._postings
+            self._terms = fresh._terms
+            self._documents = fresh._documents
+            self.built_at = time.monotonic()
+
+    def upsert(self, row):
+        """Add or replace one session"""
+        with self._lock:
+            self._remove(row['session_id'])
+            if row['status'] != 'Cancelled':
+                self._add(row)
+
+    def remove(self, session_id):
+        """Drop one session (e.g. once cancelled)"""
+        with self._lock:
+            self._remove(session_id)
+
+    def _expand(self, token):
+        """Vocabulary terms starting with token (prefix matching)"""
+        start = bisect.bisect_left(self._terms, token)
+        end = bisect.bisect_left(self._terms, token + '\uffff')
+        return self._terms[start:end]
+
+    def search(self, text, subject_id=None, status=None, session_date=None, limit=None):
+        """
+        Session ids matching every word of text (each as a prefix), best first
+        Scores are tf-idf with per-field weights; exact word hits beat
+        prefix-only hits, and ties fall back to (date, start time, id) order.
+        """
+        tokens = list(dict.fromkeys(tokenize(text)))
+        if not tokens:
+            return []
+        limit = limit or _settings['max_results']
+
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    boost = 1.0 if term == token else 0.5
+                    for session_id, weight in postings.items():
+                        token_scores[session_id] += boost * weight * idf
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {sid: score + token_scores[sid] for sid, score in scores.items() if sid in token_scores}
+                if not scores:
+                    return []
+
+            matches = []
+            for session_id, score in scores.items():
+                filters = self._documents[session_id][0]
+                if subject_id and filters['subject_id'] != str(subject_id):
+                    continue
+                if status and filters['status'] != status:
+                    continue
+                if session_date and filters['session_date'] != session_date:
+                    continue
+                matches.append((-score, filters['order'], session_id))
+
+        return [session_id for _, _, session_id in heapq.nsmallest(limit, matches)]
+
+
+_index = SessionSearchIndex()
+_rebuild_lock = threading.Lock()
+
+
+def get_index(db):
+    """The process-wide index, (re)built from MySQL when missing or stale"""
+    built_at = _index.built_at
+    if built_at is not None and time.monotonic() - built_at < _settings['rebuild_interval']:
+        return _index
+    # One thread rebuilds; the others keep searching the previous index
+    if _rebuild_lock.acquire(blocking=built_at is None):
+        try:
+            if _index.built_at == built_at:
+                started = time.perf_counter()
+                _index.load(db.iter_query(_DOCUMENT_QUERY))
+                logger.info(f"Built session search index ({len(_index)} sessions) "
+                            f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        finally:
+            _rebuild_lock.release()
+    return _index
+
+
+def search_sessions(db, text, subject_id=None, status=None, session_date=None):
+    """Ranked ids of sessions matching text and the browse filters"""
+    return get_index(db).search(text, subject_id, status, session_date)
+
+
+def refresh_session(db, session_id):
+    """Re-read one session after it was created or edited in this process"""
+    if _index.built_at is None:
+        return
+    try:
+        rows = db.execute_query(_DOCUMENT_QUERY + " AND ss.session_id = %s", (session_id,))
+    except Error as e:
+        # The periodic rebuild will pick the change up
+        logger.warning(f"Could not refresh session {session_id} in search index: {e}")
+        return
+    if rows:
+        _index.upsert(rows[0])
+    else:
+        _index.remove(session_id)
+
+
+def remove_session(session_id):
+    """Forget a cancelled session"""
+    _index.remove(session_id)
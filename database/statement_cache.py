@@ -0,0 +1,117 @@
+"""Per-connection LRU cache of server-side prepared statements"""
+import threading
+import logging
+from collections import OrderedDict
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+# MySQL refuses to prepare some statements (ER_UNSUPPORTED_PS)
+ER_UNSUPPORTED_PS = 1295
+
+_totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'unpreparable': 0}
+_totals_lock = threading.Lock()
+
+
+def _count(key):
+    with _totals_lock:
+        _totals[key] += 1
+
+
+class StatementCache:
+    """Prepared cursors for one connection, keyed by SQL text
+
+    Each cached cursor holds a statement MySQL has already parsed, so a
+    repeated query only sends its parameters over the binary protocol.
+    The least recently used statement is deallocated once max_size is hit.
+    """
+
+    def __init__(self, connection, max_size=64):
+        self.connection = connection
+        self.max_size = max_size
+        self._statements = OrderedDict()
+        self._unpreparable = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def can_prepare(self, query):
+        """False for statements MySQL has already refused to prepare"""
+        return query not in self._unpreparable
+
+    def execute(self, query, params=()):
+        """Execute query as a prepared statement and return its cursor
+
+        The cursor belongs to the cache: callers fetch from it but must not
+        close it. Returns None if MySQL cannot prepare this statement, in
+        which case the caller should fall back to a plain cursor.
+        """
+        entry = self._statements.get(query)
+        if entry is not None:
+            self._statements.move_to_end(query)
+            self.hits += 1
+            _count('hits')
+        else:
+            self.misses += 1
+            _count('misses')
+            entry = (query, self.connection.cursor(prepared=True))
+            self._statements[query] = entry
+            if len(self._statements) > self.max_size:
+                self._evict()
+
+        # The connector only skips re-preparing when it sees the very same
+        # string object it prepared last time, so always pass the cached key
+        sql, cursor = entry
+        try:
+            cursor.execute(sql, params)
+        except Error as e:
+            self._drop(query)
+            if e.errno == ER_UNSUPPORTED_PS:
+                self._unpreparable.add(query)
+                _count('unpreparable')
+                return None
+            raise
+        return cursor
+
+    def _evict(self):
+        """Deallocate the least recently used statement"""
+        _, (_, cursor) = self._statements.popitem(last=False)
+        self.evictions += 1
+        _count('evictions')
+        try:
+            cursor.close()
+        except Error as e:
+            logger.warning(f"Error closing prepared statement: {e}")
+
+    def _drop(self, query):
+        """Forget a statement whose cursor is in an unknown state"""
+        entry = self._statements.pop(query, None)
+        if entry is not None:
+            try:
+                entry[1].close()
+            except Error:
+                pass
+
+    def clear(self):
+        """Deallocate every cached statement"""
+        while self._statements:
+            self._evict()
+
+    def stats(self):
+        """Counters for this connection's cache"""
+        return {
+            'size': len(self._statements),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+def statement_cache_stats():
+    """Process-wide prepared statement counters"""
+    with _totals_lock:
+        totals = dict(_totals)
+    lookups = totals['hits'] + totals['misses']
+    totals['hit_rate'] = round(totals['hits'] / lookups, 4) if lookups else 0
+    return totals
@@ -0,0 +1,149 @@
+"""Materialised per-student dashboard stats (STUDENT_STATS)
+
+Holds each student's completed-session count and the sum and count of
+effectiveness ratings on the sessions they take part in, so the dashboard
+reads one row instead of aggregating their whole history. Rows are
+adjusted in the same transaction as the change that affects them:
+
+- joining or leaving a session adds or removes that session's contribution
+- a session becoming Completed (or leaving Completed) credits or debits
+  every participant, in the student_stats_on_session_status trigger
+  (database/migrations/007_student_stats_completion_trigger.sql), so it
+  holds however the status changes: complete_session(), a MySQL event,
+  another trigger or a manual UPDATE
+- record_feedback() credits every participant of the rated session
+
+See database/migrations/002_student_stats.sql for the table. rebuild()
+recomputes everything from scratch, e.g. after sessions are rated or
+participants changed outside the app.
+"""
+import logging
+from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Add (sign = 1) or remove (sign = -1) one session's contribution to a student
+# Params: (student_id, sign, sign, sign, session_id)
+PARTICIPATION_QUERY = """
+    INSERT INTO STUDENT_STATS (student_id, completed_sessions, rating_sum, rating_count)
+    SELECT %s,
+           %s * (ss.status = 'Completed'),
+           %s * COALESCE(SUM(so.effectiveness_rating), 0),
+           %s * COUNT(so.effectiveness_rating)
+    FROM STUDY_SESSION ss
+    LEFT JOIN SESSION_OUTCOME so ON so.session_id = ss.session_id
+    WHERE ss.session_id = %s
+    GROUP BY ss.session_id, ss.status
+    ON DUPLICATE KEY UPDATE
+        completed_sessions = GREATEST(completed_sessions + VALUES(completed_sessions), 0),
+        rating_sum = GREATEST(rating_sum + VALUES(rating_sum), 0),
+        rating_count = GREATEST(rating_count + VALUES(rating_count), 0)
+"""
+
+# Params: (student_id,)
+STATS_QUERY = """
+    SELECT completed_sessions, rating_sum, rating_count
+    FROM STUDENT_STATS
+    WHERE student_id = %s
+"""
+
+# Upcoming depends on today's date, so it is not materialised; the date
+# range bounds the scan by future sessions rather than the user's history
+# Params: (student_id,)
+UPCOMING_COUNT_QUERY = """
+    SELECT COUNT(*) as upcoming_sessions
+    FROM STUDY_SESSION ss
+    JOIN SESSION_PARTICIPANT sp ON sp.session_id = ss.session_id AND sp.student_id = %s
+    WHERE ss.session_date >= CURDATE()
+      AND ss.status IN ('Planned', 'Active')
+"""
+
+_REBUILD_SELECT = """
+    SELECT
+        sp.student_id,
+        COUNT(DISTINCT CASE WHEN ss.status = 'Completed' THEN ss.session_id END),
+        COALESCE(SUM(so.effectiveness_rating), 0),
+        COUNT(so.effectiveness_rating)
+    FROM SESSION_PARTICIPANT sp
+    JOIN STUDY_SESSION ss ON sp.session_id = ss.session_id
+    LEFT JOIN SESSION_OUTCOME so ON so.session_id = ss.session_id
+"""
+
+
+def summarize(stats_row, upcoming_row):
+    """Dashboard stats card from STATS_QUERY and UPCOMING_COUNT_QUERY rows (either may be None)"""
+    stats_row = stats_row or {}
+    rating_count = int(stats_row.get('rating_count') or 0)
+    avg_effectiveness = float(stats_row['rating_sum']) / rating_count if rating_count else 0
+    return {
+        'total_sessions': int(stats_row.get('completed_sessions') or 0),
+        'avg_effectiveness': round(avg_effectiveness, 2),
+        'upcoming_sessions': int((upcoming_row or {}).get('upcoming_sessions') or 0)
+    }
+
+
+def participation_statement(session_id, student_id, sign):
+    """(query, params) for apply_participation(), e.g. for an AsyncDatabaseManager"""
+    return PARTICIPATION_QUERY, (student_id, sign, sign, sign, session_id)
+
+
+def apply_participation(db: DatabaseManager, session_id, student_id, sign):
+    """Credit (sign = 1, after joining) or debit (sign = -1, after leaving) a session to a student"""
+    db.execute_update(*participation_statement(session_id, student_id, sign))
+
+
+def record_feedback(db: DatabaseManager, session_id, effectiveness_rating):
+    """Credit a new SESSION_OUTCOME rating to every participant of the session"""
+    db.execute_update("""
+        INSERT INTO STUDENT_STATS (student_id, rating_sum, rating_count)
+        SELECT student_id, %s, 1 FROM SESSION_PARTICIPANT WHERE session_id = %s
+        ON DUPLICATE KEY UPDATE
+            rating_sum = rating_sum + VALUES(rating_sum),
+            rating_count = rating_count + 1
+    """, (effectiveness_rating, session_id))
+
+
+def complete_session(db: DatabaseManager, session_id):
+    """
+    Mark a Planned/Active session Completed (its trigger credits the participants)
+    Returns: True if the session changed state
+    """
+    result = db.execute_update(
+        "UPDATE STUDY_SESSION SET status = 'Completed' WHERE session_id = %s AND status IN ('Planned', 'Active')",
+        (session_id,)
+    )
+    return result['affected_rows'] > 0
+
+
+def complete_finished_sessions(db: DatabaseManager):
+    """
+    complete_session() for every Planned/Active session that has ended
+    Returns: number of sessions completed
+    """
+    finished = db.execute_query("""
+        SELECT session_id FROM STUDY_SESSION
+        WHERE status IN ('Planned', 'Active')
+          AND TIMESTAMP(session_date, end_time) < NOW()
+    """)
+    return sum(1 for row in finished if complete_session(db, row['session_id']))
+
+
+def rebuild(db: DatabaseManager, student_id=None):
+    """
+    Recompute STUDENT_STATS from SESSION_PARTICIPANT and SESSION_OUTCOME
+    student_id: rebuild one student only (default: everyone)
+    Returns: number of students with stats
+    """
+    columns = "INSERT INTO STUDENT_STATS (student_id, completed_sessions, rating_sum, rating_count)"
+    with db.transaction():
+        if student_id is None:
+            db.execute_update("DELETE FROM STUDENT_STATS")
+            result = db.execute_update(f"{columns} {_REBUILD_SELECT} GROUP BY sp.student_id")
+        else:
+            db.execute_update("DELETE FROM STUDENT_STATS WHERE student_id = %s", (student_id,))
+            result = db.execute_update(
+                f"{columns} {_REBUILD_SELECT} WHERE sp.student_id = %s GROUP BY sp.student_id",
+                (student_id,)
+            )
+    logger.info(f"Rebuilt dashboard stats for {result['affected_rows']} student(s)")
+    return result['affected_rows']
@@ -0,0 +1,115 @@
+"""Cached unread notification counts, pushed to open tabs
+
+The navbar badge used to COUNT(*) a student's unread NOTIFICATION rows on
+every page load. The count is now kept as a cache counter per student
+(utils.cache.counter) and every change is published to that student's
+open streams (utils.events, /api/notifications/stream):
+
+- add(): after the app inserts notifications (send_notifications) or
+  marks them read, the counter is moved by the number of rows
+- refresh_session(): after writes whose triggers insert notifications
+  (joining, editing or cancelling a session), the counts of the
+  session's participants are re-read in one query
+
+Notifications made by triggers on their own (e.g. reminders) show up
+when the counter expires after ttl seconds.
+
+The counter is only kept while streams are enabled, which guarantees it
+is shared by every process (see utils/events.py). With streams disabled
+get() counts on every call, add() and the refreshes do nothing.
+"""
+from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
+from utils.cache import call_async, counter, get_counter, incr_counter, set_counter
+from utils import events
+
+# Published to the student's streams as {'count': n}
+EVENT = 'unread'
+
+_COUNT_QUERY = """
+    SELECT student_id, COUNT(*) as count
+    FROM NOTIFICATION
+    WHERE read_status = FALSE AND student_id IN ({placeholders})
+    GROUP BY student_id
+"""
+
+
+def _namespace(student_id):
+    return f"unread:{student_id}"
+
+
+def _query(student_ids):
+    return _COUNT_QUERY.format(placeholders=', '.join(['%s'] * len(student_ids)))
+
+
+def _count(db: DatabaseManager, student_ids):
+    rows = db.execute_query(_query(student_ids), tuple(student_ids))
+    counts = {student_id: 0 for student_id in student_ids}
+    counts.update({row['student_id']: row['count'] for row in rows})
+    return counts
+
+
+def _store(counts, ttl):
+    for student_id, count in counts.items():
+        events.publish(student_id, EVENT, {'count': set_counter(_namespace(student_id), 'count', count, ttl)})
+    return counts
+
+
+def get(db: DatabaseManager, student_id, ttl=300):
+    """A student's unread count (counted on a cache miss)"""
+    student_id = int(student_id)
+    if not events.enabled():
+        return _count(db, [student_id])[student_id]
+    return counter(_namespace(student_id), 'count', lambda: _count(db, [student_id])[student_id], ttl)
+
+
+async def get_async(db: AsyncDatabaseManager, student_id, ttl=300):
+    """get() for async views"""
+    student_id = int(student_id)
+    count = await call_async(get_counter, _namespace(student_id), 'count') if events.enabled() else None
+    if count is None:
+        rows = await db.execute_query(_query([student_id]), (student_id,))
+        count = rows[0]['count'] if rows else 0
+        if events.enabled():
+            await call_async(set_counter, _namespace(student_id), 'count', count, ttl)
+    return count
+
+
+def refresh(db: DatabaseManager, student_ids, ttl=300):
+    """Recount students' unread notifications in one query and push the results"""
+    student_ids = list(dict.fromkeys(int(student_id) for student_id in student_ids))
+    if not student_ids or not events.enabled():
+        return {}
+    return _store(_count(db, student_ids), ttl)
+
+
+def refresh_session(db: DatabaseManager, session_id, ttl=300):
+    """refresh() every participant of a session (after a write whose triggers notify them)"""
+    if not events.enabled():
+        return {}
+    rows = db.execute_query("""
+        SELECT sp.student_id, COUNT(n.notification_id) as count
+        FROM SESSION_PARTICIPANT sp
+        LEFT JOIN NOTIFICATION n ON n.student_id = sp.student_id AND n.read_status = FALSE
+        WHERE sp.session_id = %s
+        GROUP BY sp.student_id
+    """, (session_id,))
+    return _store({row['student_id']: row['count'] for row in rows}, ttl)
+
+
+def add(db: DatabaseManager, student_ids, delta, ttl=300):
+    """
+    Move students' counters by delta (call once the change has committed)
+    Counters that are not cached, or would go negative, are recounted instead.
+    """
+    if not events.enabled():
+        return
+    recount = []
+    for student_id in dict.fromkeys(int(student_id) for student_id in student_ids):
+        count = incr_counter(_namespace(student_id), 'count', delta)
+        if count is None or count < 0:
+            recount.append(student_id)
+        else:
+            events.publish(student_id, EVENT, {'count': count})
+    if recount:
+        refresh(db, recount, ttl)
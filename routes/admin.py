@@ -0,0 +1,58 @@
+"""Admin-only diagnostics routes"""
+from flask import Blueprint, jsonify, request
+from database import query_stats, reference_data
+from database.pool import pool_stats
+from database.statement_cache import statement_cache_stats
+from utils.auth_helpers import admin_required
+from utils.cache import cache_stats, invalidate
+from utils import events
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/api/admin/db-stats')
+@admin_required
+def get_db_stats():
+    """Per-statement timings, pool usage and prepared statement cache counters"""
+    order_by = request.args.get('order_by', 'total_ms')
+    limit = request.args.get('limit', type=int, default=50)
+    
+    if order_by not in ('total_ms', 'avg_ms', 'p95_ms', 'p99_ms', 'max_ms', 'calls', 'rows', 'bytes'):
+        return jsonify({'success': False, 'message': 'Invalid order_by'}), 400
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'slow_query_ms': query_stats.slow_query_seconds() * 1000,
+            'statements': query_stats.snapshot(order_by=order_by, limit=limit),
+            'pools': pool_stats(),
+            'statement_cache': statement_cache_stats(),
+            'cache': cache_stats(),
+            'event_streams': events.stream_count()
+        }
+    })
+
+
+@admin_bp.route('/api/admin/db-stats/reset', methods=['POST'])
+@admin_required
+def reset_db_stats():
+    """Clear collected statement timings"""
+    query_stats.reset()
+    return jsonify({'success': True, 'message': 'Query stats reset'})
+
+
+@admin_bp.route('/api/admin/cache/invalidate', methods=['POST'])
+@admin_required
+def invalidate_cache():
+    """Drop cached reference data, e.g. after editing SUBJECT or LOCATION by hand"""
+    data = request.get_json(silent=True) or {}
+    namespace = data.get('namespace')
+    
+    if namespace is None:
+        removed = reference_data.invalidate_all()
+    elif namespace in reference_data.NAMESPACES:
+        removed = {namespace: invalidate(namespace)}
+    else:
+        return jsonify({'success': False, 'message': 'Unknown cache namespace'}), 400
+    
+    return jsonify({'success': True, 'data': removed})
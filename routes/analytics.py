@@ -1,8 +1,7 @@
 """Analytics routes"""
-from flask import Blueprint, render_template, jsonify, session
-from database.db_manager import DatabaseManager
-from database import procedures
-from config import Config
+from flask import Blueprint, render_template, jsonify, session, current_app
+from database.async_db_manager import AsyncDatabaseManager
+from database import async_procedures
 from utils.auth_helpers import login_required
 
 analytics_bp = Blueprint('analytics', __name__)
@@ -17,7 +16,7 @@ def dashboard():
 
 @analytics_bp.route('/api/analytics/<int:student_id>')
 @login_required
-def get_analytics(student_id):
+async def get_analytics(student_id):
     """Get analytics for a student (calls GenerateSessionAnalytics procedure)"""
     user_id = session.get('user_id')
     
@@ -25,9 +24,9 @@ def get_analytics(student_id):
     if student_id != user_id:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    async with AsyncDatabaseManager(current_app.config['DB_CONFIG']) as db:
         try:
-            overall_stats, subject_performance, frequent_partners = procedures.generate_session_analytics(db, student_id)
+            overall_stats, subject_performance, frequent_partners = await async_procedures.generate_session_analytics(db, student_id)
             
             # Format the data for frontend
             overall = overall_stats[0] if overall_stats else {}
@@ -1,7 +1,6 @@
 """Authentication routes - Login, Register, Logout"""
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
-from database.db_manager import DatabaseManager
-from config import Config
+from database.context import get_db
 from utils import validators
 import bcrypt
 
@@ -30,7 +29,7 @@ def login_post():
         return jsonify({'success': False, 'message': 'Invalid email format'}), 400
     
     # Check credentials
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT student_id, name, email, phone, major, year, gpa, learning_style, personality_type, password
             FROM STUDENT 
@@ -126,7 +125,7 @@ def register_post():
         return jsonify({'success': False, 'message': '; '.join(errors)}), 400
     
     # Check if email or SRN already exists
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         check_query = "SELECT student_id FROM STUDENT WHERE email = %s OR enrollment_id = %s"
         existing = db.execute_query(check_query, (email, srn))
         
@@ -1,11 +1,122 @@
-"""Dashboard routes"""
-from flask import Blueprint, render_template, jsonify, session
-from database.db_manager import DatabaseManager
-from config import Config
+"""Dashboard routes
+
+The JSON endpoints are async views that only wait on MySQL, so they share
+the async pool instead of each pinning a worker thread to a blocking
+connection. The dashboard page loads everything through /summary, which
+runs every section on one connection and caches each one per user.
+"""
+from flask import Blueprint, render_template, jsonify, session, request, current_app
+from database import student_stats
+from database.async_db_manager import AsyncDatabaseManager
 from utils.auth_helpers import login_required
+from utils.cache import cached_async, user_namespace
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+UPCOMING_QUERY = """
+    SELECT 
+        ss.session_id,
+        ss.session_date,
+        ss.start_time,
+        ss.end_time,
+        ss.status,
+        ss.max_participants,
+        sub.subject_name,
+        sub.subject_code,
+        l.building,
+        l.room_number,
+        ss.participant_count
+    FROM STUDY_SESSION ss
+    JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
+    JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
+    LEFT JOIN LOCATION l ON ss.location_id = l.location_id
+    WHERE ss.session_id IN (
+        SELECT session_id FROM SESSION_PARTICIPANT WHERE student_id = %s
+    )
+    AND ss.session_date >= CURDATE()
+    AND ss.status IN ('Planned', 'Active')
+    ORDER BY ss.session_date, ss.start_time
+    LIMIT 3
+"""
+
+NOTIFICATIONS_QUERY = """
+    SELECT 
+        n.notification_id,
+        n.notification_type,
+        n.message,
+        n.read_status,
+        n.sent_date
+    FROM NOTIFICATION n
+    WHERE n.student_id = %s
+    ORDER BY n.sent_date DESC
+    LIMIT 5
+"""
+
+# Session invites the user hasn't responded to
+INVITATIONS_QUERY = """
+    SELECT 
+        n.notification_id,
+        n.related_session_id as session_id,
+        n.message,
+        n.sent_date,
+        ss.session_date,
+        ss.start_time,
+        ss.end_time,
+        sub.subject_name,
+        sub.subject_code,
+        l.building,
+        l.room_number,
+        ss.participant_count,
+        ss.max_participants
+    FROM NOTIFICATION n
+    JOIN STUDY_SESSION ss ON n.related_session_id = ss.session_id
+    JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
+    JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
+    LEFT JOIN LOCATION l ON ss.location_id = l.location_id
+    WHERE n.student_id = %s
+    AND n.notification_type = 'Session Invite'
+    AND n.read_status = 0
+    AND ss.session_date >= CURDATE()
+    AND ss.status = 'Planned'
+    AND NOT EXISTS (
+        SELECT 1 FROM SESSION_PARTICIPANT 
+        WHERE session_id = ss.session_id AND student_id = %s
+    )
+    ORDER BY n.sent_date DESC
+    LIMIT 5
+"""
+
+
+async def load_stats(db, user_id):
+    """Quick stats cards, from the materialised STUDENT_STATS row"""
+    stats = await db.execute_query(student_stats.STATS_QUERY, (user_id,))
+    upcoming = await db.execute_query(student_stats.UPCOMING_COUNT_QUERY, (user_id,))
+    return student_stats.summarize(stats[0] if stats else None, upcoming[0] if upcoming else None)
+
+
+async def load_upcoming(db, user_id):
+    """Next three sessions the user is in"""
+    return await db.execute_query(UPCOMING_QUERY, (user_id,))
+
+
+async def load_notifications(db, user_id):
+    """Five most recent notifications"""
+    return await db.execute_query(NOTIFICATIONS_QUERY, (user_id,))
+
+
+async def load_invitations(db, user_id):
+    """Pending session invitations (sessions user hasn't joined yet)"""
+    return await db.execute_query(INVITATIONS_QUERY, (user_id, user_id)) or []
+
+
+# Sections /api/dashboard/summary can return, in page order
+SECTIONS = {
+    'stats': load_stats,
+    'invitations': load_invitations,
+    'upcoming': load_upcoming,
+    'notifications': load_notifications
+}
+
 
 @dashboard_bp.route('/dashboard')
 @login_required
@@ -14,165 +125,67 @@ def index():
     return render_template('dashboard.html')
 
 
-@dashboard_bp.route('/api/dashboard/upcoming')
+@dashboard_bp.route('/api/dashboard/summary')
 @login_required
-def get_upcoming_sessions():
-    """Get upcoming sessions for logged-in user"""
+async def get_summary():
+    """
+    Every dashboard section in one request, on one connection
+    ?sections=stats,invitations returns (refreshes) only those sections.
+    Sections are cached per user for DASHBOARD_CACHE_SECONDS; any write
+    the user makes drops their cache early (see database/context.py).
+    """
     user_id = session.get('user_id')
+    requested = request.args.get('sections')
+    names = [name.strip() for name in requested.split(',') if name.strip()] if requested else list(SECTIONS)
+    
+    unknown = [name for name in names if name not in SECTIONS]
+    if unknown:
+        return jsonify({'success': False, 'message': f"Unknown sections: {', '.join(unknown)}"}), 400
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        query = """
-            SELECT 
-                ss.session_id,
-                ss.session_date,
-                ss.start_time,
-                ss.end_time,
-                ss.status,
-                ss.max_participants,
-                sub.subject_name,
-                sub.subject_code,
-                l.building,
-                l.room_number,
-                COUNT(sp.student_id) as participant_count
-            FROM STUDY_SESSION ss
-            JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
-            JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
-            LEFT JOIN LOCATION l ON ss.location_id = l.location_id
-            LEFT JOIN SESSION_PARTICIPANT sp ON ss.session_id = sp.session_id
-            WHERE ss.session_id IN (
-                SELECT session_id FROM SESSION_PARTICIPANT WHERE student_id = %s
+    ttl = current_app.config.get('DASHBOARD_CACHE_SECONDS', 15)
+    data = {}
+    # Not `async with`: fully cached responses never borrow a connection
+    db = AsyncDatabaseManager(current_app.config['DB_CONFIG'])
+    try:
+        for name in names:
+            entry = await cached_async(
+                user_namespace(user_id), f"dashboard:{name}",
+                lambda: SECTIONS[name](db, user_id), ttl
             )
-            AND ss.session_date >= CURDATE()
-            AND ss.status IN ('Planned', 'Active')
-            GROUP BY ss.session_id, ss.session_date, ss.start_time, ss.end_time, 
-                     ss.status, ss.max_participants, sub.subject_name, sub.subject_code, 
-                     l.building, l.room_number
-            ORDER BY ss.session_date, ss.start_time
-            LIMIT 3
-        """
-        sessions = db.execute_query(query, (user_id,))
-        
-        return jsonify({'success': True, 'data': sessions})
+            data[name] = entry['value']
+    finally:
+        await db.close()
+    
+    return jsonify({'success': True, 'data': data})
+
+
+@dashboard_bp.route('/api/dashboard/upcoming')
+@login_required
+async def get_upcoming_sessions():
+    """Get upcoming sessions for logged-in user"""
+    async with AsyncDatabaseManager(current_app.config['DB_CONFIG']) as db:
+        return jsonify({'success': True, 'data': await load_upcoming(db, session.get('user_id'))})
 
 
 @dashboard_bp.route('/api/dashboard/stats')
 @login_required
-def get_stats():
+async def get_stats():
     """Get quick stats for dashboard"""
-    user_id = session.get('user_id')
-    
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        # Total sessions attended
-        query_total = """
-            SELECT COUNT(*) as total
-            FROM SESSION_PARTICIPANT sp
-            JOIN STUDY_SESSION ss ON sp.session_id = ss.session_id
-            WHERE sp.student_id = %s AND ss.status = 'Completed'
-        """
-        total_result = db.execute_query(query_total, (user_id,))
-        total_sessions = total_result[0]['total'] if total_result else 0
-        
-        # Average effectiveness rating
-        query_effectiveness = """
-            SELECT AVG(so.effectiveness_rating) as avg_effectiveness
-            FROM SESSION_OUTCOME so
-            JOIN STUDY_SESSION ss ON so.session_id = ss.session_id
-            JOIN SESSION_PARTICIPANT sp ON ss.session_id = sp.session_id
-            WHERE sp.student_id = %s
-        """
-        effectiveness_result = db.execute_query(query_effectiveness, (user_id,))
-        avg_effectiveness = effectiveness_result[0]['avg_effectiveness'] if effectiveness_result and effectiveness_result[0]['avg_effectiveness'] else 0
-        
-        # Upcoming sessions count
-        query_upcoming = """
-            SELECT COUNT(*) as upcoming
-            FROM SESSION_PARTICIPANT sp
-            JOIN STUDY_SESSION ss ON sp.session_id = ss.session_id
-            WHERE sp.student_id = %s 
-            AND ss.session_date >= CURDATE()
-            AND ss.status IN ('Planned', 'Active')
-        """
-        upcoming_result = db.execute_query(query_upcoming, (user_id,))
-        upcoming_sessions = upcoming_result[0]['upcoming'] if upcoming_result else 0
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'total_sessions': total_sessions,
-                'avg_effectiveness': round(float(avg_effectiveness), 2) if avg_effectiveness else 0,
-                'upcoming_sessions': upcoming_sessions
-            }
-        })
+    async with AsyncDatabaseManager(current_app.config['DB_CONFIG']) as db:
+        return jsonify({'success': True, 'data': await load_stats(db, session.get('user_id'))})
 
 
 @dashboard_bp.route('/api/dashboard/notifications')
 @login_required
-def get_recent_notifications():
+async def get_recent_notifications():
     """Get recent notifications"""
-    user_id = session.get('user_id')
-    
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        query = """
-            SELECT 
-                n.notification_id,
-                n.notification_type,
-                n.message,
-                n.read_status,
-                n.sent_date
-            FROM NOTIFICATION n
-            WHERE n.student_id = %s
-            ORDER BY n.sent_date DESC
-            LIMIT 5
-        """
-        notifications = db.execute_query(query, (user_id,))
-        
-        return jsonify({'success': True, 'data': notifications})
+    async with AsyncDatabaseManager(current_app.config['DB_CONFIG']) as db:
+        return jsonify({'success': True, 'data': await load_notifications(db, session.get('user_id'))})
 
 
 @dashboard_bp.route('/api/dashboard/invitations')
 @login_required
-def get_pending_invitations():
+async def get_pending_invitations():
     """Get pending session invitations (sessions user hasn't joined yet)"""
-    user_id = session.get('user_id')
-    
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        # Get notifications about session invites that user hasn't responded to
-        query = """
-            SELECT 
-                n.notification_id,
-                n.related_session_id as session_id,
-                n.message,
-                n.sent_date,
-                ss.session_date,
-                ss.start_time,
-                ss.end_time,
-                sub.subject_name,
-                sub.subject_code,
-                l.building,
-                l.room_number,
-                COUNT(sp.student_id) as participant_count,
-                ss.max_participants
-            FROM NOTIFICATION n
-            JOIN STUDY_SESSION ss ON n.related_session_id = ss.session_id
-            JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
-            JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
-            LEFT JOIN LOCATION l ON ss.location_id = l.location_id
-            LEFT JOIN SESSION_PARTICIPANT sp ON ss.session_id = sp.session_id
-            WHERE n.student_id = %s
-            AND n.notification_type = 'Session Invite'
-            AND n.read_status = 0
-            AND ss.session_date >= CURDATE()
-            AND ss.status = 'Planned'
-            AND NOT EXISTS (
-                SELECT 1 FROM SESSION_PARTICIPANT 
-                WHERE session_id = ss.session_id AND student_id = %s
-            )
-            GROUP BY n.notification_id, n.related_session_id, n.message, n.sent_date,
-                     ss.session_date, ss.start_time, ss.end_time, sub.subject_name,
-                     sub.subject_code, l.building, l.room_number, ss.max_participants
-            ORDER BY n.sent_date DESC
-            LIMIT 5
-        """
-        invitations = db.execute_query(query, (user_id, user_id))
-        
-        return jsonify({'success': True, 'data': invitations or []})
+    async with AsyncDatabaseManager(current_app.config['DB_CONFIG']) as db:
+        return jsonify({'success': True, 'data': await load_invitations(db, session.get('user_id'))})
@@ -1,8 +1,13 @@
 """Notification routes"""
-from flask import Blueprint, render_template, jsonify, session, request
+import csv
+import io
+from flask import Blueprint, render_template, jsonify, session, request, Response, current_app
+from database.context import get_db
 from database.db_manager import DatabaseManager
-from config import Config
+from database.async_db_manager import AsyncDatabaseManager
+from database import unread_counts
 from utils.auth_helpers import login_required
+from utils import events
 
 notifications_bp = Blueprint('notifications', __name__)
 
@@ -21,7 +26,7 @@ def get_notifications():
     user_id = session.get('user_id')
     filter_type = request.args.get('filter', 'all')  # all, read, unread
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT 
                 notification_id,
@@ -51,31 +56,110 @@ def get_notifications():
 def mark_as_read(notification_id):
     """Mark notification as read"""
     user_id = session.get('user_id')
+    ttl = current_app.config.get('UNREAD_COUNT_CACHE_SECONDS', 300)
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
+        # Only unread rows, so affected_rows is exactly how far the unread count drops
         query = """
             UPDATE NOTIFICATION 
             SET read_status = TRUE, read_date = CURRENT_TIMESTAMP
-            WHERE notification_id = %s AND student_id = %s
+            WHERE notification_id = %s AND student_id = %s AND read_status = FALSE
         """
-        db.execute_update(query, (notification_id, user_id,))
+        result = db.execute_update(query, (notification_id, user_id,))
+        if result['affected_rows']:
+            unread_counts.add(db, [user_id], -result['affected_rows'], ttl)
         
-        return jsonify({'success': True, 'message': 'Notification marked as read'})
+        return jsonify({
+            'success': True,
+            'message': 'Notification marked as read',
+            'unread_count': unread_counts.get(db, user_id, ttl)
+        })
 
 
 @notifications_bp.route('/api/notifications/unread-count')
 @login_required
-def get_unread_count():
-    """Get unread notification count"""
+async def get_unread_count():
+    """Get unread notification count (cached; see database/unread_counts.py)"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        query = """
-            SELECT COUNT(*) as count 
-            FROM NOTIFICATION 
-            WHERE student_id = %s AND read_status = FALSE
-        """
-        result = db.execute_query(query, (user_id,))
-        count = result[0]['count'] if result else 0
+    async with AsyncDatabaseManager(current_app.config['DB_CONFIG']) as db:
+        count = await unread_counts.get_async(db, user_id, current_app.config.get('UNREAD_COUNT_CACHE_SECONDS', 300))
         
         return jsonify({'success': True, 'count': count})
+
+
+@notifications_bp.route('/api/notifications/stream')
+@login_required
+def stream_unread_count():
+    """
+    Server-Sent Events: the unread count now, then again whenever it changes
+    Idle streams get a keepalive comment every heartbeat seconds.
+    """
+    user_id = session.get('user_id')
+    if not events.enabled():
+        return jsonify({'success': False, 'message': 'Notification stream is disabled'}), 503
+    # Subscribe before reading the count so no change in between is missed
+    subscription = events.subscribe(user_id)
+    if subscription is None:
+        # Tabs normally share one stream (static/js/main.js); the browser falls back to one fetch
+        return jsonify({'success': False, 'message': 'Too many open notification streams'}), 429
+    try:
+        with get_db() as db:
+            count = unread_counts.get(db, user_id, current_app.config.get('UNREAD_COUNT_CACHE_SECONDS', 300))
+    except Exception:
+        events.unsubscribe(subscription)
+        raise
+    heartbeat = events.heartbeat()
+    
+    def generate():
+        yield events.format_sse({'event': unread_counts.EVENT, 'data': {'count': count}})
+        while True:
+            message = subscription.get(timeout=heartbeat)
+            yield events.format_sse(message) if message else ': keepalive\n\n'
+    
+    response = Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs when the client goes away, even if the generator never started
+    response.call_on_close(lambda: events.unsubscribe(subscription))
+    return response
+
+
+@notifications_bp.route('/api/notifications/export')
+@login_required
+def export_notifications():
+    """Stream all of the user's notifications as CSV"""
+    user_id = session.get('user_id')
+    db_config = current_app.config['DB_CONFIG']
+    replicas = current_app.config.get('DB_REPLICAS')
+    columns = ['notification_id', 'notification_type', 'message', 'read_status', 'sent_date', 'related_session_id']
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        
+        # Own connection: it stays busy for as long as the client is downloading
+        with DatabaseManager(db_config, replicas=replicas) as db:
+            query = f"""
+                SELECT {', '.join(columns)}
+                FROM NOTIFICATION
+                WHERE student_id = %s
+                ORDER BY sent_date DESC
+            """
+            for row in db.iter_query(query, (user_id,), row_mode='tuple'):
+                writer.writerow(row)
+                if buffer.tell() > 8192:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        
+        yield buffer.getvalue()
+    
+    return Response(
+        generate(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=notifications.csv'}
+    )
@@ -1,10 +1,11 @@
 """Partner finder routes"""
-from flask import Blueprint, render_template, jsonify, session, request
-from database.db_manager import DatabaseManager
-from database import procedures
-from config import Config
+from flask import Blueprint, render_template, jsonify, session, request, current_app
+from database.context import get_db
+from database import (participant_counts, partner_index, procedures, reference_data, schedule_conflicts, session_search,
+                      unread_counts)
 from utils.auth_helpers import login_required
 from utils import validators
+from utils.notifications import send_notifications
 
 partners_bp = Blueprint('partners', __name__)
 
@@ -40,12 +41,19 @@ def find_partners():
     if errors:
         return jsonify({'success': False, 'message': '; '.join(errors)}), 400
     
-    # Call FindStudyPartners stored procedure
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         try:
-            partners = procedures.find_study_partners(
-                db, user_id, subject_id, date, start_time, duration
-            )
+            partners = None
+            if partner_index.enabled():
+                # Precomputed top-K list, filtered to partners free for the window
+                partners = partner_index.find_partners(
+                    db, user_id, subject_id, date, start_time, duration
+                )
+            if partners is None:
+                # Index disabled, or too few of the top-K are free for the window
+                partners = procedures.find_study_partners(
+                    db, user_id, subject_id, date, start_time, duration
+                )
             
             return jsonify({
                 'success': True,
@@ -72,7 +80,7 @@ def invite_partner():
     if not partner_id or not subject_id or not session_date or not start_time:
         return jsonify({'success': False, 'message': 'Missing required fields'}), 400
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         try:
             # Get sender and receiver info
             sender = db.execute_query(
@@ -85,12 +93,9 @@ def invite_partner():
                 (partner_id,)
             )
             
-            subject = db.execute_query(
-                "SELECT subject_name FROM SUBJECT WHERE subject_id = %s",
-                (subject_id,)
-            )
+            subject_name = reference_data.subject_name(db, subject_id)
             
-            if not sender or not partner or not subject:
+            if not sender or not partner or not subject_name:
                 return jsonify({'success': False, 'message': 'Invalid user or subject'}), 400
             
             # Calculate end time (add 1 hour by default)
@@ -99,48 +104,48 @@ def invite_partner():
             end_dt = start_dt + timedelta(hours=1)
             end_time = end_dt.strftime('%H:%M:%S')
             
-            # Create the study session first
-            session_query = """
-                INSERT INTO STUDY_SESSION 
-                (created_by, location_id, session_date, start_time, end_time, max_participants, status, description, created_date)
-                VALUES (%s, NULL, %s, %s, %s, 6, 'Planned', %s, NOW())
-            """
-            
             description = f"Study session organized by {sender[0]['name']}"
             if message:
                 description += f". {message}"
             
-            db.execute_update(session_query, (user_id, session_date, start_time, end_time, description))
-            
-            # Get the newly created session ID
-            session_id_result = db.execute_query("SELECT LAST_INSERT_ID() as session_id")
-            new_session_id = session_id_result[0]['session_id']
-            
-            # Link the subject to the session
-            db.execute_update(
-                "INSERT INTO SESSION_SUBJECT (session_id, subject_id) VALUES (%s, %s)",
-                (new_session_id, subject_id)
-            )
-            
-            # Add the creator as a participant
-            db.execute_update(
-                "INSERT INTO SESSION_PARTICIPANT (session_id, student_id, role, join_date, attendance_status) VALUES (%s, %s, 'Organizer', NOW(), 'Registered')",
-                (new_session_id, user_id)
-            )
-            
             # Create notification message with link to the session
-            notification_message = f"{sender[0]['name']} invited you to study {subject[0]['subject_name']} on {session_date} at {start_time}"
+            notification_message = f"{sender[0]['name']} invited you to study {subject_name} on {session_date} at {start_time}"
             if message:
                 notification_message += f". Message: {message}"
             
-            # Insert notification with the session ID
-            insert_query = """
-                INSERT INTO NOTIFICATION 
-                (student_id, notification_type, message, sent_date, read_status, related_session_id)
-                VALUES (%s, 'Session Invite', %s, NOW(), 0, %s)
-            """
-            
-            db.execute_update(insert_query, (partner_id, notification_message, new_session_id))
+            # Session, subject link, organizer and invite are committed together
+            with db.transaction():
+                # Create the study session first
+                session_query = """
+                    INSERT INTO STUDY_SESSION 
+                    (created_by, location_id, session_date, start_time, end_time, max_participants, status, description, created_date)
+                    VALUES (%s, NULL, %s, %s, %s, 6, 'Planned', %s, NOW())
+                """
+                result = db.execute_update(session_query, (user_id, session_date, start_time, end_time, description))
+                new_session_id = result['last_id']
+                
+                # Link the subject to the session
+                db.execute_update(
+                    "INSERT INTO SESSION_SUBJECT (session_id, subject_id) VALUES (%s, %s)",
+                    (new_session_id, subject_id)
+                )
+                
+                # Add the creator as a participant
+                db.execute_update(
+                    "INSERT INTO SESSION_PARTICIPANT (session_id, student_id, role, join_date, attendance_status) VALUES (%s, %s, 'Organizer', NOW(), 'Registered')",
+                    (new_session_id, user_id)
+                )
+                participant_counts.adjust(db, new_session_id, 1)
+                
+                # Insert notification with the session ID
+                sent = send_notifications(db, [partner_id], 'Session Invite', notification_message, new_session_id)
+            
+            session_search.refresh_session(db, new_session_id)
+            schedule_conflicts.invalidate_student(user_id)
+            # The invitation shows on the partner's dashboard
+            db.affects_users([partner_id])
+            # Counted only now that the invite has committed
+            unread_counts.add(db, [partner_id], sent, current_app.config.get('UNREAD_COUNT_CACHE_SECONDS', 300))
             
             return jsonify({
                 'success': True,
@@ -1,7 +1,7 @@
 """Profile routes - View and edit user profiles"""
-from flask import Blueprint, render_template, request, jsonify, session
-from database.db_manager import DatabaseManager
-from config import Config
+from flask import Blueprint, current_app, render_template, request, jsonify, session
+from database.context import get_db
+from database import compatibility_worker, pair_compatibility
 from utils import validators
 from utils.auth_helpers import login_required
 
@@ -37,7 +37,7 @@ def get_current_profile():
     """Get current user's profile for editing"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT 
                 student_id,
@@ -68,7 +68,7 @@ def get_profile(user_id):
     """Get user profile data"""
     current_user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT 
                 student_id,
@@ -125,9 +125,9 @@ def get_profile(user_id):
         # Calculate compatibility score if viewing another user
         if user_id != current_user_id:
             try:
-                compatibility_query = "SELECT CALCULATE_COMPATIBILITY(%s, %s) as compatibility"
-                comp_result = db.execute_query(compatibility_query, (current_user_id, user_id))
-                user_data['compatibility_score'] = comp_result[0]['compatibility'] if comp_result else 0
+                user_data['compatibility_score'] = pair_compatibility.score(
+                    db, current_user_id, user_id, current_app.config.get('COMPATIBILITY_CACHE_SECONDS', 600)
+                )
             except Exception as e:
                 print(f'Compatibility calculation error: {e}')
                 user_data['compatibility_score'] = 0
@@ -135,6 +135,28 @@ def get_profile(user_id):
         return jsonify({'success': True, 'data': user_data})
 
 
+@profile_bp.route('/api/profile/compatibility')
+@login_required
+def get_compatibility_scores():
+    """
+    Current user's compatibility with several students
+    ?ids=3,8,15 returns {"3": 0.72, ...} from one cached lookup
+    """
+    user_id = session.get('user_id')
+    try:
+        other_ids = [int(other_id) for other_id in request.args.get('ids', '').split(',') if other_id.strip()]
+    except ValueError:
+        return jsonify({'success': False, 'message': 'ids must be comma-separated student ids'}), 400
+    if len(other_ids) > 200:
+        return jsonify({'success': False, 'message': 'At most 200 ids per request'}), 400
+    
+    with get_db() as db:
+        scores = pair_compatibility.scores(
+            db, user_id, other_ids, current_app.config.get('COMPATIBILITY_CACHE_SECONDS', 600)
+        )
+    return jsonify({'success': True, 'data': scores})
+
+
 @profile_bp.route('/api/profile', methods=['PUT'])
 @login_required
 def update_profile():
@@ -142,7 +164,7 @@ def update_profile():
     user_id = session.get('user_id')
     data = request.get_json()
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Extract and validate data
         name = data.get('name')
         phone = data.get('phone')
@@ -209,6 +231,10 @@ def update_profile():
             update_query = f"UPDATE STUDENT SET {', '.join(update_fields)} WHERE student_id = %s"
             db.execute_update(update_query, tuple(params))
             
+            # Name and phone don't affect compatibility
+            if any(value is not None for value in (major, year, gpa, learning_style, personality_type, needs_help, can_teach)):
+                compatibility_worker.mark_dirty(db, user_id)
+            
             # Update session name if name changed
             if name:
                 session['user_name'] = validators.sanitize_input(name, max_length=100)
@@ -229,7 +255,7 @@ def get_availability():
     """Get user's availability schedule"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT 
                 day_of_week,
@@ -270,20 +296,16 @@ def add_availability():
     if not validators.validate_time_range(start_time, end_time):
         return jsonify({'success': False, 'message': 'End time must be after start time'}), 400
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Check for overlapping slots
         overlap_query = """
             SELECT COUNT(*) as count
             FROM AVAILABILITY
             WHERE student_id = %s 
             AND day_of_week = %s
-            AND (
-                (start_time <= %s AND end_time > %s) OR
-                (start_time < %s AND end_time >= %s) OR
-                (start_time >= %s AND end_time <= %s)
-            )
+            AND start_time < %s AND end_time > %s
         """
-        overlap = db.execute_query(overlap_query, (user_id, day_of_week, start_time, start_time, end_time, end_time, start_time, end_time))
+        overlap = db.execute_query(overlap_query, (user_id, day_of_week, end_time, start_time))
         
         if overlap and overlap[0]['count'] > 0:
             return jsonify({'success': False, 'message': 'This time slot overlaps with existing availability'}), 400
@@ -311,7 +333,7 @@ def delete_availability():
     if not day_of_week or not start_time:
         return jsonify({'success': False, 'message': 'Day and start time are required'}), 400
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         delete_query = """
             DELETE FROM AVAILABILITY
             WHERE student_id = %s AND day_of_week = %s AND start_time = %s
@@ -1,10 +1,11 @@
 """Session management routes"""
-from flask import Blueprint, render_template, jsonify, session, request
-from database.db_manager import DatabaseManager
-from database import procedures
-from config import Config
+from flask import Blueprint, render_template, jsonify, session, request, current_app
+from database.context import get_db
+from database import (availability, participant_counts, procedures, reference_data, room_index, schedule_conflicts,
+                      session_queries, session_search, student_stats, unread_counts)
 from utils.auth_helpers import login_required
 from utils import validators
+from utils.cache import cached_json_response
 
 sessions_bp = Blueprint('sessions', __name__)
 
@@ -44,7 +45,7 @@ def get_my_sessions():
     user_id = session.get('user_id')
     status_filter = request.args.get('status', '')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT 
                 ss.session_id,
@@ -60,7 +61,7 @@ def get_my_sessions():
                 l.building,
                 l.room_number,
                 sp.role,
-                COUNT(DISTINCT sp2.student_id) as participant_count,
+                ss.participant_count,
                 (SELECT COUNT(*) FROM SESSION_OUTCOME so 
                  WHERE so.session_id = ss.session_id AND so.student_id = %s) as has_feedback
             FROM SESSION_PARTICIPANT sp
@@ -68,7 +69,6 @@ def get_my_sessions():
             JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
             JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
             LEFT JOIN LOCATION l ON ss.location_id = l.location_id
-            LEFT JOIN SESSION_PARTICIPANT sp2 ON ss.session_id = sp2.session_id
             WHERE sp.student_id = %s
         """
         
@@ -80,12 +80,7 @@ def get_my_sessions():
             query += f" AND ss.status IN ({placeholders})"
             params.extend(statuses)
         
-        query += """
-            GROUP BY ss.session_id, ss.session_date, ss.start_time, ss.end_time, 
-                     ss.status, ss.description, ss.max_participants, ss.created_by,
-                     sub.subject_name, sub.subject_code, l.building, l.room_number, sp.role
-            ORDER BY ss.session_date DESC, ss.start_time DESC
-        """
+        query += " ORDER BY ss.session_date DESC, ss.start_time DESC"
         
         sessions = db.execute_query(query, tuple(params))
         
@@ -97,66 +92,95 @@ def get_my_sessions():
 @sessions_bp.route('/api/sessions')
 @login_required
 def get_sessions():
-    """Get all sessions with optional filters"""
+    """
+    Get one page of sessions with optional filters
+    Pass the returned next_cursor as ?cursor= to fetch the following page;
+    total (capped at TOTAL_COUNT_CAP) is only computed for the first page.
+    With ?search= results are ranked by relevance (see database/session_search.py).
+    """
     subject_id = request.args.get('subject_id')
     status = request.args.get('status')
     date = request.args.get('date')
-    search = request.args.get('search', '')
+    search = request.args.get('search', '').strip()
+    cursor = request.args.get('cursor')
+    page_size = request.args.get('page_size', type=int, default=session_queries.DEFAULT_PAGE_SIZE)
+    page_size = max(1, min(page_size, session_queries.MAX_PAGE_SIZE))
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        query = """
-            SELECT 
-                ss.session_id,
-                ss.session_date,
-                ss.start_time,
-                ss.end_time,
-                ss.status,
-                ss.description,
-                ss.max_participants,
-                sub.subject_name,
-                sub.subject_code,
-                l.building,
-                l.room_number,
-                s.name as creator_name,
-                COUNT(sp.student_id) as participant_count
-            FROM STUDY_SESSION ss
-            JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
-            JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
-            LEFT JOIN LOCATION l ON ss.location_id = l.location_id
-            JOIN STUDENT s ON ss.created_by = s.student_id
-            LEFT JOIN SESSION_PARTICIPANT sp ON ss.session_id = sp.session_id
-            WHERE ss.status != 'Cancelled'
-        """
-        params = []
-        
-        if subject_id:
-            query += " AND sub.subject_id = %s"
-            params.append(subject_id)
-        
-        if status:
-            query += " AND ss.status = %s"
-            params.append(status)
-        
-        if date:
-            query += " AND ss.session_date = %s"
-            params.append(date)
-        
-        if search:
-            query += " AND (ss.description LIKE %s OR sub.subject_name LIKE %s OR s.name LIKE %s)"
-            search_pattern = f"%{search}%"
-            params.extend([search_pattern, search_pattern, search_pattern])
-        
-        query += """
-            GROUP BY ss.session_id, ss.session_date, ss.start_time, ss.end_time, 
-                     ss.status, ss.description, ss.max_participants, sub.subject_name, 
-                     sub.subject_code, l.building, l.room_number, s.name
-            ORDER BY ss.session_date ASC, ss.start_time ASC
-            LIMIT 50
-        """
+    if search:
+        return _search_sessions(search, subject_id, status, date, cursor, page_size)
+    
+    after = None
+    if cursor:
+        try:
+            after = session_queries.decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    
+    filters = session_queries.build_filters(subject_id, status, date)
+    
+    with get_db() as db:
+        query, params = session_queries.build_page_query(filters, after, page_size)
+        sessions = db.execute_query(query, params)
         
-        sessions = db.execute_query(query, tuple(params))
+        has_more = len(sessions) > page_size
+        sessions = sessions[:page_size]
         
-        return jsonify({'success': True, 'data': sessions})
+        response = {
+            'success': True,
+            'data': sessions,
+            'has_more': has_more,
+            'next_cursor': session_queries.encode_cursor(sessions[-1]) if has_more else None
+        }
+        
+        if after is None:
+            if has_more:
+                count_query, count_params = session_queries.build_count_query(filters)
+                total = db.execute_query(count_query, count_params)[0]['total']
+            else:
+                total = len(sessions)
+            response['total'] = total
+            response['total_capped'] = total >= session_queries.TOTAL_COUNT_CAP
+        
+        return jsonify(response)
+
+
+def _search_sessions(search, subject_id, status, date, cursor, page_size):
+    """
+    Ranked search results for get_sessions, paged by offset into the ranking
+    The index only ranks: MySQL re-applies the filters to each page, so a
+    page can come back short when sessions changed since the index was built.
+    """
+    offset = 0
+    if cursor:
+        try:
+            offset = session_queries.decode_offset_cursor(cursor)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    
+    with get_db() as db:
+        ranked = session_search.search_sessions(db, search, subject_id, status, date)
+        page_ids = ranked[offset:offset + page_size]
+        
+        sessions = []
+        if page_ids:
+            query, params = session_queries.build_ids_query(
+                page_ids, session_queries.build_filters(subject_id, status, date)
+            )
+            rows = {row['session_id']: row for row in db.execute_query(query, params)}
+            sessions = [rows[session_id] for session_id in page_ids if session_id in rows]
+        
+        has_more = offset + page_size < len(ranked)
+        response = {
+            'success': True,
+            'data': sessions,
+            'has_more': has_more,
+            'next_cursor': session_queries.encode_offset_cursor(offset + page_size) if has_more else None
+        }
+        if not cursor:
+            response['total'] = len(ranked)
+            response['total_capped'] = len(ranked) >= session_search.max_results()
+        
+        return jsonify(response)
 
 
 @sessions_bp.route('/api/sessions/<int:session_id>')
@@ -165,7 +189,7 @@ def get_session_detail(session_id):
     """Get detailed session information"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Get session details
         query_session = """
             SELECT 
@@ -189,19 +213,13 @@ def get_session_detail(session_id):
                 s.major as creator_major,
                 s.year as creator_year,
                 s.gpa as creator_gpa,
-                COUNT(sp.student_id) as participant_count
+                ss.participant_count
             FROM STUDY_SESSION ss
             JOIN SESSION_SUBJECT ssub ON ss.session_id = ssub.session_id
             JOIN SUBJECT sub ON ssub.subject_id = sub.subject_id
             LEFT JOIN LOCATION l ON ss.location_id = l.location_id
             JOIN STUDENT s ON ss.created_by = s.student_id
-            LEFT JOIN SESSION_PARTICIPANT sp ON ss.session_id = sp.session_id
             WHERE ss.session_id = %s
-            GROUP BY ss.session_id, ss.created_by, ss.location_id, ss.session_date, 
-                     ss.start_time, ss.end_time, ss.max_participants, ss.status, 
-                     ss.description, ss.created_date, sub.subject_name, sub.subject_code, 
-                     l.building, l.room_number, l.capacity, s.student_id, s.name, 
-                     s.major, s.year, s.gpa
         """
         session_result = db.execute_query(query_session, (session_id,))
         
@@ -278,7 +296,15 @@ def create_session():
         return jsonify({'success': False, 'message': '; '.join(errors)}), 400
     
     # Call CreateStudySession stored procedure
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
+        conflicts = schedule_conflicts.conflicts(db, user_id, date, start_time, end_time, fresh=True)
+        if conflicts and not data.get('allow_conflicts'):
+            return jsonify({
+                'success': False,
+                'message': 'This time overlaps with sessions you have joined',
+                'conflicts': conflicts
+            }), 409
+        
         try:
             new_session_id = procedures.create_study_session(
                 db, user_id, subject_id, date, start_time, end_time, 
@@ -290,10 +316,15 @@ def create_session():
                 update_query = "UPDATE STUDY_SESSION SET location_id = %s WHERE session_id = %s"
                 db.execute_update(update_query, (location_id, new_session_id))
             
+            session_search.refresh_session(db, new_session_id)
+            room_index.refresh_session(db, new_session_id)
+            schedule_conflicts.invalidate_student(user_id)
+            
             return jsonify({
                 'success': True, 
                 'message': 'Session created successfully',
-                'data': {'session_id': new_session_id}
+                'data': {'session_id': new_session_id},
+                'conflicts': conflicts
             })
         except Exception as e:
             print(f"ERROR creating session: {str(e)}")
@@ -302,6 +333,91 @@ def create_session():
             return jsonify({'success': False, 'message': f'Failed to create session: {str(e)}'}), 500
 
 
+@sessions_bp.route('/api/sessions/suggest-times', methods=['POST'])
+@login_required
+def suggest_times():
+    """
+    Upcoming times when the current user and invitees are free (AVAILABILITY)
+    {"invitees": [ids], "duration": hours} ranks times by how many can come
+    (see database/availability.py); {"groups": [[ids], ...]} instead ranks
+    candidate groups by how many times suit all of them, with the soonest.
+    Every id must be a classmate or session partner of the user (else 403).
+    """
+    user_id = session.get('user_id')
+    data = request.get_json() or {}
+    
+    try:
+        duration = float(data.get('duration', 2))
+        limit = int(data.get('limit', 5))
+        invitees = [int(student_id) for student_id in data.get('invitees', [])]
+        groups = [[int(student_id) for student_id in group] for group in data.get('groups', [])]
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'invitees and groups must be lists of student ids'}), 400
+    
+    errors = []
+    if not 0.25 <= duration <= 12:
+        errors.append('Duration must be between 0.25 and 12 hours')
+    if not 1 <= limit <= 20:
+        errors.append('Limit must be between 1 and 20')
+    if len(invitees) > 50:
+        errors.append('At most 50 invitees')
+    if len(groups) > 500 or any(len(group) > 20 for group in groups):
+        errors.append('At most 500 groups of up to 20 students')
+    if not invitees and not groups:
+        errors.append('Invitees or groups are required')
+    if errors:
+        return jsonify({'success': False, 'message': '; '.join(errors)}), 400
+    
+    length = -(-int(duration * 60) // availability.SLOT_MINUTES)
+    groups = [[user_id] + [student_id for student_id in group if student_id != user_id] for group in groups]
+    
+    requested = {student_id for student_id in invitees + [s for group in groups for s in group]} - {user_id}
+    with get_db() as db:
+        # Only classmates' and session partners' free time may be looked at
+        hidden = sorted(requested - availability.visible_to(db, user_id, requested))
+        if hidden:
+            return jsonify({
+                'success': False,
+                'message': 'Times can only be planned with classmates and session partners',
+                'students': hidden
+            }), 403
+        masks = availability.load(db, [user_id, *requested])
+    
+    if groups:
+        return jsonify({'success': True, 'data': {'groups': availability.rank_groups(masks, groups, length)[:limit]}})
+    
+    members = {student_id: masks[student_id] for student_id in [user_id, *invitees]}
+    return jsonify({'success': True, 'data': {'suggestions': availability.suggest(members, length, limit)}})
+
+
+@sessions_bp.route('/api/sessions/validate', methods=['POST'])
+@login_required
+def validate_sessions():
+    """
+    Check proposed sessions for overlaps before creating them
+    {"sessions": [{"date", "start_time", "end_time", "session_id"?}, ...]} returns,
+    per proposal, the user's sessions it overlaps and the other proposals it overlaps
+    """
+    user_id = session.get('user_id')
+    proposals = (request.get_json(silent=True) or {}).get('sessions')
+    
+    if not isinstance(proposals, list) or not all(isinstance(proposal, dict) for proposal in proposals):
+        return jsonify({'success': False, 'message': 'sessions must be a list of objects'}), 400
+    if len(proposals) > 100:
+        return jsonify({'success': False, 'message': 'At most 100 sessions per request'}), 400
+    
+    with get_db() as db:
+        results = schedule_conflicts.validate(
+            db, user_id, proposals, current_app.config.get('SCHEDULE_CACHE_SECONDS', 30)
+        )
+    
+    return jsonify({
+        'success': True,
+        'data': results,
+        'valid': not any(result['conflicts'] or result['proposals'] for result in results)
+    })
+
+
 @sessions_bp.route('/sessions/<int:session_id>/edit', methods=['GET'])
 @login_required
 def edit_session_page(session_id):
@@ -316,9 +432,9 @@ def update_session(session_id):
     user_id = session.get('user_id')
     data = request.get_json()
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Check if user is the creator
-        check_query = "SELECT created_by, session_date, start_time, status FROM STUDY_SESSION WHERE session_id = %s"
+        check_query = "SELECT created_by, session_date, start_time, end_time, status FROM STUDY_SESSION WHERE session_id = %s"
         result = db.execute_query(check_query, (session_id,))
         
         if not result:
@@ -362,6 +478,20 @@ def update_session(session_id):
         # Sanitize description
         description = validators.sanitize_input(description, max_length=1000)
         
+        conflicts = []
+        if date or start_time or end_time:
+            # Everyone in the session moves with it, not just the organizer
+            conflicts = schedule_conflicts.participant_conflicts(
+                db, session_id, date or result[0]['session_date'], start_time or result[0]['start_time'],
+                end_time or result[0]['end_time']
+            )
+            if conflicts and not data.get('allow_conflicts'):
+                return jsonify({
+                    'success': False,
+                    'message': 'The new time overlaps with sessions that participants have joined',
+                    'conflicts': conflicts
+                }), 409
+        
         # Update session
         try:
             update_fields = []
@@ -386,19 +516,30 @@ def update_session(session_id):
                 update_fields.append("location_id = %s")
                 params.append(location_id if location_id else None)
             
-            if update_fields:
-                params.append(session_id)
-                update_query = f"UPDATE STUDY_SESSION SET {', '.join(update_fields)} WHERE session_id = %s"
-                db.execute_update(update_query, tuple(params))
+            params.append(session_id)
             
-            # Update subject if provided
-            if subject_id:
-                update_subject_query = "UPDATE SESSION_SUBJECT SET subject_id = %s WHERE session_id = %s"
-                db.execute_update(update_subject_query, (subject_id, session_id))
+            def apply_updates(db):
+                if update_fields:
+                    update_query = f"UPDATE STUDY_SESSION SET {', '.join(update_fields)} WHERE session_id = %s"
+                    db.execute_update(update_query, tuple(params))
+                
+                # Update subject if provided
+                if subject_id:
+                    update_subject_query = "UPDATE SESSION_SUBJECT SET subject_id = %s WHERE session_id = %s"
+                    db.execute_update(update_subject_query, (subject_id, session_id))
+            
+            # Both updates commit together; re-run as a whole on deadlock
+            db.retry_transaction(apply_updates)
+            session_search.refresh_session(db, session_id)
+            room_index.refresh_session(db, session_id)
+            db.affects_users(schedule_conflicts.invalidate_session(db, session_id))
+            # Update triggers notify the participants
+            unread_counts.refresh_session(db, session_id, current_app.config.get('UNREAD_COUNT_CACHE_SECONDS', 300))
             
             return jsonify({
                 'success': True,
-                'message': 'Session updated successfully'
+                'message': 'Session updated successfully',
+                'conflicts': conflicts
             })
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)}), 500
@@ -407,17 +548,31 @@ def update_session(session_id):
 @sessions_bp.route('/api/sessions/<int:session_id>/join', methods=['POST'])
 @login_required
 def join_session(session_id):
-    """Join a study session"""
+    """Join a study session (refused with 409 if it overlaps the user's sessions, unless allow_conflicts)"""
     user_id = session.get('user_id')
+    data = request.get_json(silent=True) or {}
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
+        conflicts = schedule_conflicts.session_conflicts(db, user_id, session_id, fresh=True)
+        if conflicts and not data.get('allow_conflicts'):
+            return jsonify({
+                'success': False,
+                'message': 'This session overlaps with sessions you have joined',
+                'conflicts': conflicts
+            }), 409
+        
         try:
             # Call JoinStudySession stored procedure
             procedures.join_study_session(db, session_id, user_id)
+            schedule_conflicts.invalidate_student(user_id)
+            db.affects_session(session_id)
+            # The join trigger notifies the session's participants
+            unread_counts.refresh_session(db, session_id, current_app.config.get('UNREAD_COUNT_CACHE_SECONDS', 300))
             
             return jsonify({
                 'success': True, 
-                'message': 'Successfully joined session'
+                'message': 'Successfully joined session',
+                'conflicts': conflicts
             })
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)}), 500
@@ -429,7 +584,7 @@ def leave_session(session_id):
     """Leave a study session"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Check if user is creator
         query_check = "SELECT created_by FROM STUDY_SESSION WHERE session_id = %s"
         result = db.execute_query(query_check, (session_id,))
@@ -438,11 +593,9 @@ def leave_session(session_id):
             return jsonify({'success': False, 'message': 'Creator cannot leave session. Cancel it instead.'}), 400
         
         # Remove from session
-        query_delete = """
-            DELETE FROM SESSION_PARTICIPANT 
-            WHERE session_id = %s AND student_id = %s
-        """
-        db.execute_update(query_delete, (session_id, user_id))
+        participant_counts.remove_participant(db, session_id, user_id)
+        schedule_conflicts.invalidate_student(user_id)
+        db.affects_session(session_id)
         
         return jsonify({'success': True, 'message': 'Successfully left session'})
 
@@ -454,7 +607,7 @@ def submit_feedback(session_id):
     user_id = session.get('user_id')
     data = request.get_json()
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Check if user was a participant
         check_participant = """
             SELECT sp.student_id FROM SESSION_PARTICIPANT sp
@@ -498,7 +651,9 @@ def submit_feedback(session_id):
                 (session_id, student_id, effectiveness_rating, learning_improvement, would_repeat, outcome_type, comments)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
-            db.execute_update(insert_query, (session_id, user_id, effectiveness_rating, learning_improvement, would_repeat, outcome_type, comments))
+            with db.transaction():
+                db.execute_update(insert_query, (session_id, user_id, effectiveness_rating, learning_improvement, would_repeat, outcome_type, comments))
+                student_stats.record_feedback(db, session_id, effectiveness_rating)
             
             return jsonify({
                 'success': True,
@@ -514,7 +669,7 @@ def cancel_session(session_id):
     """Cancel a study session (creator only)"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Check if user is creator
         query_check = "SELECT created_by FROM STUDY_SESSION WHERE session_id = %s"
         result = db.execute_query(query_check, (session_id,))
@@ -525,6 +680,11 @@ def cancel_session(session_id):
         # Update status to Cancelled
         query_update = "UPDATE STUDY_SESSION SET status = 'Cancelled' WHERE session_id = %s"
         db.execute_update(query_update, (session_id,))
+        session_search.remove_session(session_id)
+        room_index.remove_session(session_id)
+        db.affects_users(schedule_conflicts.invalidate_session(db, session_id))
+        # notifyonsessioncancel notifies every participant
+        unread_counts.refresh_session(db, session_id, current_app.config.get('UNREAD_COUNT_CACHE_SECONDS', 300))
         
         return jsonify({'success': True, 'message': 'Session cancelled successfully'})
 
@@ -535,7 +695,7 @@ def remove_participant(session_id, student_id):
     """Remove a participant from a session (organizer only)"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         # Check if current user is the session creator/organizer
         query_check = "SELECT created_by FROM STUDY_SESSION WHERE session_id = %s"
         result = db.execute_query(query_check, (session_id,))
@@ -562,11 +722,10 @@ def remove_participant(session_id, student_id):
             return jsonify({'success': False, 'message': 'Cannot remove organizer'}), 400
         
         # Remove participant
-        query_delete = """
-            DELETE FROM SESSION_PARTICIPANT 
-            WHERE session_id = %s AND student_id = %s
-        """
-        db.execute_update(query_delete, (session_id, student_id))
+        participant_counts.remove_participant(db, session_id, student_id)
+        schedule_conflicts.invalidate_student(student_id)
+        db.affects_users([student_id])
+        db.affects_session(session_id)
         
         return jsonify({'success': True, 'message': 'Participant removed successfully'})
 
@@ -574,23 +733,17 @@ def remove_participant(session_id, student_id):
 @sessions_bp.route('/api/subjects')
 @login_required
 def get_subjects():
-    """Get all subjects for dropdown"""
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        query = "SELECT subject_id, subject_name, subject_code FROM SUBJECT ORDER BY subject_name"
-        subjects = db.execute_query(query)
-        
-        return jsonify({'success': True, 'data': subjects})
+    """Get all subjects for dropdown (cached, see database/reference_data.py)"""
+    with get_db() as db:
+        return cached_json_response(reference_data.subjects(db))
 
 
 @sessions_bp.route('/api/locations')
 @login_required
 def get_locations():
-    """Get all locations for dropdown"""
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        query = "SELECT location_id, building, room_number, capacity FROM LOCATION ORDER BY building, room_number"
-        locations = db.execute_query(query)
-        
-        return jsonify({'success': True, 'data': locations})
+    """Get all locations for dropdown (cached, see database/reference_data.py)"""
+    with get_db() as db:
+        return cached_json_response(reference_data.locations(db))
 
 
 @sessions_bp.route('/api/locations/recommend')
@@ -602,33 +755,12 @@ def recommend_location():
     start_time = request.args.get('start_time')
     end_time = request.args.get('end_time')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
-        # Find available locations with sufficient capacity
-        query = """
-            SELECT 
-                l.location_id,
-                l.building,
-                l.room_number,
-                l.capacity,
-                COUNT(ss.session_id) as usage_count
-            FROM LOCATION l
-            LEFT JOIN STUDY_SESSION ss ON l.location_id = ss.location_id
-                AND ss.session_date = %s
-                AND ss.status IN ('Planned', 'Active')
-                AND (
-                    (ss.start_time < %s AND ss.end_time > %s) OR
-                    (ss.start_time < %s AND ss.end_time > %s) OR
-                    (ss.start_time >= %s AND ss.end_time <= %s)
-                )
-            WHERE l.capacity >= %s
-            GROUP BY l.location_id, l.building, l.room_number, l.capacity
-            HAVING COUNT(ss.session_id) = 0
-            ORDER BY l.capacity ASC
-            LIMIT 5
-        """
-        
-        params = (session_date, end_time, start_time, end_time, end_time, start_time, end_time, max_participants)
-        recommended = db.execute_query(query, params)
+    with get_db() as db:
+        # Find available locations with sufficient capacity (see database/room_index.py)
+        if room_index.enabled():
+            recommended = room_index.recommend(db, max_participants, session_date, start_time, end_time)
+        else:
+            recommended = room_index.recommend_sql(db, max_participants, session_date, start_time, end_time)
         
         if not recommended:
             # If no location available, return all locations with sufficient capacity
@@ -1,7 +1,7 @@
 """Subject management routes"""
 from flask import Blueprint, render_template, jsonify, session, request
-from database.db_manager import DatabaseManager
-from config import Config
+from database.context import get_db
+from database import compatibility_worker
 from utils.auth_helpers import login_required
 
 subjects_bp = Blueprint('subjects', __name__)
@@ -20,7 +20,7 @@ def get_user_subjects():
     """Get all subjects for current user"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT 
                 ss.subject_id,
@@ -48,7 +48,7 @@ def get_available_subjects():
     """Get subjects not yet enrolled by user"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         query = """
             SELECT 
                 s.subject_id,
@@ -89,7 +89,7 @@ def add_subject():
     if proficiency_level not in ['Beginner', 'Intermediate', 'Advanced', 'Expert']:
         return jsonify({'success': False, 'message': 'Invalid proficiency level'}), 400
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         try:
             # Check if already enrolled
             check_query = "SELECT 1 FROM STUDENT_SUBJECT WHERE student_id = %s AND subject_id = %s"
@@ -105,6 +105,7 @@ def add_subject():
                 VALUES (%s, %s, %s, %s, %s, %s, CURDATE())
             """
             db.execute_update(insert_query, (user_id, subject_id, proficiency_level, can_teach, needs_help, current_grade))
+            compatibility_worker.mark_dirty(db, user_id)
             
             return jsonify({'success': True, 'message': 'Subject added successfully'})
             
@@ -128,7 +129,7 @@ def update_subject(subject_id):
     if proficiency_level and proficiency_level not in ['Beginner', 'Intermediate', 'Advanced', 'Expert']:
         return jsonify({'success': False, 'message': 'Invalid proficiency level'}), 400
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         try:
             # Build update query dynamically
             updates = []
@@ -163,6 +164,7 @@ def update_subject(subject_id):
             """
             
             db.execute_update(update_query, tuple(params))
+            compatibility_worker.mark_dirty(db, user_id)
             
             return jsonify({'success': True, 'message': 'Subject updated successfully'})
             
@@ -176,13 +178,14 @@ def remove_subject(subject_id):
     """Remove a subject from user's enrollment"""
     user_id = session.get('user_id')
     
-    with DatabaseManager(Config.DB_CONFIG) as db:
+    with get_db() as db:
         try:
             delete_query = """
                 DELETE FROM STUDENT_SUBJECT 
                 WHERE student_id = %s AND subject_id = %s
             """
             db.execute_update(delete_query, (user_id, subject_id))
+            compatibility_worker.mark_dirty(db, user_id)
             
             return jsonify({'success': True, 'message': 'Subject removed successfully'})
             
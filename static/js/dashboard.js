@@ -6,96 +6,97 @@ document.addEventListener('DOMContentLoaded', async () => {
     await loadDashboardData();
 });
 
+// Dashboard sections and the function that renders each one
+const DASHBOARD_SECTIONS = {
+    stats: renderStats,
+    invitations: renderInvitations,
+    upcoming: renderUpcomingSessions,
+    notifications: renderNotifications
+};
+
 /**
- * Load all dashboard data
+ * Load dashboard data in one request
+ * @param {string[]} sections - Sections to refresh (default: all)
  */
-async function loadDashboardData() {
-    await Promise.all([
-        loadStats(),
-        loadInvitations(),
-        loadUpcomingSessions(),
-        loadNotifications()
-    ]);
+async function loadDashboardData(sections = Object.keys(DASHBOARD_SECTIONS)) {
+    try {
+        const data = await apiCall(`/dashboard/summary?sections=${sections.join(',')}`);
+        
+        sections.forEach(section => DASHBOARD_SECTIONS[section](data.data[section]));
+    } catch (error) {
+        console.error('Failed to load dashboard:', error);
+        sections.forEach(section => DASHBOARD_SECTIONS[section](null));
+    }
     
     // Refresh icons after content loads
     feather.replace();
 }
 
 /**
- * Load quick stats
+ * Render quick stats
  */
-async function loadStats() {
-    try {
-        const data = await apiCall('/dashboard/stats');
-        
-        document.getElementById('stat-total').textContent = data.data.total_sessions;
-        document.getElementById('stat-upcoming').textContent = data.data.upcoming_sessions;
-        document.getElementById('stat-rating').textContent = data.data.avg_effectiveness.toFixed(1) + '/5.0';
-    } catch (error) {
-        console.error('Failed to load stats:', error);
-    }
+function renderStats(stats) {
+    if (!stats) return;
+    
+    document.getElementById('stat-total').textContent = stats.total_sessions;
+    document.getElementById('stat-upcoming').textContent = stats.upcoming_sessions;
+    document.getElementById('stat-rating').textContent = stats.avg_effectiveness.toFixed(1) + '/5.0';
 }
 
 /**
- * Load pending invitations
+ * Render pending invitations
  */
-async function loadInvitations() {
+function renderInvitations(invitations) {
     const container = document.getElementById('invitations-container');
     const countEl = document.getElementById('invitations-count');
     
-    try {
-        const data = await apiCall('/dashboard/invitations');
-        
-        countEl.textContent = `${data.data.length} invite(s)`;
-        
-        if (data.data.length === 0) {
-            container.innerHTML = `
-                <div class="text-center py-8 text-gray-500">
-                    <i data-feather="inbox" class="mx-auto mb-2"></i>
-                    <p>No pending invitations</p>
-                </div>
-            `;
-            return;
-        }
-        
-        const invitationsHTML = data.data.map(invite => `
-            <div class="border border-gray-200 rounded-lg p-4 hover:border-teal-500 transition duration-200">
-                <div class="flex items-start justify-between mb-3">
-                    <div class="flex-1">
-                        <h3 class="font-semibold text-gray-900">${invite.subject_name}</h3>
-                        <p class="text-sm text-gray-600 mt-1">
-                            <i data-feather="calendar" class="inline w-4 h-4"></i>
-                            ${formatDate(invite.session_date)} at ${formatTime(invite.start_time)}
-                        </p>
-                        <p class="text-sm text-gray-600 mt-1">
-                            <i data-feather="map-pin" class="inline w-4 h-4"></i>
-                            ${invite.building || 'TBD'} ${invite.room_number || ''}
-                        </p>
-                    </div>
-                    <span class="text-xs text-gray-500">${timeAgo(invite.sent_date)}</span>
-                </div>
-                <div class="flex gap-2">
-                    <button onclick="acceptInvitation(${invite.session_id}, ${invite.notification_id})" class="flex-1 bg-teal-600 text-white px-3 py-2 rounded text-sm hover:bg-teal-700 transition duration-200">
-                        Accept
-                    </button>
-                    <button onclick="declineInvitation(${invite.notification_id})" class="flex-1 bg-gray-200 text-gray-700 px-3 py-2 rounded text-sm hover:bg-gray-300 transition duration-200">
-                        Decline
-                    </button>
-                </div>
-            </div>
-        `).join('');
-        
-        container.innerHTML = invitationsHTML;
-        feather.replace();
-        
-    } catch (error) {
-        console.error('Failed to load invitations:', error);
+    if (!invitations) {
         container.innerHTML = `
             <div class="text-center py-8 text-red-500">
                 <p>Failed to load invitations</p>
             </div>
         `;
+        return;
     }
+    
+    countEl.textContent = `${invitations.length} invite(s)`;
+    
+    if (invitations.length === 0) {
+        container.innerHTML = `
+            <div class="text-center py-8 text-gray-500">
+                <i data-feather="inbox" class="mx-auto mb-2"></i>
+                <p>No pending invitations</p>
+            </div>
+        `;
+        return;
+    }
+    
+    container.innerHTML = invitations.map(invite => `
+        <div class="border border-gray-200 rounded-lg p-4 hover:border-teal-500 transition duration-200">
+            <div class="flex items-start justify-between mb-3">
+                <div class="flex-1">
+                    <h3 class="font-semibold text-gray-900">${invite.subject_name}</h3>
+                    <p class="text-sm text-gray-600 mt-1">
+                        <i data-feather="calendar" class="inline w-4 h-4"></i>
+                        ${formatDate(invite.session_date)} at ${formatTime(invite.start_time)}
+                    </p>
+                    <p class="text-sm text-gray-600 mt-1">
+                        <i data-feather="map-pin" class="inline w-4 h-4"></i>
+                        ${invite.building || 'TBD'} ${invite.room_number || ''}
+                    </p>
+                </div>
+                <span class="text-xs text-gray-500">${timeAgo(invite.sent_date)}</span>
+            </div>
+            <div class="flex gap-2">
+                <button onclick="acceptInvitation(${invite.session_id}, ${invite.notification_id})" class="flex-1 bg-teal-600 text-white px-3 py-2 rounded text-sm hover:bg-teal-700 transition duration-200">
+                    Accept
+                </button>
+                <button onclick="declineInvitation(${invite.notification_id})" class="flex-1 bg-gray-200 text-gray-700 px-3 py-2 rounded text-sm hover:bg-gray-300 transition duration-200">
+                    Decline
+                </button>
+            </div>
+        </div>
+    `).join('');
 }
 
 /**
@@ -118,7 +119,7 @@ async function acceptInvitation(sessionId, notificationId) {
         
         // Mark notification as read
         await apiCall(`/notifications/${notificationId}/read`, 'PUT');
-        loadDashboardData(); // Reload dashboard
+        loadDashboardData(); // Joining touches every section
     } catch (error) {
         showToast(error.message || 'Failed to accept invitation', 'error');
     }
@@ -131,118 +132,106 @@ async function declineInvitation(notificationId) {
     try {
         await apiCall(`/notifications/${notificationId}/read`, 'PUT');
         showToast('Invitation declined', 'success');
-        loadDashboardData(); // Reload dashboard
+        loadDashboardData(['invitations', 'notifications']);
     } catch (error) {
         showToast(error.message || 'Failed to decline invitation', 'error');
     }
 }
 
 /**
- * Load upcoming sessions
+ * Render upcoming sessions
  */
-async function loadUpcomingSessions() {
+function renderUpcomingSessions(sessions) {
     const container = document.getElementById('upcoming-sessions-container');
     
-    try {
-        const data = await apiCall('/dashboard/upcoming');
-        
-        if (data.data.length === 0) {
-            container.innerHTML = `
-                <div class="text-center py-8 text-gray-500">
-                    <i data-feather="calendar" class="mx-auto mb-2"></i>
-                    <p>No upcoming sessions</p>
-                    <a href="/sessions/browse" class="text-teal-600 hover:text-teal-700 text-sm">Browse sessions</a>
-                </div>
-            `;
-            return;
-        }
-        
-        const sessionsHTML = data.data.map(session => `
-            <a href="/sessions/${session.session_id}" class="block border border-gray-200 rounded-lg p-4 hover:border-teal-500 hover:shadow-md transition duration-200">
-                <div class="flex items-start justify-between">
-                    <div class="flex-1">
-                        <h3 class="font-semibold text-gray-900">${session.subject_name}</h3>
-                        <p class="text-sm text-gray-600 mt-1">
-                            <i data-feather="calendar" class="inline w-4 h-4"></i>
-                            ${formatDate(session.session_date)} at ${formatTime(session.start_time)}
-                        </p>
-                        <p class="text-sm text-gray-600 mt-1">
-                            <i data-feather="map-pin" class="inline w-4 h-4"></i>
-                            ${session.building || 'TBD'} ${session.room_number || ''}
-                        </p>
-                    </div>
-                    <span class="px-3 py-1 text-xs font-medium rounded-full ${getStatusColor(session.status)}">
-                        ${session.status}
-                    </span>
-                </div>
-                <div class="mt-2 flex items-center text-sm text-gray-500">
-                    <i data-feather="users" class="inline w-4 h-4 mr-1"></i>
-                    ${session.participant_count}/${session.max_participants} participants
-                </div>
-            </a>
-        `).join('');
-        
-        container.innerHTML = sessionsHTML;
-        feather.replace();
-        
-    } catch (error) {
-        console.error('Failed to load upcoming sessions:', error);
+    if (!sessions) {
         container.innerHTML = `
             <div class="text-center py-8 text-red-500">
                 <p>Failed to load sessions</p>
             </div>
         `;
+        return;
+    }
+    
+    if (sessions.length === 0) {
+        container.innerHTML = `
+            <div class="text-center py-8 text-gray-500">
+                <i data-feather="calendar" class="mx-auto mb-2"></i>
+                <p>No upcoming sessions</p>
+                <a href="/sessions/browse" class="text-teal-600 hover:text-teal-700 text-sm">Browse sessions</a>
+            </div>
+        `;
+        return;
     }
+    
+    container.innerHTML = sessions.map(session => `
+        <a href="/sessions/${session.session_id}" class="block border border-gray-200 rounded-lg p-4 hover:border-teal-500 hover:shadow-md transition duration-200">
+            <div class="flex items-start justify-between">
+                <div class="flex-1">
+                    <h3 class="font-semibold text-gray-900">${session.subject_name}</h3>
+                    <p class="text-sm text-gray-600 mt-1">
+                        <i data-feather="calendar" class="inline w-4 h-4"></i>
+                        ${formatDate(session.session_date)} at ${formatTime(session.start_time)}
+                    </p>
+                    <p class="text-sm text-gray-600 mt-1">
+                        <i data-feather="map-pin" class="inline w-4 h-4"></i>
+                        ${session.building || 'TBD'} ${session.room_number || ''}
+                    </p>
+                </div>
+                <span class="px-3 py-1 text-xs font-medium rounded-full ${getStatusColor(session.status)}">
+                    ${session.status}
+                </span>
+            </div>
+            <div class="mt-2 flex items-center text-sm text-gray-500">
+                <i data-feather="users" class="inline w-4 h-4 mr-1"></i>
+                ${session.participant_count}/${session.max_participants} participants
+            </div>
+        </a>
+    `).join('');
 }
 
 /**
- * Load recent notifications
+ * Render recent notifications
  */
-async function loadNotifications() {
+function renderNotifications(notifications) {
     const container = document.getElementById('notifications-container');
     
-    try {
-        const data = await apiCall('/dashboard/notifications');
-        
-        if (data.data.length === 0) {
-            container.innerHTML = `
-                <div class="text-center py-8 text-gray-500">
-                    <i data-feather="bell-off" class="mx-auto mb-2"></i>
-                    <p>No notifications</p>
-                </div>
-            `;
-            return;
-        }
-        
-        const notificationsHTML = data.data.map(notification => `
-            <div class="border-l-4 ${getNotificationBorderColor(notification.notification_type)} bg-gray-50 p-3 rounded">
-                <div class="flex items-start">
-                    <div class="flex-shrink-0">
-                        <i data-feather="${getNotificationIcon(notification.notification_type)}" class="w-5 h-5 ${getNotificationIconColor(notification.notification_type)}"></i>
-                    </div>
-                    <div class="ml-3 flex-1">
-                        <p class="text-sm text-gray-900 ${notification.read_status ? '' : 'font-semibold'}">
-                            ${notification.message}
-                        </p>
-                        <p class="text-xs text-gray-500 mt-1">
-                            ${timeAgo(notification.sent_date)}
-                        </p>
-                    </div>
-                </div>
-            </div>
-        `).join('');
-        
-        container.innerHTML = notificationsHTML;
-        feather.replace();
-        
-    } catch (error) {
-        console.error('Failed to load notifications:', error);
+    if (!notifications) {
         container.innerHTML = `
             <div class="text-center py-8 text-red-500">
                 <p>Failed to load notifications</p>
             </div>
         `;
+        return;
     }
+    
+    if (notifications.length === 0) {
+        container.innerHTML = `
+            <div class="text-center py-8 text-gray-500">
+                <i data-feather="bell-off" class="mx-auto mb-2"></i>
+                <p>No notifications</p>
+            </div>
+        `;
+        return;
+    }
+    
+    container.innerHTML = notifications.map(notification => `
+        <div class="border-l-4 ${getNotificationBorderColor(notification.notification_type)} bg-gray-50 p-3 rounded">
+            <div class="flex items-start">
+                <div class="flex-shrink-0">
+                    <i data-feather="${getNotificationIcon(notification.notification_type)}" class="w-5 h-5 ${getNotificationIconColor(notification.notification_type)}"></i>
+                </div>
+                <div class="ml-3 flex-1">
+                    <p class="text-sm text-gray-900 ${notification.read_status ? '' : 'font-semibold'}">
+                        ${notification.message}
+                    </p>
+                    <p class="text-xs text-gray-500 mt-1">
+                        ${timeAgo(notification.sent_date)}
+                    </p>
+                </div>
+            </div>
+        </div>
+    `).join('');
 }
 
 /**
@@ -16,9 +16,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // Check authentication status
     checkAuth();
     
-    // Update notification count
+    // Keep the notification count live (pushed by the server)
     if (document.getElementById('notification-count')) {
-        updateNotificationCount();
+        listenForNotificationCount();
     }
 });
 
@@ -39,19 +39,93 @@ async function checkAuth() {
 }
 
 /**
- * Update notification count in navbar
+ * Show a count on the navbar notification badge
+ */
+function setNotificationCount(count) {
+    const badge = document.getElementById('notification-count');
+    
+    if (badge && count > 0) {
+        badge.textContent = count;
+        badge.classList.remove('hidden');
+    } else if (badge) {
+        badge.classList.add('hidden');
+    }
+}
+
+/**
+ * Keep the unread count live with one Server-Sent Events stream per
+ * browser: the tab holding the 'notification-stream' lock opens it and
+ * relays each count to the other tabs over a BroadcastChannel. When that
+ * tab closes, the lock (and the stream) passes to another tab.
+ */
+function listenForNotificationCount() {
+    if (!window.EventSource) {
+        updateNotificationCount();
+        return;
+    }
+    if (!window.BroadcastChannel || !(navigator.locks && navigator.locks.request)) {
+        openNotificationStream(setNotificationCount);
+        return;
+    }
+    
+    const channel = new BroadcastChannel('notification-count');
+    let leading = false;
+    let lastCount = null;
+    
+    channel.onmessage = (event) => {
+        if (event.data === 'ask') {
+            // A new tab wants the current count
+            if (leading && lastCount !== null) {
+                channel.postMessage(lastCount);
+            }
+        } else {
+            setNotificationCount(event.data);
+        }
+    };
+    channel.postMessage('ask');
+    
+    navigator.locks.request('notification-stream', () => {
+        leading = true;
+        openNotificationStream((count) => {
+            lastCount = count;
+            setNotificationCount(count);
+            channel.postMessage(count);
+        });
+        // Hold the lock for as long as this tab is open
+        return new Promise(() => {});
+    });
+}
+
+/**
+ * Open the stream and pass every count to onCount. The browser reconnects
+ * by itself after network errors; if the server refuses the stream
+ * (disabled, or too many open), fall back to a single fetch.
+ */
+function openNotificationStream(onCount) {
+    const source = new EventSource('/api/notifications/stream');
+    source.addEventListener('unread', (event) => {
+        onCount(JSON.parse(event.data).count);
+    });
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            updateNotificationCount().then((count) => {
+                if (count !== undefined) {
+                    onCount(count);
+                }
+            });
+        }
+    };
+    return source;
+}
+
+/**
+ * Fetch the notification count once (without a stream)
  */
 async function updateNotificationCount() {
     try {
         const data = await apiCall('/notifications/unread-count');
-        const badge = document.getElementById('notification-count');
-        
-        if (badge && data.count > 0) {
-            badge.textContent = data.count;
-            badge.classList.remove('hidden');
-        } else if (badge) {
-            badge.classList.add('hidden');
-        }
+        setNotificationCount(data.count);
+        return data.count;
     } catch (error) {
         console.error('Failed to update notification count:', error);
     }
@@ -28,7 +28,10 @@ async function apiCall(endpoint, method = 'GET', body = null) {
         const data = await response.json();
         
         if (!response.ok) {
-            throw new Error(data.message || 'Request failed');
+            const error = new Error(data.message || 'Request failed');
+            error.status = response.status;
+            error.data = data;
+            throw error;
         }
         
         return data;
@@ -39,6 +42,19 @@ async function apiCall(endpoint, method = 'GET', body = null) {
     }
 }
 
+/**
+ * Ask whether to go ahead despite overlapping sessions (409 from join/create/edit)
+ * @param {Error} error - Error thrown by apiCall
+ * @returns {boolean} - True if the user wants to retry with allow_conflicts
+ */
+function confirmConflicts(error) {
+    if (error.status !== 409 || !error.data || !error.data.conflicts) {
+        return false;
+    }
+    const lines = error.data.conflicts.map(c => `- ${c.name ? c.name + ': ' : ''}${c.session_date} ${c.start_time}-${c.end_time}`);
+    return confirm(`${error.data.message}:\n${lines.join('\n')}\n\nContinue anyway?`);
+}
+
 /**
  * Show toast notification
  * @param {string} message - Message to display
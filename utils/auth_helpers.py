@@ -1,18 +1,52 @@
 """Authentication helpers and decorators"""
+import inspect
 from functools import wraps
-from flask import session, redirect, url_for, jsonify, request
+from flask import session, redirect, url_for, jsonify, request, current_app
+
+
+def _login_response():
+    """Response for requests without a logged-in user"""
+    # Check if it's an API request
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'message': 'Login required'}), 401
+    # Otherwise redirect to login page
+    return redirect(url_for('auth.login'))
 
 
 def login_required(f):
-    """Decorator to require login for routes"""
+    """Decorator to require login for routes (sync or async views)"""
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_coroutine(*args, **kwargs):
+            if 'user_id' not in session:
+                return _login_response()
+            return await f(*args, **kwargs)
+        return decorated_coroutine
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return _login_response()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def is_admin():
+    """True if the logged-in user's email is listed in ADMIN_EMAILS"""
+    email = (session.get('user_email') or '').lower()
+    return bool(email) and email in current_app.config.get('ADMIN_EMAILS', [])
+
+
+def admin_required(f):
+    """Decorator to restrict routes to administrators"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
-            # Check if it's an API request
+            return _login_response()
+        if not is_admin():
             if request.path.startswith('/api/'):
-                return jsonify({'success': False, 'message': 'Login required'}), 401
-            # Otherwise redirect to login page
-            return redirect(url_for('auth.login'))
+                return jsonify({'success': False, 'message': 'Admin access required'}), 403
+            return redirect(url_for('dashboard.index'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -0,0 +1,326 @@
+"""Process-wide cache for rarely changing query results (reference data)
+
+Also holds per-user views (dashboard summaries, schedules, ETags) that
+writes invalidate. The memory backend only invalidates within its own
+process, so configure_cache() refuses it for more than one process.
+"""
+import asyncio
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from flask import json, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+# Defaults used before/without configure_cache()
+DEFAULT_CACHE_SETTINGS = {
+    'backend': 'memory',    # 'memory' (per process) or 'redis' (shared)
+    'processes': 1,         # web processes serving the app (WEB_CONCURRENCY); >1 needs redis
+    'max_entries': 1024,    # LRU bound for the memory backend
+    'default_ttl': 300,     # seconds an entry lives unless cached() says otherwise
+    'redis_url': 'redis://localhost:6379/0',
+    'key_prefix': 'sso:'    # namespaces keys in a shared Redis
+}
+
+_settings = dict(DEFAULT_CACHE_SETTINGS)
+_backend = None
+_backend_lock = threading.Lock()
+_invalidation_hooks = {}
+
+
+class MemoryBackend:
+    """TTL + LRU dict, private to this process"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def incr(self, key, delta):
+        """Add delta to an integer entry; None (and no entry created) if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            value = entry[1] + delta
+            self._entries[key] = (entry[0], value)
+            return value
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class RedisBackend:
+    """Entries shared by every worker through a (local) Redis-compatible server"""
+
+    # INCRBY only keys that exist, so a missing counter is loaded rather than started at delta
+    _INCR_EXISTING = """
+        if redis.call('EXISTS', KEYS[1]) == 1 then
+            return redis.call('INCRBY', KEYS[1], ARGV[1])
+        end
+        return false
+    """
+
+    def __init__(self, url, key_prefix='sso:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE backend 'redis' needs the redis package (pip install redis)") from e
+        self.client = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        raw = self.client.get(self.key_prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        # flask.json uses the app's JSON provider, so dates match API responses
+        self.client.set(self.key_prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def incr(self, key, delta):
+        # Integers are stored as their JSON text, which INCRBY reads as a number
+        return self.client.eval(self._INCR_EXISTING, 1, self.key_prefix + key, int(delta))
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=self.key_prefix + prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+        return len(keys)
+
+    def stats(self):
+        return {'backend': 'redis'}
+
+
+def configure_cache(**settings):
+    """Set cache options (see DEFAULT_CACHE_SETTINGS); drops any existing backend"""
+    global _backend
+    unknown = set(settings) - set(DEFAULT_CACHE_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown cache settings: {', '.join(sorted(unknown))}")
+    merged = dict(_settings, **settings)
+    if merged['backend'] not in ('memory', 'redis'):
+        raise ValueError(f"Unknown cache backend: {merged['backend']}")
+    if merged['processes'] > 1 and merged['backend'] != 'redis':
+        raise ValueError("Several processes need CACHE_BACKEND=redis: the memory cache only "
+                         "invalidates entries in the process that wrote")
+    _settings.update(settings)
+    with _backend_lock:
+        _backend = None
+
+
+def is_shared():
+    """Whether every process sees the same entries (the redis backend)"""
+    return _settings['backend'] == 'redis'
+
+
+def get_backend():
+    """The configured backend, created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if _settings['backend'] == 'redis':
+                    _backend = RedisBackend(_settings['redis_url'], _settings['key_prefix'])
+                else:
+                    _backend = MemoryBackend(_settings['max_entries'])
+    return _backend
+
+
+def make_etag(value):
+    """Strong ETag (unquoted) for a JSON-serialisable value"""
+    payload = json.dumps(value, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _lookup(full_key):
+    try:
+        return get_backend().get(full_key)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {full_key}: {e}")
+        return None
+
+
+def _store(full_key, value, ttl):
+    entry = {'value': value, 'etag': make_etag(value)}
+    try:
+        get_backend().set(full_key, entry, ttl if ttl is not None else _settings['default_ttl'])
+    except Exception as e:
+        logger.warning(f"Cache write failed for {full_key}: {e}")
+    return entry
+
+
+def cached(namespace, key, loader, ttl=None):
+    """
+    Return {'value', 'etag'} for namespace:key, calling loader() on a miss
+    Backend failures are logged and fall through to loader().
+    """
+    full_key = f"{namespace}:{key}"
+    entry = _lookup(full_key)
+    if entry is None:
+        entry = _store(full_key, loader(), ttl)
+    return entry
+
+
+async def call_async(func, *args):
+    """
+    Run a cache function from an async view
+    Network backends are called in the default executor, so a Redis round
+    trip never blocks the event loop that every async view shares.
+    """
+    if isinstance(get_backend(), MemoryBackend):
+        return func(*args)
+    # With the app context, so values are serialised by the app's JSON provider
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(None, context.run, func, *args)
+
+
+async def cached_async(namespace, key, loader, ttl=None):
+    """cached() for async views: loader is a coroutine function"""
+    full_key = f"{namespace}:{key}"
+    entry = await call_async(_lookup, full_key)
+    if entry is None:
+        entry = await call_async(_store, full_key, await loader(), ttl)
+    return entry
+
+
+def cached_many(namespace, keys, loader, ttl=None):
+    """
+    cached() for several keys at once: loader(missing_keys) returns
+    {key: value} for the keys it could load, in one round trip
+    Returns: {key: {'value', 'etag'}} for every key found or loaded
+    """
+    entries = {}
+    missing = []
+    for key in keys:
+        entry = _lookup(f"{namespace}:{key}")
+        if entry is None:
+            missing.append(key)
+        else:
+            entries[key] = entry
+    if missing:
+        for key, value in loader(missing).items():
+            entries[key] = _store(f"{namespace}:{key}", value, ttl)
+    return entries
+
+
+def counter(namespace, key, loader, ttl=None):
+    """
+    Integer kept under namespace:key, calling loader() on a miss
+    Unlike cached() the raw number is stored, so incr_counter() can adjust it in place.
+    """
+    value = get_counter(namespace, key)
+    if value is None:
+        value = set_counter(namespace, key, loader(), ttl)
+    return value
+
+
+def get_counter(namespace, key):
+    """A stored counter, or None if it is not cached"""
+    return _lookup(f"{namespace}:{key}")
+
+
+def set_counter(namespace, key, value, ttl=None):
+    """Store an integer for counter()/incr_counter()"""
+    full_key = f"{namespace}:{key}"
+    try:
+        get_backend().set(full_key, int(value), ttl if ttl is not None else _settings['default_ttl'])
+    except Exception as e:
+        logger.warning(f"Cache write failed for {full_key}: {e}")
+    return int(value)
+
+
+def incr_counter(namespace, key, delta):
+    """
+    Add delta to a stored counter atomically
+    Returns: the new value, or None if the counter is not cached (load it with counter())
+    """
+    full_key = f"{namespace}:{key}"
+    try:
+        return get_backend().incr(full_key, delta)
+    except Exception as e:
+        logger.warning(f"Cache increment failed for {full_key}: {e}")
+        return None
+
+
+def user_namespace(user_id):
+    """
+    Namespace for one user's cached views
+    Dropped whenever that user writes to the database (see database/context.py).
+    """
+    return f"user:{user_id}"
+
+
+def on_invalidate(namespace, hook):
+    """Call hook(namespace) whenever namespace is invalidated"""
+    _invalidation_hooks.setdefault(namespace, []).append(hook)
+
+
+def invalidate(namespace):
+    """Drop every entry in namespace; call after writing the underlying table"""
+    removed = get_backend().delete_prefix(f"{namespace}:")
+    for hook in _invalidation_hooks.get(namespace, []):
+        hook(namespace)
+    logger.debug(f"Invalidated cache namespace {namespace} ({removed} entries)")
+    return removed
+
+
+def cache_stats():
+    """Counters for the active backend"""
+    stats = get_backend().stats()
+    stats['default_ttl'] = _settings['default_ttl']
+    return stats
+
+
+def cached_json_response(entry, max_age=None):
+    """
+    jsonify a cached entry with ETag and Cache-Control headers
+    Answers 304 Not Modified when the browser already holds this version.
+    """
+    max_age = max_age if max_age is not None else _settings['default_ttl']
+    response = jsonify({'success': True, 'data': entry['value']})
+    response.set_etag(entry['etag'])
+    # Responses are behind login, so only the browser (not shared proxies) may keep them
+    response.cache_control.private = True
+    response.cache_control.max_age = int(max_age)
+    return response.make_conditional(request)
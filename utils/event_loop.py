@@ -0,0 +1,49 @@
+"""Background asyncio event loop that runs the app's async views
+
+Flask's default async support starts a fresh event loop for every call,
+which would throw away the aiomysql pool each request. Instead all async
+views are scheduled onto one long-lived loop in a daemon thread, so the
+async pool (and any in-flight queries from other requests) are shared.
+
+This is still WSGI: the thread serving the request blocks in run() until
+the view finishes, so a process serves no more requests at once than it
+has threads. What async views gain is concurrency inside one request
+(e.g. asyncio.gather over independent queries); serving more requests
+per process would take an ASGI server.
+"""
+import asyncio
+import threading
+from functools import wraps
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Get the shared event loop, starting its thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='async-views', daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def run(coro):
+    """Run a coroutine on the shared loop and block the calling thread until it finishes
+
+    The calling thread's context variables (Flask's request and app
+    contexts) are copied into the task, so request/session/g work as usual.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def async_to_sync(func):
+    """Wrap an async view so WSGI can call it synchronously"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return run(func(*args, **kwargs))
+    return wrapper
@@ -0,0 +1,186 @@
+"""Per-user event broker for Server-Sent Events
+
+publish(user_id, event, data) hands a message to every open stream of
+that user (see /api/notifications/stream). Each stream holds a
+Subscription, a small queue drained by its response generator.
+
+The memory backend only reaches streams served by this process. With the
+redis backend every process subscribes to one pattern and passes what
+it receives to its local streams, so a publish from any worker reaches
+every tab. configure_events() refuses to enable streams for more than one
+process unless both this broker and the cache use redis: otherwise
+counters and events would only reach the process that changed them.
+
+Each stream holds a server thread, so browsers share one stream between
+their tabs (static/js/main.js) and a user may hold at most max_streams
+per process.
+"""
+import logging
+import queue
+import threading
+import time
+from flask import json
+from utils import cache
+
+logger = logging.getLogger(__name__)
+
+# Defaults used before/without configure_events()
+DEFAULT_EVENT_SETTINGS = {
+    'enabled': True,                # False: no streams; unread counts are counted per request
+    'processes': 1,                 # web processes serving the app (WEB_CONCURRENCY)
+    'max_streams': 3,               # open streams per user and process; more are refused
+    'backend': 'memory',            # 'memory' (per process) or 'redis' (shared pub/sub)
+    'redis_url': 'redis://localhost:6379/0',
+    'channel_prefix': 'sso:events:',
+    'heartbeat': 25,                # seconds between keepalive comments on idle streams
+    'queue_size': 32                # undelivered messages kept per stream (oldest dropped)
+}
+
+_settings = dict(DEFAULT_EVENT_SETTINGS)
+_subscribers = {}                   # user_id -> set of Subscription
+_subscribers_lock = threading.Lock()
+_redis = None
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class Subscription:
+    """One open stream's queue of {'event', 'data'} messages"""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.messages = queue.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        # A slow client only ever needs the latest state, so drop the oldest
+        while True:
+            try:
+                self.messages.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.messages.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next message, or None after timeout seconds without one"""
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def configure_events(**settings):
+    """Set broker options (see DEFAULT_EVENT_SETTINGS)"""
+    unknown = set(settings) - set(DEFAULT_EVENT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown event settings: {', '.join(sorted(unknown))}")
+    merged = dict(_settings, **settings)
+    if merged['backend'] not in ('memory', 'redis'):
+        raise ValueError(f"Unknown event backend: {merged['backend']}")
+    if merged['enabled'] and merged['processes'] > 1 and not (merged['backend'] == 'redis' and cache.is_shared()):
+        raise ValueError("Event streams across several processes need the redis EVENTS and CACHE backends "
+                         "(or disable them with EVENTS enabled=False)")
+    _settings.update(settings)
+
+
+def enabled():
+    return _settings['enabled']
+
+
+def heartbeat():
+    return _settings['heartbeat']
+
+
+def _client():
+    global _redis
+    if _redis is None:
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("EVENTS backend 'redis' needs the redis package (pip install redis)") from e
+        _redis = redis.Redis.from_url(_settings['redis_url'])
+    return _redis
+
+
+def _deliver(user_id, message):
+    with _subscribers_lock:
+        subscriptions = list(_subscribers.get(user_id, ()))
+    for subscription in subscriptions:
+        subscription.put(message)
+
+
+def _listen():
+    """Forward messages from Redis to this process's streams (runs in a daemon thread)"""
+    prefix = _settings['channel_prefix']
+    while True:
+        try:
+            pubsub = _client().pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(prefix + '*')
+            for item in pubsub.listen():
+                channel = item['channel'].decode()
+                _deliver(int(channel[len(prefix):]), json.loads(item['data']))
+        except Exception as e:
+            logger.error(f"Event listener lost Redis, reconnecting: {e}")
+            time.sleep(1)
+
+
+def _ensure_listener():
+    global _listener
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _listener = threading.Thread(target=_listen, name='event-listener', daemon=True)
+                _listener.start()
+
+
+def subscribe(user_id):
+    """
+    Open a Subscription to user_id's events; pair with unsubscribe()
+    Returns None if the user already holds max_streams in this process.
+    """
+    if _settings['backend'] == 'redis':
+        _ensure_listener()
+    subscription = Subscription(int(user_id), _settings['queue_size'])
+    with _subscribers_lock:
+        subscriptions = _subscribers.setdefault(subscription.user_id, set())
+        if len(subscriptions) >= _settings['max_streams']:
+            return None
+        subscriptions.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription):
+    """Close a Subscription (safe to call more than once)"""
+    with _subscribers_lock:
+        subscriptions = _subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del _subscribers[subscription.user_id]
+
+
+def publish(user_id, event, data):
+    """Send an event to every open stream of user_id; failures are logged, not raised"""
+    if not _settings['enabled']:
+        return
+    message = {'event': event, 'data': data}
+    if _settings['backend'] == 'redis':
+        try:
+            _client().publish(_settings['channel_prefix'] + str(int(user_id)), json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Could not publish {event} for user {user_id}: {e}")
+    else:
+        _deliver(int(user_id), message)
+
+
+def format_sse(message):
+    """A message as a text/event-stream frame"""
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+def stream_count():
+    """Streams open in this process (for diagnostics)"""
+    with _subscribers_lock:
+        return sum(len(subscriptions) for subscriptions in _subscribers.values())
@@ -0,0 +1,21 @@
+"""Helpers for creating notifications"""
+from datetime import datetime
+
+
+def send_notifications(db, student_ids, notification_type, message, related_session_id=None):
+    """
+    Insert the same notification for many students in one bulk INSERT
+    Returns the number of notifications created; once they have committed,
+    pass it to database.unread_counts.add() to update the recipients' badges
+    """
+    sent_date = datetime.now()
+    rows = [
+        (student_id, notification_type, message, sent_date, 0, related_session_id)
+        for student_id in dict.fromkeys(student_ids)
+    ]
+    result = db.bulk_insert(
+        'NOTIFICATION',
+        rows,
+        columns=['student_id', 'notification_type', 'message', 'sent_date', 'read_status', 'related_session_id']
+    )
+    return result['affected_rows']